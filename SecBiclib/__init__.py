@@ -6,4 +6,4 @@
     This file is part of SecBic-CCA.
 
 """
-__import__('pkg_resources').declare_namespace(__name__)
+__path__ = __import__('pkgutil').extend_path(__path__, __name__)
@@ -7,11 +7,39 @@
 
 """
 
-from .cca import ChengChurchAlgorithm
-from .secca import SecuredChengChurchAlgorithm
-from .optencryptedmsr import *
-from .optencryptedmsrcol import *
-from .optencryptedmsrow import *
-from .encryptedmsr import *
-from .encryptedmsrow import *
-from .encryptedmsrcol import *
+import importlib
+import importlib.util
+
+# Submodules are imported on first access, so that importing the package (or using the plaintext algorithm) loads
+# neither Pyfhel nor the kernels
+_classes = {'ChengChurchAlgorithm': 'cca', 'SecuredChengChurchAlgorithm': 'secca'}
+
+# Modules whose public functions are exported by the package, later ones taking precedence on name clashes
+_kernel_modules = ('optencryptedmsr', 'optencryptedmsrcol', 'optencryptedmsrow', 'encryptedmsr', 'encryptedmsrow',
+                   'encryptedmsrcol', 'intencryptedmsr')
+
+
+def __getattr__(name):
+    # Private and dunder names (probed by tooling) are never exported, so they load no module
+    if name.startswith('_'):
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+    if name in _classes:
+        value = getattr(importlib.import_module('.' + _classes[name], __name__), name)
+    elif importlib.util.find_spec('.' + name, __name__) is not None:
+        value = importlib.import_module('.' + name, __name__)
+    else:
+        for module_name in reversed(_kernel_modules):
+            module = importlib.import_module('.' + module_name, __name__)
+            if hasattr(module, name):
+                value = getattr(module, name)
+                break
+        else:
+            raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_classes) | set(_kernel_modules))
@@ -0,0 +1,829 @@
+"""
+    SecBic-CCA: A Python library of privacy-preserving biclustering algorithm (Cheng and Church) with Homomorphic Encryption
+
+    Copyright (C) 2023  Shokofeh VahidianSadegh
+
+    This file is part of SecBic-CCA.
+
+"""
+import math
+import numbers
+import time
+import numpy as np
+from SecBiclib.algorithms.ciphercache import PlaintextCache
+from SecBiclib.algorithms.costmodel import CostModel
+from SecBiclib.algorithms.hesession import DEFAULT_CKKS_PARAMS
+from SecBiclib.algorithms.memory import CiphertextPool, ciphertext_bytes
+
+
+class Ciphertext:
+    """Ciphertext of an HE backend
+
+    Wraps the backend's own ciphertext object (raw) and supports the operators of Pyfhel's PyCtxt: +, -, * and / with
+    ciphertexts, scalars (applied to every slot) and lists or arrays (zero-padded to the slot count), ** for powers
+    (relinearized), << and >> for rotations and ~ for relinearization. +=, -=, *= and **= change the ciphertext in
+    place instead of allocating a new one. Every operation goes through the backend.
+
+    If the backend tracks memory, accounted holds the tracker, bytes and level the ciphertext was reported with, and
+    the ciphertext is reported as released when it is garbage collected.
+    """
+
+    __slots__ = ('backend', 'raw', 'accounted')
+
+    def __init__(self, backend, raw):
+        self.backend = backend
+        self.raw = raw
+        self.accounted = None
+
+    def __del__(self):
+        if self.accounted is not None:
+            memory, n_bytes, level = self.accounted
+            memory.release(n_bytes, level)
+
+    def __iadd__(self, other):
+        return self.backend._inplace('add', self, other)
+
+    def __isub__(self, other):
+        return self.backend._inplace('sub', self, other)
+
+    def __imul__(self, other):
+        return self.backend._inplace('mul', self, other)
+
+    def __ipow__(self, exponent):
+        return self.backend._inplace('pow', self, exponent)
+
+    @property
+    def level(self):
+        """Number of rescales (modulus switches) applied to the ciphertext."""
+        return self.backend._level(self.raw)
+
+    def copy(self):
+        return self.backend._unary('copy', self)
+
+    def __add__(self, other):
+        return self.backend._binary('add', self, other)
+
+    def __radd__(self, other):
+        return self.backend._binary('add', self, other)
+
+    def __sub__(self, other):
+        return self.backend._binary('sub', self, other)
+
+    def __rsub__(self, other):
+        return self.backend._binary('rsub', self, other)
+
+    def __mul__(self, other):
+        return self.backend._binary('mul', self, other)
+
+    def __rmul__(self, other):
+        return self.backend._binary('mul', self, other)
+
+    def __truediv__(self, other):
+        if isinstance(other, Ciphertext) or (isinstance(other, np.ndarray) and other.dtype == object):
+            return NotImplemented
+        reciprocal = 1 / other if isinstance(other, numbers.Number) else 1 / np.asarray(other, dtype=float)
+
+        return self.backend._binary('mul', self, reciprocal)
+
+    def __pow__(self, exponent):
+        return self.backend._binary('pow', self, exponent)
+
+    def __neg__(self):
+        return self.backend._unary('neg', self)
+
+    def __invert__(self):
+        relinearized = self.copy()
+        self.backend.relinearize(relinearized)
+
+        return relinearized
+
+    def __lshift__(self, k):
+        return self.backend.rotate(self, k, True)
+
+    def __rshift__(self, k):
+        return self.backend.rotate(self, -k, True)
+
+    def __repr__(self):
+        return '<Ciphertext {}>'.format(repr(self.raw))
+
+
+class HEBackend:
+    """Homomorphic Encryption backend used by the MSR kernels
+
+    The kernels call the Pyfhel-like methods below (encrypt, decrypt, rotate, cumul_add, rescale_to_next, relinearize,
+    get_nSlots) and the Ciphertext operators. Subclasses implement the primitives (_encrypt, _add, _rotate, ...) on
+    their own ciphertext objects; every primitive is run through _apply with its operation name ('mul' for
+    ciphertext-ciphertext products, 'mul_plain' for products with plaintexts, and so on), the single place to hook
+    instrumentation into: if profile is set to a profiling.HEProfile, each primitive is counted and timed in it
+    (rotations once per key switch of the rotations.RotationPlan set in rotation_plan, if any).
+    Ciphertexts are created and changed through _wrap and _replace, which report them to the memory.MemoryTracker
+    set in memory, if any. If tracer is set to a tracing.Tracer, each primitive is also reported to it with its start
+    and end times. Kernels choosing between implementations predict their cost with the costmodel.CostModel
+    set in cost_model (see get_cost_model). Column-per-ciphertext kernels encrypt their columns through the
+    ciphercache.CiphertextCache set in cache, if any, and split columns taller than the slots into row chunks of
+    their own ciphertexts, in at least no_ciphertexts chunks if set (see ciphermatrix.row_chunks). Every constant
+    and mask combined with a ciphertext is encoded through the backend's ciphercache.PlaintextCache (plaintexts, of at
+    most plaintext_cache_bytes), created on first use, at the level of the ciphertext and at its scale for additions
+    and subtractions. Operations evaluated in place
+    (the in-place operators of Ciphertext) run the in-place primitives (_iadd, ...), and ciphertexts released by the
+    kernels (see release) are pooled in the memory.CiphertextPool set in pool (created on first use, of at most
+    pool_bytes of fresh ciphertexts) and encrypted into again; the profile records the allocations both avoid.
+    """
+
+    scheme = None
+    params = None
+    rotation_plan = None
+    profile = None
+    memory = None
+    tracer = None
+    cost_model = None
+    cache = None
+    no_ciphertexts = None
+    plaintexts = None
+    plaintext_cache_bytes = 2 ** 28
+    pool = None
+    pool_bytes = 2 ** 26
+
+    def get_cost_model(self):
+        """Returns the cost model of the backend, calibrating it on first use."""
+        if self.cost_model is None:
+            self.cost_model = CostModel.calibrate(self)
+
+        return self.cost_model
+
+    def start(self):
+        """Starts the context and key setup, if any."""
+        return self
+
+    def wait(self):
+        """Waits for the context and key setup, if any, and returns the backend."""
+        return self
+
+    def get_nSlots(self):
+        raise NotImplementedError
+
+    def encrypt(self, values):
+        buffer = None if self.pool is None else self.pool.take()
+        if buffer is None:
+            self._reserve_fresh()
+            return self._wrap(self._apply('encrypt', self._encrypt, values))
+
+        raw, accounted = buffer
+        self._release(accounted)
+        self._reserve_fresh()
+        ctxt = self._wrap(self._apply('encrypt', self._encrypt_into, values, raw))
+        if self.profile is not None:
+            self.profile.record_saving('pooled', self.ciphertext_bytes(ctxt))
+
+        return ctxt
+
+    def release(self, *ctxts):
+        """Hands the ciphertexts, which the caller no longer uses anywhere, to the ciphertext pool so that later
+        encryptions reuse their buffers; they cannot be used afterwards. Without context parameters to size the pool,
+        the ciphertexts are left to be freed as usual."""
+        if self.pool is None:
+            if self.params is None:
+                return
+            self.pool = CiphertextPool.for_context(self.params, self.pool_bytes)
+
+        for ctxt in ctxts:
+            if ctxt.raw is not None and self.pool.put(ctxt.raw, ctxt.accounted):
+                ctxt.raw, ctxt.accounted = None, None
+
+    def clear_pool(self):
+        """Frees the pooled ciphertext buffers."""
+        if self.pool is not None:
+            for _, accounted in self.pool.clear():
+                self._release(accounted)
+
+    def decrypt(self, ctxt):
+        return self._apply('decrypt', self._decrypt, ctxt.raw)
+
+    def encode(self, values, level=0, scale=None):
+        """Returns the backend plaintext of the values at the given level and scale (None for the default scale)."""
+        return self._apply('encode', self._encode, values, level, scale)
+
+    def plaintext_bytes(self, level=0):
+        """Memory held by a plaintext at the given level."""
+        return ciphertext_bytes(self.params, level, 1)
+
+    def rotate(self, ctxt, k, in_new_ctxt=False):
+        """Rotates the slots of the ciphertext k positions to the left (to the right if k is negative)."""
+        if in_new_ctxt:
+            self._reserve('rotate', ctxt.raw)
+        # A step without a key of its own costs one key switch per keyed step it is built from
+        n_switches = 1 if self.rotation_plan is None else self.rotation_plan.key_switches(k)
+        raw = self._apply('rotate', self._rotate if in_new_ctxt else self._irotate, ctxt.raw, k, count=n_switches)
+
+        return self._result(ctxt, raw, in_new_ctxt)
+
+    def cumul_add(self, ctxt, in_new_ctxt=True):
+        """Sums all the slots of the ciphertext into every slot."""
+        if in_new_ctxt:
+            self._reserve('cumul_add', ctxt.raw)
+        raw = self._apply('cumul_add', self._cumul_add, ctxt.raw)
+
+        return self._result(ctxt, raw, in_new_ctxt)
+
+    def rescale_to_next(self, ctxt):
+        self._replace(ctxt, self._apply('rescale', self._rescale, ctxt.raw))
+
+    def relinearize(self, ctxt):
+        self._replace(ctxt, self._apply('relinearize', self._relinearize, ctxt.raw))
+
+    def ciphertext_bytes(self, ctxt):
+        """Memory held by the ciphertext."""
+        return ciphertext_bytes(self.params, self._level(ctxt.raw), self._size(ctxt.raw))
+
+    def _apply(self, op, primitive, *args, count=1):
+        if self.profile is None and self.tracer is None:
+            return primitive(*args)
+
+        t0 = time.perf_counter()
+        result = primitive(*args)
+        t1 = time.perf_counter()
+        if self.profile is not None:
+            self.profile.record(op, t1 - t0, count)
+        if self.tracer is not None:
+            self.tracer.record(op, t0, t1)
+
+        return result
+
+    def _reserve_fresh(self):
+        if self.memory is not None:
+            self.memory.check(ciphertext_bytes(self.params), 0)
+
+    def _reserve(self, op, *raws, replaced=None):
+        """Checks the budget of the memory tracker, if any, for the result of op on the ciphertexts raws before the
+        backend makes it: at their deepest level, with as many polynomials as a product of them (or the largest of
+        them for other operations), less the bytes of the ciphertext it replaces if any"""
+        if self.memory is None:
+            return
+
+        level = max(self._level(raw) for raw in raws)
+        sizes = [self._size(raw) for raw in raws]
+        n_bytes = ciphertext_bytes(self.params, level, sum(sizes) - len(sizes) + 1 if op == 'mul' else max(sizes))
+        if replaced is not None:
+            n_bytes -= replaced[1]
+        self.memory.check(n_bytes, level)
+
+    def _wrap(self, raw):
+        ctxt = Ciphertext(self, raw)
+        if self.memory is not None:
+            ctxt.accounted = self._account(raw)
+
+        return ctxt
+
+    def _replace(self, ctxt, raw):
+        accounted, ctxt.accounted = ctxt.accounted, None
+        self._release(accounted)
+
+        ctxt.raw = raw
+        if self.memory is not None:
+            ctxt.accounted = self._account(raw)
+
+    @staticmethod
+    def _release(accounted):
+        if accounted is not None:
+            memory, n_bytes, level = accounted
+            memory.release(n_bytes, level)
+
+    def _account(self, raw):
+        level = self._level(raw)
+        n_bytes = ciphertext_bytes(self.params, level, self._size(raw))
+        self.memory.allocate(n_bytes, level)
+
+        return self.memory, n_bytes, level
+
+    def _result(self, ctxt, raw, in_new_ctxt):
+        if in_new_ctxt:
+            return self._wrap(raw)
+
+        self._replace(ctxt, raw)
+        return ctxt
+
+    def _unary(self, op, ctxt):
+        self._reserve(op, ctxt.raw)
+        return self._wrap(self._apply(op, getattr(self, '_' + op), ctxt.raw))
+
+    def _binary(self, op, ctxt, other):
+        if isinstance(other, np.ndarray) and other.dtype == object:
+            # Arrays of ciphertexts: let numpy apply the operator element-wise
+            return NotImplemented
+
+        if isinstance(other, Ciphertext):
+            self._reserve(op, ctxt.raw, other.raw)
+            return self._wrap(self._apply(op, getattr(self, '_' + op), ctxt.raw, other.raw))
+
+        self._reserve(op, ctxt.raw)
+        if op == 'pow':
+            return self._wrap(self._apply(op, self._pow, ctxt.raw, other))
+
+        return self._wrap(self._apply(op + '_plain', getattr(self, '_' + op), ctxt.raw,
+                                      self._encoded(other, ctxt.raw, op)))
+
+    def _inplace(self, op, ctxt, other):
+        """Applies the operation to ctxt in place, through the in-place primitive of the backend"""
+        if isinstance(other, np.ndarray) and other.dtype == object:
+            return NotImplemented
+
+        primitive = getattr(self, '_i' + op)
+        self._reserve(op, ctxt.raw, *([other.raw] if isinstance(other, Ciphertext) else []), replaced=ctxt.accounted)
+        if isinstance(other, Ciphertext):
+            raw = self._apply(op, primitive, ctxt.raw, other.raw)
+        elif op == 'pow':
+            raw = self._apply(op, primitive, ctxt.raw, other)
+        else:
+            raw = self._apply(op + '_plain', primitive, ctxt.raw, self._encoded(other, ctxt.raw, op))
+
+        self._replace(ctxt, raw)
+        if self.profile is not None and self.params is not None:
+            self.profile.record_saving('in_place', self.ciphertext_bytes(ctxt))
+
+        return ctxt
+
+    def _encoded(self, values, raw, op):
+        """Cached plaintext of the values at the level of the ciphertext raw, and at its scale unless multiplied.
+        Without context parameters to size the cache, the values are encoded on every use."""
+        level, scale = self._level(raw), None if op == 'mul' else self._scale(raw)
+        if self.params is None:
+            if isinstance(values, numbers.Number):
+                values = np.full(self.get_nSlots(), values)
+            return self.encode(values, level, scale)
+
+        if self.plaintexts is None:
+            self.plaintexts = PlaintextCache(self.plaintext_cache_bytes)
+
+        return self.plaintexts.encode(self, values, level, scale)
+
+    def _rsub(self, x, y):
+        return self._add(self._neg(x), y)
+
+    # In-place primitives, returning the changed ciphertext; by default a new one replaces it
+    def _iadd(self, x, y):
+        return self._add(x, y)
+
+    def _isub(self, x, y):
+        return self._sub(x, y)
+
+    def _imul(self, x, y):
+        return self._mul(x, y)
+
+    def _ipow(self, x, exponent):
+        return self._pow(x, exponent)
+
+    def _irotate(self, x, k):
+        return self._rotate(x, k)
+
+    def _encrypt_into(self, values, raw):
+        return self._encrypt(values)
+
+    def _level(self, raw):
+        raise NotImplementedError
+
+    def _scale(self, raw):
+        raise NotImplementedError
+
+    def _size(self, raw):
+        raise NotImplementedError
+
+
+class PyfhelBackend(HEBackend):
+    """Backend running the kernels on Pyfhel
+
+    Parameters
+    ----------
+    session : SecBiclib.algorithms.hesession.HESession or Pyfhel.Pyfhel
+        Session (or Pyfhel object) holding the context and keys. Rotations go through its rotate(), so that rotation
+        plans of HE sessions apply.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    @property
+    def params(self):
+        return getattr(self.session, 'params', None)
+
+    @property
+    def scheme(self):
+        return None if self.params is None else self.params['scheme'].upper()
+
+    @property
+    def t(self):
+        """Plaintext modulus (BFV)."""
+        return self.session.t
+
+    @property
+    def rotation_plan(self):
+        if getattr(self.session, 'full_rotation_keys', False):
+            return None
+
+        return getattr(self.session, 'rotation_plan', None)
+
+    def start(self):
+        if hasattr(self.session, 'start'):
+            self.session.start()
+
+        return self
+
+    def wait(self):
+        if hasattr(self.session, 'wait'):
+            self.session.wait()
+
+        return self
+
+    def get_nSlots(self):
+        return self.session.get_nSlots()
+
+    def _encrypt(self, values):
+        return self.session.encrypt(np.asarray(values))
+
+    def _encrypt_into(self, values, raw):
+        return self.session.encrypt(np.asarray(values), ctxt=raw)
+
+    def _decrypt(self, x):
+        return self.session.decrypt(x)
+
+    def _encode(self, values, level, scale):
+        if self.scheme == 'BFV':
+            ptxt = self.session.encodeInt(np.asarray(values, dtype=np.int64))
+        elif scale is None:
+            ptxt = self.session.encodeFrac(np.asarray(values, dtype=np.float64))
+        else:
+            ptxt = self.session.encodeFrac(np.asarray(values, dtype=np.float64), scale=scale)
+        for _ in range(level):
+            self.session.mod_switch_to_next(ptxt)
+
+        return ptxt
+
+    def _rotate(self, x, k):
+        return self.session.rotate(x, k, True)
+
+    def _cumul_add(self, x):
+        return self.session.cumul_add(x, True)
+
+    def _rescale(self, x):
+        self.session.rescale_to_next(x)
+        return x
+
+    def _relinearize(self, x):
+        self.session.relinearize(x)
+        return x
+
+    def _copy(self, x):
+        return x.copy()
+
+    def _neg(self, x):
+        return -x
+
+    def _add(self, x, y):
+        return x + y
+
+    def _sub(self, x, y):
+        return x - y
+
+    def _mul(self, x, y):
+        return x * y
+
+    def _pow(self, x, exponent):
+        return x ** exponent
+
+    def _iadd(self, x, y):
+        x += y
+        return x
+
+    def _isub(self, x, y):
+        x -= y
+        return x
+
+    def _imul(self, x, y):
+        x *= y
+        return x
+
+    def _ipow(self, x, exponent):
+        x **= exponent
+        return x
+
+    def _irotate(self, x, k):
+        self.session.rotate(x, k, False)
+        return x
+
+    def _level(self, x):
+        return x.mod_level
+
+    def _scale(self, x):
+        return x.scale
+
+    def _size(self, x):
+        size = x.size
+        return size() if callable(size) else size
+
+
+class SimulatedCiphertext:
+    """Plaintext stand-in for a ciphertext of the simulation backend
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Slot values.
+
+    level : int
+        Number of rescales applied.
+
+    scale_bits : int
+        Bits of the CKKS scale of the values (0 for BFV).
+
+    size : int
+        Number of polynomials (2 for a fresh or relinearized ciphertext, 3 after a product).
+    """
+
+    __slots__ = ('values', 'level', 'scale_bits', 'size')
+
+    def __init__(self, values, level=0, scale_bits=0, size=2):
+        self.values = values
+        self.level = level
+        self.scale_bits = scale_bits
+        self.size = size
+
+    def __repr__(self):
+        return '<SimulatedCiphertext level={}, scale_bits={}, size={}>'.format(self.level, self.scale_bits, self.size)
+
+
+class SimulatedPlaintext:
+    """Plaintext stand-in for an encoded plaintext of the simulation backend: slot values (None when only levels are
+    followed), level and scale bits"""
+
+    __slots__ = ('values', 'level', 'scale_bits')
+
+    def __init__(self, values, level=0, scale_bits=0):
+        self.values = values
+        self.level = level
+        self.scale_bits = scale_bits
+
+
+class SimulatedBackend(HEBackend):
+    """NumPy plaintext simulation of a Pyfhel context, for profiling and large-scale tests
+
+    Nothing is encrypted. The slots, rotations and levels behave as in Pyfhel for the same parameters: CKKS
+    ciphertexts hold n / 2 slots, BFV ciphertexts n slots in two rows of n / 2 rotated separately, and values are
+    reduced modulo a plaintext modulus of t_bits bits. Rescaling past the end of the CKKS modulus chain, or a product
+    whose scale reaches the modulus left at its level, raises a ValueError as SEAL does. CKKS values are exact: the
+    approximation noise is not simulated.
+
+    Parameters
+    ----------
+    params : dict, default: None
+        Keyword arguments of Pyfhel.contextGen the simulation follows. If None, DEFAULT_CKKS_PARAMS is used.
+    """
+
+    def __init__(self, params=None):
+        self.params = dict(DEFAULT_CKKS_PARAMS if params is None else params)
+        self.scheme = self.params['scheme'].upper()
+        n = self.params['n']
+
+        if self.scheme == 'CKKS':
+            self.n_slots = n // 2
+            self.qi_sizes = list(self.params['qi_sizes'])
+            self.scale_bits = int(round(math.log2(self.params['scale'])))
+            self.depth = len(self.qi_sizes) - 2
+            self.t = None
+        else:
+            self.n_slots = n
+            self.scale_bits = 0
+            self.depth = None
+            self.t = self.params['t'] if 't' in self.params else batching_prime(self.params['t_bits'], n)
+
+    def get_nSlots(self):
+        return self.n_slots
+
+    def _slots(self, values):
+        values = np.asarray(values).ravel()
+        if len(values) > self.n_slots:
+            raise ValueError("Cannot encode {} values in {} slots".format(len(values), self.n_slots))
+
+        if self.t is None:
+            slots = np.zeros(self.n_slots)
+            slots[:len(values)] = values
+        else:
+            slots = np.zeros(self.n_slots, dtype=object)
+            slots[:len(values)] = [int(value) % self.t for value in values]
+
+        return slots
+
+    def _plain(self, other):
+        if isinstance(other, SimulatedPlaintext):
+            return other.values
+
+        if isinstance(other, numbers.Number):
+            return np.full(self.n_slots, other if self.t is None else int(other) % self.t,
+                           dtype=float if self.t is None else object)
+
+        return self._slots(other)
+
+    def _reduce(self, values):
+        return values if self.t is None else values % self.t
+
+    def _encrypt(self, values):
+        return SimulatedCiphertext(self._slots(values), 0, self.scale_bits)
+
+    def _encode(self, values, level, scale):
+        return SimulatedPlaintext(self._plain(values), level, self.scale_bits if scale is None else scale)
+
+    def _decrypt(self, x):
+        if self.t is None:
+            return x.values.copy()
+
+        centered = [int(value) - self.t if value > self.t // 2 else int(value) for value in x.values]
+        return np.array(centered, dtype=np.int64)
+
+    def _rotate(self, x, k):
+        if self.t is None:
+            values = np.roll(x.values, -k)
+        else:
+            half = self.n_slots // 2
+            values = np.concatenate([np.roll(x.values[:half], -k), np.roll(x.values[half:], -k)])
+
+        return SimulatedCiphertext(values, x.level, x.scale_bits, x.size)
+
+    def _cumul_add(self, x):
+        if self.t is None:
+            values = np.full(self.n_slots, x.values.sum())
+        else:
+            half = self.n_slots // 2
+            values = np.concatenate([np.full(half, x.values[:half].sum() % self.t, dtype=object),
+                                     np.full(half, x.values[half:].sum() % self.t, dtype=object)])
+
+        return SimulatedCiphertext(values, x.level, x.scale_bits, x.size)
+
+    def _rescale(self, x):
+        if self.depth is None:
+            return x
+
+        if x.level >= self.depth:
+            raise ValueError("End of modulus switching chain reached: {} rescales for a chain of depth {}".format(
+                x.level + 1, self.depth))
+
+        dropped = self.qi_sizes[len(self.qi_sizes) - 2 - x.level]
+        return SimulatedCiphertext(x.values, x.level + 1, x.scale_bits - dropped, x.size)
+
+    def _relinearize(self, x):
+        return SimulatedCiphertext(x.values, x.level, x.scale_bits, 2)
+
+    def _copy(self, x):
+        return SimulatedCiphertext(x.values.copy(), x.level, x.scale_bits, x.size)
+
+    def _neg(self, x):
+        return SimulatedCiphertext(self._reduce(-x.values), x.level, x.scale_bits, x.size)
+
+    def _aligned(self, x, y):
+        """Level, scale and size of the result of an addition, after Pyfhel's level alignment"""
+        if not isinstance(y, SimulatedCiphertext):
+            return x.level, x.scale_bits, x.size
+        top = x if x.level >= y.level else y
+
+        return top.level, top.scale_bits, max(x.size, y.size)
+
+    def _add(self, x, y):
+        values = x.values + (y.values if isinstance(y, SimulatedCiphertext) else self._plain(y))
+        return SimulatedCiphertext(self._reduce(values), *self._aligned(x, y))
+
+    def _sub(self, x, y):
+        values = x.values - (y.values if isinstance(y, SimulatedCiphertext) else self._plain(y))
+        return SimulatedCiphertext(self._reduce(values), *self._aligned(x, y))
+
+    def _rsub(self, x, y):
+        return SimulatedCiphertext(self._reduce(self._plain(y) - x.values), x.level, x.scale_bits, x.size)
+
+    def _mul(self, x, y):
+        if isinstance(y, SimulatedCiphertext):
+            level = max(x.level, y.level)
+            return SimulatedCiphertext(self._reduce(x.values * y.values), level,
+                                       self._product_scale(level, x.scale_bits + y.scale_bits), x.size + y.size - 1)
+
+        return SimulatedCiphertext(self._reduce(x.values * self._plain(y)), x.level,
+                                   self._product_scale(x.level, x.scale_bits + self._plain_scale(y)), x.size)
+
+    def _plain_scale(self, y):
+        return y.scale_bits if isinstance(y, SimulatedPlaintext) else self.scale_bits
+
+    def _pow(self, x, exponent):
+        values = x.values ** exponent if self.t is None else np.array([pow(int(v), exponent, self.t)
+                                                                      for v in x.values], dtype=object)
+        return SimulatedCiphertext(values, x.level, self._product_scale(x.level, x.scale_bits * exponent), 2)
+
+    def _product_scale(self, level, scale_bits):
+        """Scale of a product at the given level, checked against the modulus left at that level"""
+        if self.depth is not None:
+            modulus_bits = sum(self.qi_sizes[:len(self.qi_sizes) - 1 - level])
+            if scale_bits >= modulus_bits:
+                raise ValueError("Scale out of bounds: a product of scale 2^{} at level {} exceeds the {}-bit modulus "
+                                 "left".format(scale_bits, level, modulus_bits))
+
+        return scale_bits
+
+    def _level(self, x):
+        return x.level
+
+    def _scale(self, x):
+        return x.scale_bits
+
+    def _size(self, x):
+        return x.size
+
+
+class CountingBackend(SimulatedBackend):
+    """Simulation backend following only the levels and sizes of the ciphertexts, not their slot values
+
+    Every operation takes constant time and decrypt() returns zeros, so a kernel call costs the Python overhead of its
+    operations only. Used with a profile and a memory tracker to count the operations and memory of kernel calls on
+    given shapes without computing them.
+
+    Parameters
+    ----------
+    params : dict, default: None
+        Keyword arguments of Pyfhel.contextGen the simulation follows. If None, DEFAULT_CKKS_PARAMS is used.
+    """
+
+    def _encrypt(self, values):
+        if np.size(values) > self.n_slots:
+            raise ValueError("Cannot encode {} values in {} slots".format(np.size(values), self.n_slots))
+
+        return SimulatedCiphertext(None, 0, self.scale_bits)
+
+    def _decrypt(self, x):
+        return np.zeros(self.n_slots, dtype=float if self.t is None else np.int64)
+
+    def _encode(self, values, level, scale):
+        return SimulatedPlaintext(None, level, self.scale_bits if scale is None else scale)
+
+    def _rotate(self, x, k):
+        return self._copy(x)
+
+    def _cumul_add(self, x):
+        return self._copy(x)
+
+    def _copy(self, x):
+        return SimulatedCiphertext(None, x.level, x.scale_bits, x.size)
+
+    def _neg(self, x):
+        return self._copy(x)
+
+    def _add(self, x, y):
+        return SimulatedCiphertext(None, *self._aligned(x, y))
+
+    def _sub(self, x, y):
+        return SimulatedCiphertext(None, *self._aligned(x, y))
+
+    def _rsub(self, x, y):
+        return self._copy(x)
+
+    def _mul(self, x, y):
+        if isinstance(y, SimulatedCiphertext):
+            level = max(x.level, y.level)
+            return SimulatedCiphertext(None, level, self._product_scale(level, x.scale_bits + y.scale_bits),
+                                       x.size + y.size - 1)
+
+        return SimulatedCiphertext(None, x.level, self._product_scale(x.level, x.scale_bits + self._plain_scale(y)),
+                                   x.size)
+
+    def _pow(self, x, exponent):
+        return SimulatedCiphertext(None, x.level, self._product_scale(x.level, x.scale_bits * exponent), 2)
+
+
+def batching_prime(bits, n):
+    """Largest prime of the given bit size congruent to 1 modulo 2n, as chosen for BFV batching by SEAL"""
+    candidate = ((2 ** bits - 1) // (2 * n)) * 2 * n + 1
+    while candidate.bit_length() == bits:
+        if _is_prime(candidate):
+            return candidate
+        candidate -= 2 * n
+
+    raise ValueError("No {}-bit prime supports batching with n={}".format(bits, n))
+
+
+def _is_prime(candidate):
+    """Deterministic Miller-Rabin test for integers below 2 ** 64"""
+    if candidate < 2:
+        return False
+    bases = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)
+    for p in bases:
+        if candidate % p == 0:
+            return candidate == p
+
+    d, r = candidate - 1, 0
+    while d % 2 == 0:
+        d, r = d // 2, r + 1
+
+    for a in bases:
+        x = pow(a, d, candidate)
+        if x in (1, candidate - 1):
+            continue
+        for _ in range(r - 1):
+            x = x * x % candidate
+            if x == candidate - 1:
+                break
+        else:
+            return False
+
+    return True
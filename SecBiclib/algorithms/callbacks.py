@@ -0,0 +1,117 @@
+"""
+    SecBic-CCA: A Python library of privacy-preserving biclustering algorithm (Cheng and Church) with Homomorphic Encryption
+
+    Copyright (C) 2023  Shokofeh VahidianSadegh
+
+    This file is part of SecBic-CCA.
+
+"""
+import time
+import numpy as np
+
+
+class IterationEvent:
+    """State of a run passed to the callbacks after each deletion or addition iteration and each bicluster found
+
+    Parameters
+    ----------
+    phase : str
+        'multiple_node_deletion', 'single_node_deletion' or 'node_addition' after an iteration of that step,
+        'bicluster' when a bicluster is completed.
+
+    bicluster : int
+        Index of the bicluster being computed.
+
+    iteration : int
+        Number of iterations of the phase so far for this bicluster (1 for the first one), or the number of biclusters
+        found so far for a 'bicluster' event.
+
+    n_rows : int
+        Number of rows of the current bicluster.
+
+    n_cols : int
+        Number of columns of the current bicluster.
+
+    msr : float
+        Last mean squared residue computed for the current bicluster, or None if none was computed yet.
+
+    elapsed : float
+        Seconds since the start of the run.
+
+    he_operations : int
+        HE operations run since the start of the run, or None for plaintext runs.
+    """
+
+    def __init__(self, phase, bicluster, iteration, n_rows, n_cols, msr, elapsed, he_operations):
+        self.phase = phase
+        self.bicluster = bicluster
+        self.iteration = iteration
+        self.n_rows = n_rows
+        self.n_cols = n_cols
+        self.msr = msr
+        self.elapsed = elapsed
+        self.he_operations = he_operations
+
+    def __repr__(self):
+        return '<IterationEvent {} bicluster={} iteration={} {}x{} msr={} elapsed={:.3f} s he_operations={}>'.format(
+            self.phase, self.bicluster, self.iteration, self.n_rows, self.n_cols, self.msr, self.elapsed,
+            self.he_operations)
+
+
+class StopRun(Exception):
+    """Raised by ProgressMonitor when a callback stops the run, and caught by the algorithm's run()."""
+
+
+class ProgressMonitor:
+    """Sends the progress of a run to its callbacks
+
+    Each callback is called with an IterationEvent. A callback returning True stops the run: StopRun is raised after
+    the current iteration and the run returns the biclusters completed before.
+
+    Parameters
+    ----------
+    callbacks : list
+        Callables taking an IterationEvent.
+
+    profile : SecBiclib.algorithms.profiling.HEProfile, default: None
+        Profile counting the HE operations of the run, if any.
+    """
+
+    def __init__(self, callbacks, profile=None):
+        self.callbacks = list(callbacks) if callbacks else []
+        self.profile = profile
+        self.start = time.perf_counter()
+        self.bicluster = 0
+        self.msr = None
+        self.iterations = {}
+
+    def new_bicluster(self, index):
+        self.bicluster = index
+        self.msr = None
+        self.iterations = {}
+
+    def iteration(self, phase, rows, cols, msr=None):
+        """Reports an iteration of the phase."""
+        if msr is not None:
+            self.msr = msr
+        if self.callbacks:
+            self.iterations[phase] = self.iterations.get(phase, 0) + 1
+            self._notify(phase, self.iterations[phase], rows, cols)
+
+    def completed(self, n_biclusters, rows, cols):
+        """Reports a completed bicluster."""
+        if self.callbacks:
+            self._notify('bicluster', n_biclusters, rows, cols)
+
+    def _notify(self, phase, iteration, rows, cols):
+        event = IterationEvent(phase, self.bicluster, iteration, int(np.count_nonzero(rows)),
+                               int(np.count_nonzero(cols)), None if self.msr is None else float(self.msr),
+                               time.perf_counter() - self.start,
+                               None if self.profile is None else self.profile.total_count)
+        stop = False
+        for callback in self.callbacks:
+            if callback(event):
+                stop = True
+
+        if stop:
+            raise StopRun(event)
@@ -8,8 +8,8 @@
 """
 
 from ._base import BaseBiclusteringAlgorithm
+from .callbacks import ProgressMonitor, StopRun
 from ..models import Bicluster, Biclustering
-from sklearn.utils.validation import check_array
 import numpy as np
 
 
@@ -37,13 +37,20 @@ class ChengChurchAlgorithm(BaseBiclusteringAlgorithm):
 
     data_min_cols : int, default: 100
         Minimum number of dataset columns required to perform multiple column deletion.
+
+    callbacks : list, default: None
+        Callables called with a callbacks.IterationEvent (phase, row and column counts, MSR, elapsed time) after every
+        deletion and addition iteration and every bicluster found. A callback returning True stops the run, which
+        returns the biclusters completed so far.
     """
 
-    def __init__(self, num_biclusters=5, msr_threshold='estimate', multiple_node_deletion_threshold=1.2, data_min_cols=100):
+    def __init__(self, num_biclusters=5, msr_threshold='estimate', multiple_node_deletion_threshold=1.2, data_min_cols=100,
+                 callbacks=None):
         self.num_biclusters = num_biclusters
         self.msr_threshold = msr_threshold
         self.multiple_node_deletion_threshold = multiple_node_deletion_threshold
         self.data_min_cols = data_min_cols
+        self.callbacks = callbacks
 
     def run(self, data):
         """Compute biclustering.
@@ -53,6 +60,7 @@ class ChengChurchAlgorithm(BaseBiclusteringAlgorithm):
         data : numpy.ndarray
         """
 
+        from sklearn.utils.validation import check_array
         data = check_array(data, dtype=np.double, copy=True)
         self._validate_parameters()
 
@@ -62,14 +70,19 @@ class ChengChurchAlgorithm(BaseBiclusteringAlgorithm):
 
         msr_thr = 300
         biclusters = []
+        self._progress = ProgressMonitor(self.callbacks)
 
         for i in range(self.num_biclusters):
             rows = np.ones(num_rows, dtype=bool)
             cols = np.ones(num_cols, dtype=bool)
+            self._progress.new_bicluster(i)
 
-            self._multiple_node_deletion(data, rows, cols, msr_thr)
-            self._single_node_deletion(data, rows, cols, msr_thr)
-            self._node_addition(data, rows, cols)
+            try:
+                self._multiple_node_deletion(data, rows, cols, msr_thr)
+                self._single_node_deletion(data, rows, cols, msr_thr)
+                self._node_addition(data, rows, cols)
+            except StopRun:
+                break
 
             row_indices = np.nonzero(rows)[0]
             col_indices = np.nonzero(cols)[0]
@@ -84,6 +97,11 @@ class ChengChurchAlgorithm(BaseBiclusteringAlgorithm):
 
             biclusters.append(Bicluster(row_indices, col_indices))
 
+            try:
+                self._progress.completed(len(biclusters), rows, cols)
+            except StopRun:
+                break
+
         return Biclustering(biclusters)
 
     def _single_node_deletion(self, data, rows, cols, msr_thr):
@@ -94,6 +112,7 @@ class ChengChurchAlgorithm(BaseBiclusteringAlgorithm):
         while msr > msr_thr:
             self._single_deletion(data, rows, cols, row_msr, col_msr)
             msr, row_msr, col_msr = self._calculate_msr(data, rows, cols)
+            self._progress.iteration('single_node_deletion', rows, cols, msr)
 
     def _single_deletion(self, data, rows, cols, row_msr, col_msr):
         """Deletes a row or column from the bicluster being computed."""
@@ -138,6 +157,7 @@ class ChengChurchAlgorithm(BaseBiclusteringAlgorithm):
             # If one of the conditions is true the loop must stop, otherwise it will become an infinite loop.
             if msr <= msr_thr or (np.all(rows == rows_old) and np.all(cols == cols_old)):
                 stop = True
+            self._progress.iteration('multiple_node_deletion', rows, cols, msr)
 
     def _node_addition(self, data, rows, cols):
         """Performs the row/column addition step (this is a direct implementation of the Algorithm 3 described in
@@ -160,6 +180,7 @@ class ChengChurchAlgorithm(BaseBiclusteringAlgorithm):
 
             if np.all(rows == rows_old) and np.all(cols == cols_old):
                 stop = True
+            self._progress.iteration('node_addition', rows, cols, msr)
 
     def _calculate_msr(self, data, rows, cols):
         """Calculate the mean squared residues of the rows, of the columns and of the full data matrix."""
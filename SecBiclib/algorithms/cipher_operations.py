@@ -1,11 +1,8 @@
-import Pyfhel
 import numpy as np
 from numpy import random as rd
 #from Pyfhel import Pyfhel
-from SecBiclib.algorithms import cca
-import inspect
-src = inspect.getsource(Pyfhel)
-print(src)
+from SecBiclib.algorithms.ciphervector import CipherVector
+from SecBiclib.algorithms.primitives import rotate_and_sum
 ############################################################################################
 # Array operations for testing and evaluation:
 
@@ -63,6 +60,8 @@ def _col_sum(HE,cipher_data, data_size):
     #length=data_size[1][0]*data_size[1][1]
     N_rows=data_size[0][0]
     real_N_cols=data_size[1][1]
+    if not isinstance(cipher_data,list):
+        return rotate_and_sum(HE,cipher_data,N_rows,real_N_cols)
     c_col_sum=cipher_data.copy()
     rescale=False
     for i in range(1,N_rows):
@@ -73,8 +72,7 @@ def _col_sum(HE,cipher_data, data_size):
             for k in range(len(cipher_data)):
                 c_col_sum[k]+=~shifted[k]
             rescale=True
-        else:
-            c_col_sum+=shift(HE,cipher_data,real_N_cols*i,data_size)
+
     if rescale:
         for i in range(len(cipher_data)):
             pass
@@ -84,32 +82,33 @@ def _col_sum(HE,cipher_data, data_size):
 def _row_sum(HE,cipher_data, data_size):
     #length=data_size[1][0]*data_size[1][1]
     N_cols=data_size[0][1]
+    if not isinstance(cipher_data,list):
+        return rotate_and_sum(HE,cipher_data,N_cols)
     c_row_sum=cipher_data.copy()
     for i in range(1,N_cols):
         if isinstance(cipher_data,list):
             shifted=shift(HE,cipher_data,i,data_size)
             for i in range(len(cipher_data)):
                 c_row_sum[i]+=~shifted[i]
-        else:
-            c_row_sum+=shift(HE,cipher_data,i,data_size)
+
     return c_row_sum
 
 def col_mean(HE,cipher_data, data_size):
     N_rows=data_size[0][0]
     if isinstance(cipher_data,list):
         c_col_sum=_col_sum(HE,cipher_data, data_size)
-        mean=[c_col_sum[j]/[N_rows for i in range(data_size[1][0]*data_size[1][0])] for j in range(len(cipher_data))]
+        mean=[c_col_sum[j]*np.full(data_size[1][0]*data_size[1][0],1/N_rows) for j in range(len(cipher_data))]
     else:
-        mean=_col_sum(HE,cipher_data, data_size)/[N_rows for i in range(data_size[1][0]*data_size[1][0])]
+        mean=_col_sum(HE,cipher_data, data_size)*np.full(data_size[1][0]*data_size[1][0],1/N_rows)
     return mean
 
 def row_mean(HE,cipher_data, data_size):
     N_cols=data_size[0][1]
     if isinstance(cipher_data,list):
         c_row_sum=_row_sum(HE,cipher_data, data_size)
-        mean=[c_row_sum[j]/[N_cols for i in range(data_size[1][0]*data_size[1][0])] for j in range(len(cipher_data))]
+        mean=[c_row_sum[j]*np.full(data_size[1][0]*data_size[1][0],1/N_cols) for j in range(len(cipher_data))]
     else:
-        mean=_row_sum(HE,cipher_data, data_size)/[N_cols for i in range(data_size[1][0]*data_size[1][0])]
+        mean=_row_sum(HE,cipher_data, data_size)*np.full(data_size[1][0]*data_size[1][0],1/N_cols)
     return mean
 
 def data_mean(HE,cipher_data, data_size):
@@ -179,32 +178,10 @@ def _cipher_ones(HE, start, end, length):
     return HE.encrypt(_ones(start,end,length))
 
 def _list_shift(HE,cipher_list, by, sub_len):
-    # Check if 'by' is realistic:
+    # The ciphertexts hold sub_len values each and are rotated as one vector, by any distance
     if by==0:
         return cipher_list
-    elif by > sub_len:
-        raise ValueError("Value of shift distance Argument 'by' cannot be larger than the size of sub-ciphertexts")
-
-    copy_first=cipher_list[0].copy()                # Make a copy of the first ciphertext
-
-    c_ones_array=_cipher_ones(HE,sub_len-by,None,sub_len)
-
-    for i in range(len(cipher_list)-1):             # For all ciphertexts in list except last one
-
-        cipher_list[i]=~cipher_list[i]<<by           # Do the shift of the single ciphertext
-
-        remaining=cipher_list[i]*_cipher_ones(HE,None,sub_len-by,sub_len)    # Force the shifted single ciphertext entries
-
-        from_outside=cipher_list[i+1].copy()                                # Make a copy of the next single ciphertext
-
-        from_outside=(~from_outside>>(sub_len-by))*c_ones_array # Shift this copy so that the
-                                                                                          # values which will appear in
-        cipher_list[i]=remaining+from_outside       # Add the values from next ciphertext
-                                                    # to the first
-    # Do the same as above manually for the last ciphertext in the list, with expansion values coming from the first ciphertext in the list:
-    cipher_list[len(cipher_list)-1]=~cipher_list[len(cipher_list)-1]<<by           # Do the shift of the single ciphertext
-    cipher_list[len(cipher_list)-1]=cipher_list[len(cipher_list)-1]*_cipher_ones(HE,None,sub_len-by,sub_len)+(~copy_first>>(sub_len-by))*_cipher_ones(HE,sub_len-by,None,sub_len)
-    return cipher_list  # DONE
+    return CipherVector(HE,cipher_list,sub_len*len(cipher_list),sub_len).rotate(by).ctxts
 
 def shift(HE,cipher_data,by,data_size):
 
@@ -230,6 +207,7 @@ def get_scale(cipher_data):
 # Testing:
 
 if __name__=="__main__":
+    import Pyfhel
 
     HE = Pyfhel.Pyfhel()
     HE2 =Pyfhel.Pyfhel()
@@ -0,0 +1,145 @@
+"""
+    SecBic-CCA: A Python library of privacy-preserving biclustering algorithm (Cheng and Church) with Homomorphic Encryption
+
+    Copyright (C) 2023  Shokofeh VahidianSadegh
+
+    This file is part of SecBic-CCA.
+
+"""
+from collections import OrderedDict
+import hashlib
+import numbers
+import numpy as np
+
+
+def fingerprint(values):
+    """Returns a short digest of the values of a column (and of their shape and type)."""
+    values = np.ascontiguousarray(values)
+    digest = hashlib.blake2b(values.tobytes(), digest_size=16)
+    digest.update(repr((values.shape, values.dtype.str)).encode())
+
+    return digest.hexdigest()
+
+
+class CiphertextCache:
+    """Least recently used cache of encrypted columns, shared by the column-per-ciphertext kernels and by the backends
+    of a run
+
+    A column is keyed by the backend encrypting it, the fingerprint of its values and its level. The values of a data
+    column restricted to the rows of a bicluster identify the column and the row selection together, and a column
+    whose values were masked after a bicluster gets a new key, so entries never go stale. A cached ciphertext keeps
+    its backend alive, so the backend's id is not reused while it is in the cache. When the cached ciphertexts of all
+    the backends exceed max_bytes, the least recently used ones are evicted. The kernels must not change the
+    ciphertexts they get in place.
+
+    Parameters
+    ----------
+    max_bytes : int
+        Largest memory of the cached ciphertexts.
+    """
+
+    name = 'Ciphertext cache'
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.n_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def encrypt(self, HE, values, level=0):
+        """Returns the ciphertext of the values, encrypting them on a miss."""
+        key = (id(HE), fingerprint(values), level)
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key][0]
+
+        self.misses += 1
+        ctxt = HE.encrypt(values)
+        self._put(key, ctxt, HE.ciphertext_bytes(ctxt))
+
+        return ctxt
+
+    def _put(self, key, ctxt, n_bytes):
+        if n_bytes > self.max_bytes:
+            return
+
+        self.entries[key] = (ctxt, n_bytes)
+        self.n_bytes += n_bytes
+        while self.n_bytes > self.max_bytes:
+            _, (_, evicted_bytes) = self.entries.popitem(last=False)
+            self.n_bytes -= evicted_bytes
+            self.evictions += 1
+
+    def clear(self):
+        """Drops the cached ciphertexts, keeping the statistics."""
+        self.entries.clear()
+        self.n_bytes = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def report(self):
+        """Human readable cache statistics."""
+        return '{}: {} hits, {} misses ({:.1%} hit rate), {} evictions, {} entries ({:.1f} of {:.1f} MB)'.format(
+            self.name, self.hits, self.misses, self.hit_rate, self.evictions, len(self), self.n_bytes / 2 ** 20,
+            self.max_bytes / 2 ** 20)
+
+    def __str__(self):
+        return self.report()
+
+
+class PlaintextCache(CiphertextCache):
+    """Least recently used cache of the encoded plaintexts of a backend: the constants and masks the kernels multiply
+    and add to ciphertexts
+
+    A plaintext is keyed by its value pattern (the number for a constant applied to every slot, the fingerprint of
+    the values otherwise), its length, and the level and scale it is encoded at, so that each constant or mask is
+    encoded once per level and scale. Masks are only ever encoded, never encrypted.
+
+    Parameters
+    ----------
+    max_bytes : int
+        Largest memory of the cached plaintexts.
+    """
+
+    name = 'Plaintext cache'
+
+    def encode(self, HE, values, level=0, scale=None):
+        """Returns the backend plaintext of the values (a number for every slot, or a sequence zero-padded to the slot
+        count) at the given level and scale (None for the default scale), encoding them on a miss."""
+        if isinstance(values, numbers.Number):
+            key = (('constant', values, type(values).__name__), HE.get_nSlots(), level, scale)
+        else:
+            values = np.asarray(values)
+            key = (fingerprint(values), len(values), level, scale)
+
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key][0]
+
+        self.misses += 1
+        if isinstance(values, numbers.Number):
+            values = np.full(HE.get_nSlots(), values)
+        ptxt = HE.encode(values, level, scale)
+        self._put(key, ptxt, HE.plaintext_bytes(level))
+
+        return ptxt
+
+
+def encrypt_columns(HE, data):
+    """Encrypts each column of data in its own ciphertext, through the backend's ciphertext cache if it has one, and
+    returns the list of ciphertexts."""
+    cache = getattr(HE, 'cache', None)
+    if cache is None:
+        return [HE.encrypt(data[:, i]) for i in range(data.shape[1])]
+
+    return [cache.encrypt(HE, data[:, i]) for i in range(data.shape[1])]
@@ -0,0 +1,500 @@
+"""
+    SecBic-CCA: A Python library of privacy-preserving biclustering algorithm (Cheng and Church) with Homomorphic Encryption
+
+    Copyright (C) 2023  Shokofeh VahidianSadegh
+
+    This file is part of SecBic-CCA.
+
+"""
+import math
+import numpy as np
+from SecBiclib.algorithms.ciphercache import encrypt_columns
+from SecBiclib.algorithms.primitives import across_segments_sums, replicate, rotate_and_sum, segment_sums
+
+ROW_MAJOR = 'row_major'
+COLUMNS = 'columns'
+PACKED = 'packed'
+LAYOUTS = (ROW_MAJOR, COLUMNS, PACKED)
+
+
+def packed_layout(n_rows, n_slots):
+    """Segment length (smallest power of two holding n_rows) and number of columns packed side by side in a
+    ciphertext of n_slots slots"""
+    segment = 1 << (n_rows - 1).bit_length()
+
+    return segment, n_slots // segment
+
+
+def pack(data, n_slots):
+    """Rows of the packed layout of data: as many full columns per row as fit in n_slots slots, each in a segment,
+    zero padded"""
+    n_rows, n_cols = data.shape
+    segment, n_segments = packed_layout(n_rows, n_slots)
+    n_ctxts = math.ceil(n_cols / n_segments)
+    packed = np.zeros((n_ctxts * n_segments, segment))
+    packed[:n_cols, :n_rows] = data.T
+
+    return packed.reshape(n_ctxts, n_segments * segment)
+
+
+def row_chunks(n_rows, n_slots, n_chunks=None):
+    """Row ranges (start, stop) of the chunks a column of n_rows rows is split into, one ciphertext of n_slots slots
+    each: as few chunks as fit the slots, at least n_chunks if given (at most one per row), of equal lengths but the
+    last one"""
+    n_chunks = min(max(math.ceil(n_rows / n_slots), n_chunks or 1), n_rows)
+    size = math.ceil(n_rows / n_chunks)
+
+    return [(start, min(start + size, n_rows)) for start in range(0, n_rows, size)]
+
+
+def release(HE, *values):
+    """Hands the ciphertexts among values (ciphertexts, or lists and tuples of them, such as the means of a matrix) to
+    the ciphertext pool of the backend."""
+    for value in values:
+        if isinstance(value, (list, tuple)):
+            release(HE, *value)
+        else:
+            HE.release(value)
+
+
+def total(ctxts, in_place=False):
+    """Sum of the ciphertexts, accumulated in place in a new ciphertext (the ciphertext itself if there is only one),
+    or in the first ciphertext if in_place"""
+    ctxts = iter(ctxts)
+    result = next(ctxts)
+    if not in_place:
+        second = next(ctxts, None)
+        if second is None:
+            return result
+        result = result + second
+    for c in ctxts:
+        result += c
+
+    return result
+
+
+def gather(HE, c_values, scales):
+    """Decrypts the values replicated in all the slots of the ciphertexts c_values, times scales, with one decryption
+    per n_slots ciphertexts: each ciphertext is masked in place to a slot of its own, folding in its scale, and the
+    masked ciphertexts are added up in the first one"""
+    n_slots = HE.get_nSlots()
+    values = []
+    for start in range(0, len(c_values), n_slots):
+        block = range(start, min(start + n_slots, len(c_values)))
+        for i in block:
+            c_values[i] *= np.eye(1, len(block), i - start)[0] * scales[i]
+        c_gathered = total((c_values[i] for i in block), in_place=True)
+        HE.rescale_to_next(c_gathered)
+        values.append(HE.decrypt(c_gathered)[:len(block)])
+
+    return np.concatenate(values)
+
+
+class CipherMatrix:
+    """Encrypted matrix: ciphertexts with the shape and slot layout of the data they hold, and the batched sums, means,
+    residues and reductions of the MSR kernels
+
+    The layout is one of
+    'row_major': the flattened matrix in a single ciphertext, row after row;
+    'columns': one column per ciphertext, in its first slots;
+    'packed': several columns per ciphertext side by side, each in a segment of a power of two slots (packed_layout).
+    With rows, a boolean mask over the slots of a 'columns' matrix, the matrix is the submatrix of the selected rows
+    (the masked kernels): the means are taken over the selected rows and replicated in every slot.
+
+    The means (row_means, col_means, total_mean) are single plaintext products of the sums folding the division and
+    mask, rescaled, and laid out like the matrix so that residues() is a few subtractions per ciphertext. The
+    reductions (decrypt_row_means, decrypt_col_means) decrypt as few ciphertexts as the layout allows and divide in
+    plaintext. Every operation runs one backend call per ciphertext over a plain list of ciphertexts, and the matrices
+    it returns share the layout.
+
+    Intermediate ciphertexts are evaluated in place wherever they are not needed afterwards, and a matrix that owns
+    its ciphertexts (a fresh encryption outside the ciphertext cache, or residues) is squared in place; the ciphertexts
+    of other matrices are never changed. release() hands the ciphertexts a kernel is done with to the backend's
+    ciphertext pool.
+
+    Parameters
+    ----------
+    HE : SecBiclib.algorithms.backends.HEBackend
+        Backend the ciphertexts belong to.
+
+    ctxts : list
+        Ciphertexts of the matrix, in the order of the layout.
+
+    shape : tuple
+        Number of rows and columns of the matrix (of the selected rows with rows).
+
+    layout : str
+        'row_major', 'columns' or 'packed'.
+
+    rows : numpy.ndarray, default: None
+        Boolean mask of the selected rows of a 'columns' matrix, or None if its rows fill the first slots.
+
+    owned : bool, default: False
+        Whether the ciphertexts are used by nothing else than the matrix, so that they may be changed in place.
+    """
+
+    def __init__(self, HE, ctxts, shape, layout, rows=None, owned=False):
+        if layout not in LAYOUTS:
+            raise ValueError("layout must be one of {}, got {}".format(LAYOUTS, layout))
+        if rows is not None and layout != COLUMNS:
+            raise ValueError("rows masks need the 'columns' layout, got {}".format(layout))
+
+        self.HE = HE
+        self.ctxts = list(ctxts)
+        self.shape = tuple(shape)
+        self.layout = layout
+        self.rows = None if rows is None else np.asarray(rows, dtype=bool)
+        self.owned = owned
+        self._sum = None
+        self._cleaned = None
+
+    @classmethod
+    def encrypt(cls, HE, data, layout=COLUMNS):
+        """Encrypts the data matrix in the given layout, the columns through the backend's ciphertext cache. With the
+        'columns' layout, columns taller than the slots (or split over at least HE.no_ciphertexts ciphertexts) are
+        split into row chunks and a ChunkedMatrix is returned."""
+        n_slots = HE.get_nSlots()
+        # Cached columns are shared with later calls
+        owned = layout == ROW_MAJOR or getattr(HE, 'cache', None) is None
+        if layout == COLUMNS:
+            chunks = row_chunks(data.shape[0], n_slots, getattr(HE, 'no_ciphertexts', None))
+            if len(chunks) > 1:
+                return ChunkedMatrix(HE, [cls(HE, encrypt_columns(HE, data[start:stop]), (stop - start, data.shape[1]),
+                                              COLUMNS, owned=owned) for start, stop in chunks])
+
+        if layout == ROW_MAJOR:
+            if data.size > n_slots:
+                raise ValueError("Cannot encrypt {} entries in a single ciphertext of {} slots".format(data.size,
+                                                                                                     n_slots))
+            ctxts = [HE.encrypt(data.flatten())]
+        elif layout == PACKED:
+            ctxts = encrypt_columns(HE, pack(data, n_slots).T)
+        else:
+            ctxts = encrypt_columns(HE, data)
+
+        return cls(HE, ctxts, data.shape, layout, owned=owned)
+
+    @classmethod
+    def masked(cls, HE, c_columns, rows):
+        """Submatrix of the rows selected by the boolean mask rows in the encrypted columns c_columns."""
+        return cls(HE, c_columns, (int(np.count_nonzero(rows)), len(c_columns)), COLUMNS, rows)
+
+    @property
+    def level(self):
+        """Number of rescales applied to the ciphertexts."""
+        return self.ctxts[0].level
+
+    @property
+    def segment(self):
+        """Segment length and number of segments per ciphertext of the 'packed' layout."""
+        return packed_layout(self.shape[0], self.HE.get_nSlots())
+
+    def _like(self, ctxts):
+        return CipherMatrix(self.HE, ctxts, self.shape, self.layout, self.rows, owned=True)
+
+    def _is_own(self, c):
+        return c is self._sum or any(c is x for x in self.ctxts)
+
+    def _scaled(self, c, plain):
+        """c times the plaintext, in place unless c is a ciphertext of the matrix or their sum"""
+        if self._is_own(c):
+            return c * plain
+
+        c *= plain
+        return c
+
+    def _rescaled(self, ctxts):
+        for c in ctxts:
+            self.HE.rescale_to_next(c)
+
+        return ctxts
+
+    def _valid(self):
+        """0/1 masks of the slots holding entries of the 'packed' layout"""
+        return pack(np.ones(self.shape), self.HE.get_nSlots())
+
+    def sum(self):
+        """Sum of the ciphertexts of the matrix (computed once)."""
+        if self._sum is None:
+            self._sum = total(self.ctxts)
+
+        return self._sum
+
+    def row_sums(self):
+        """Sums of the rows: in the first slot of each row ('row_major'), in the slot of each row ('columns') or at the
+        offset of each row in every segment ('packed')."""
+        if self.layout == ROW_MAJOR:
+            return rotate_and_sum(self.HE, self.sum(), self.shape[1])
+        if self.layout == PACKED:
+            return across_segments_sums(self.HE, self.sum(), self.segment[0])
+
+        return self.sum()
+
+    def col_sums(self):
+        """Sums of the columns, one ciphertext per ciphertext of the matrix: each column sum in the slot of its first
+        row ('row_major'), in every slot ('columns') or in the first slot of its segment ('packed')."""
+        HE = self.HE
+        if self.layout == ROW_MAJOR:
+            return [rotate_and_sum(HE, self.ctxts[0], self.shape[0], self.shape[1])]
+        if self.layout == PACKED:
+            return [segment_sums(HE, c, self.segment[0]) for c in self.ctxts]
+
+        return [HE.cumul_add(c, in_new_ctxt=True) for c in self.ctxts]
+
+    def total_sum(self):
+        """Sum of all the entries, in every slot."""
+        return self.HE.cumul_add(self.sum(), in_new_ctxt=True)
+
+    def row_means(self):
+        """Means of the rows, in the slots of each row."""
+        n_rows, n_cols = self.shape
+        if self.layout == ROW_MAJOR:
+            # The division is folded into the mask keeping the first slot of each row, which holds the row sum
+            mask = np.where(np.arange(n_rows * n_cols) % n_cols == 0, 1 / n_cols, 0)
+            c_mean, = self._rescaled([self._scaled(self.row_sums(), mask)])
+            return replicate(self.HE, c_mean, n_cols)
+
+        c_mean, = self._rescaled([self._scaled(self.row_sums(), 1 / n_cols)])
+        return c_mean
+
+    def col_means(self, length=None):
+        """Means of the columns, one ciphertext per ciphertext of the matrix, in the slots of each column; with the
+        'columns' layout in the first length slots (the rows of the matrix by default), in every slot with rows."""
+        HE = self.HE
+        n_rows, n_cols = self.shape
+        if self.rows is not None:
+            return self._rescaled([HE.cumul_add(c * (self.rows / n_rows), in_new_ctxt=False) for c in self.ctxts])
+
+        if self.layout == ROW_MAJOR:
+            c_mean, = self._rescaled([self._scaled(self.col_sums()[0], np.full(n_cols, 1 / n_rows))])
+            return [replicate(HE, c_mean, n_rows, n_cols)]
+
+        if self.layout == PACKED:
+            segment, n_segments = self.segment
+            starts = self._valid() * np.tile(np.arange(segment) == 0, n_segments)
+            c_means = self._rescaled([self._scaled(c, starts[i] / n_rows) for i, c in enumerate(self.col_sums())])
+            return [replicate(HE, c, segment) for c in c_means]
+
+        length = n_rows if length is None else length
+        return self._rescaled([self._scaled(c, np.full(length, 1 / n_rows)) for c in self.col_sums()])
+
+    def total_mean(self, length=None):
+        """Mean of all the entries, in the slots of the matrix (the first length slots with the 'columns' layout,
+        the rows of the matrix by default) or in every slot ('packed' layout, and with rows)."""
+        n_elements = self.shape[0] * self.shape[1]
+        if self.rows is not None:
+            c_mean = self.HE.cumul_add(self.sum() * (self.rows / n_elements), in_new_ctxt=False)
+        elif self.layout == PACKED:
+            c_mean = self._scaled(self.total_sum(), 1 / n_elements)
+        else:
+            length = (n_elements if self.layout == ROW_MAJOR else self.shape[0]) if length is None else length
+            c_mean = self._scaled(self.total_sum(), np.full(length, 1 / n_elements))
+
+        return self._rescaled([c_mean])[0]
+
+    def means(self):
+        """Row means, column means and mean of the matrix."""
+        return self.row_means(), self.col_means(), self.total_mean()
+
+    def residues(self, row_mean, col_means, all_mean, inverse=False):
+        """Residues x - row mean - column mean + mean of the entries x (-x if inverse, for the inverse rows of the node
+        addition), from means laid out like the matrix (of this matrix or of another one). The slots outside the
+        entries hold garbage with the 'packed' layout and outside the selected rows with rows."""
+        c_residues = []
+        if inverse:
+            c_shared = row_mean + all_mean
+            for i, c in enumerate(self.ctxts):
+                c_residue = c_shared - c
+                c_residue -= col_means[i]
+                c_residues.append(c_residue)
+        else:
+            c_shared = row_mean - all_mean
+            for i, c in enumerate(self.ctxts):
+                c_residue = c - col_means[i]
+                c_residue -= c_shared
+                c_residues.append(c_residue)
+        self.HE.release(c_shared)
+
+        return self._like(c_residues)
+
+    def squared(self):
+        """Squares of the entries, rescaled and relinearized; in place if the matrix owns its ciphertexts."""
+        if self.owned:
+            for c in self.ctxts:
+                c **= 2
+            c_squared = self._rescaled(self.ctxts)
+        else:
+            c_squared = self._rescaled([c ** 2 for c in self.ctxts])
+        for c in c_squared:
+            self.HE.relinearize(c)
+
+        return self._like(c_squared)
+
+    def _clean(self):
+        """Ciphertexts of the 'packed' layout with the slots outside the entries zeroed (computed once)"""
+        if self._cleaned is None:
+            valid = self._valid()
+            if self.owned:
+                for i, c in enumerate(self.ctxts):
+                    c *= valid[i]
+                self._cleaned = self._rescaled(self.ctxts)
+            else:
+                self._cleaned = self._rescaled([c * valid[i] for i, c in enumerate(self.ctxts)])
+
+        return self._cleaned
+
+    def decrypt_row_means(self, decimals=2):
+        """Decrypted means of the rows (the row MSRs of squared residues), rounded; with rows, of every row of the
+        mask."""
+        HE = self.HE
+        n_rows, n_cols = self.shape
+        if self.layout == ROW_MAJOR:
+            sums = HE.decrypt(self.row_sums())[:n_rows * n_cols:n_cols]
+        elif self.layout == PACKED:
+            sums = HE.decrypt(across_segments_sums(HE, total(self._clean()), self.segment[0]))[:n_rows]
+        else:
+            sums = HE.decrypt(self.sum())[:n_rows if self.rows is None else len(self.rows)]
+
+        return np.round(sums / n_cols, decimals)
+
+    def decrypt_col_means(self, decimals=2):
+        """Decrypted means of the columns (the column MSRs of squared residues), rounded."""
+        HE = self.HE
+        n_rows, n_cols = self.shape
+        if self.rows is not None:
+            # Sums over the selected rows, then gathered (and divided) like the sums of the other 'columns' matrices
+            c_sums = self._rescaled([HE.cumul_add(c * self.rows.astype(float), in_new_ctxt=False)
+                                     for c in self.ctxts])
+            means = gather(HE, c_sums, np.full(n_cols, 1 / n_rows))
+        elif self.layout == ROW_MAJOR:
+            means = HE.decrypt(self.col_sums()[0])[:n_cols] / n_rows
+        elif self.layout == PACKED:
+            segment = self.segment[0]
+            sums = [HE.decrypt(segment_sums(HE, c, segment))[::segment] for c in self._clean()]
+            means = np.concatenate(sums)[:n_cols] / n_rows
+        else:
+            # Gathered in the slots of as few ciphertexts as possible, decrypted once each
+            means = gather(HE, self.col_sums(), np.full(n_cols, 1 / n_rows))
+
+        return np.round(means, decimals)
+
+    def release(self):
+        """Hands the ciphertexts of the matrix, if it owns them, and its intermediate sums to the ciphertext pool of
+        the backend; the matrix cannot be used afterwards."""
+        temporaries = [c for c in [self._sum, *(self._cleaned or [])] if c is not None and
+                       not any(c is x for x in self.ctxts)]
+        self.HE.release(*temporaries, *(self.ctxts if self.owned else []))
+
+    def msr(self, decimals=2):
+        """Decrypted mean squared residue of the matrix, of its rows and of its columns."""
+        row_mean, col_means, all_mean = self.means()
+        c_squared = self.residues(row_mean, col_means, all_mean).squared()
+        release(self.HE, row_mean, col_means, all_mean)
+
+        col_msr = c_squared.decrypt_col_means(decimals)
+        row_msr = c_squared.decrypt_row_means(decimals)
+        c_squared.release()
+
+        # The MSR is the mean of the column MSRs
+        return np.mean(col_msr), row_msr, col_msr
+
+
+class ChunkedMatrix(CipherMatrix):
+    """Encrypted matrix in the 'columns' layout whose columns are split into row chunks (see row_chunks), each chunk a
+    CipherMatrix of its rows, for columns taller than the slots of a ciphertext
+
+    The chunks of a column are added up before any rotation, so that the column sums and the total sum take as many
+    rotations as on a single chunk, and the row sums and reductions run chunk by chunk. Values that differ between
+    chunks (the row means, and the column and total means laid out over the rows of each chunk) are tuples with one
+    entry per chunk, chunks of equal length sharing their means; residues() also takes means laid out over the first
+    slots of every chunk, such as those of a matrix with fewer rows.
+
+    Parameters
+    ----------
+    HE : SecBiclib.algorithms.backends.HEBackend
+        Backend the ciphertexts belong to.
+
+    chunks : list
+        CipherMatrix of the rows of each chunk, in the 'columns' layout, with the same columns.
+    """
+
+    def __init__(self, HE, chunks):
+        super().__init__(HE, [c for chunk in chunks for c in chunk.ctxts],
+                         (sum(chunk.shape[0] for chunk in chunks), chunks[0].shape[1]), COLUMNS)
+        self.chunks = list(chunks)
+
+    @property
+    def lengths(self):
+        """Number of rows of each chunk."""
+        return tuple(chunk.shape[0] for chunk in self.chunks)
+
+    def _spread(self, c_sums, scale, length=None):
+        """The sums times scale, rescaled, in the first length slots (a list), or in the rows of each chunk (a tuple of
+        lists, computed once per chunk length); the sums are changed in place"""
+        if length is not None:
+            return self._rescaled([self._scaled(c, np.full(length, scale)) for c in c_sums])
+
+        spread = {}
+        lengths = sorted(set(self.lengths))
+        for n_rows in lengths:
+            mask = np.full(n_rows, scale)
+            if n_rows == lengths[-1]:
+                spread[n_rows] = self._rescaled([self._scaled(c, mask) for c in c_sums])
+            else:
+                spread[n_rows] = self._rescaled([c * mask for c in c_sums])
+
+        return tuple(spread[n_rows] for n_rows in self.lengths)
+
+    def row_sums(self):
+        """Sums of the rows of each chunk, in the slot of each row."""
+        return tuple(chunk.row_sums() for chunk in self.chunks)
+
+    def col_sums(self):
+        """Sums of the columns, one ciphertext per column, in every slot."""
+        return [self.HE.cumul_add(total(column), in_new_ctxt=False)
+                for column in zip(*(chunk.ctxts for chunk in self.chunks))]
+
+    def total_sum(self):
+        """Sum of all the entries, in every slot."""
+        return self.HE.cumul_add(total(chunk.sum() for chunk in self.chunks), in_new_ctxt=False)
+
+    def row_means(self):
+        """Means of the rows of each chunk, in the slots of each row."""
+        return tuple(chunk.row_means() for chunk in self.chunks)
+
+    def col_means(self, length=None):
+        """Means of the columns, one ciphertext per column, in the rows of each chunk, or in the first length slots."""
+        return self._spread(self.col_sums(), 1 / self.shape[0], length)
+
+    def total_mean(self, length=None):
+        """Mean of all the entries, in the rows of each chunk, or in the first length slots."""
+        c_means = self._spread([self.total_sum()], 1 / (self.shape[0] * self.shape[1]), length)
+        if length is not None:
+            return c_means[0]
+
+        return tuple(c_mean for c_mean, in c_means)
+
+    def residues(self, row_mean, col_means, all_mean, inverse=False):
+        """Residues of each chunk; means given once (not as a tuple) are used for every chunk."""
+        means = [mean if isinstance(mean, tuple) else (mean,) * len(self.chunks)
+                 for mean in (row_mean, col_means, all_mean)]
+
+        return ChunkedMatrix(self.HE, [chunk.residues(*chunk_means, inverse=inverse)
+                                       for chunk, *chunk_means in zip(self.chunks, *means)])
+
+    def squared(self):
+        """Squares of the entries of each chunk."""
+        return ChunkedMatrix(self.HE, [chunk.squared() for chunk in self.chunks])
+
+    def decrypt_row_means(self, decimals=2):
+        """Decrypted means of the rows, rounded, with one decryption per chunk."""
+        return np.concatenate([chunk.decrypt_row_means(decimals) for chunk in self.chunks])
+
+    def decrypt_col_means(self, decimals=2):
+        """Decrypted means of the columns, rounded, the chunks of each column added up before they are gathered."""
+        return np.round(gather(self.HE, self.col_sums(), np.full(self.shape[1], 1 / self.shape[0])), decimals)
+
+    def release(self):
+        """Releases the chunks (see CipherMatrix.release)."""
+        for chunk in self.chunks:
+            chunk.release()
@@ -0,0 +1,180 @@
+"""
+    SecBic-CCA: A Python library of privacy-preserving biclustering algorithm (Cheng and Church) with Homomorphic Encryption
+
+    Copyright (C) 2023  Shokofeh VahidianSadegh
+
+    This file is part of SecBic-CCA.
+
+"""
+import math
+import operator
+import numpy as np
+from SecBiclib.algorithms.ciphermatrix import total
+
+
+class CipherVector:
+    """Encrypted vector longer than a ciphertext: its values in order, width values per ciphertext, the slots past the
+    end of the vector (and past width in each ciphertext) holding zeros
+
+    rotate() rotates the whole vector cyclically by any offset. Moving the values by k positions moves them by
+    k // width ciphertexts and k % width slots, so each ciphertext of the result is made of two pieces of consecutive
+    ciphertexts rotated by the same number of slots (two numbers if width is shorter than the slots), cut out by
+    plaintext masks; the values wrapping around the end of the vector are a second such move. Whatever the offset, a
+    rotation takes at most two rotations of each ciphertext (four if width is shorter than the slots) and four mask
+    products per ciphertext, added up and rescaled once.
+
+    The operators apply slot by slot to the ciphertexts of two vectors of the same layout, or of a vector and a
+    number, a sequence of plaintext values as long as the vector, or a ciphertext (added to, or multiplied with, every
+    ciphertext of the vector).
+
+    Parameters
+    ----------
+    HE : SecBiclib.algorithms.backends.HEBackend
+        Backend the ciphertexts belong to.
+
+    ctxts : list
+        Ciphertexts of the vector, the i-th one holding its values i * width to (i + 1) * width - 1.
+
+    length : int
+        Number of values of the vector.
+
+    width : int, default: None
+        Number of values per ciphertext, at most the number of slots. If None, all the slots.
+    """
+
+    def __init__(self, HE, ctxts, length, width=None):
+        n_slots = HE.get_nSlots()
+        width = n_slots if width is None else width
+        if not 0 < width <= n_slots:
+            raise ValueError("width must be > 0 and <= {}, got {}".format(n_slots, width))
+        if len(ctxts) != math.ceil(length / width):
+            raise ValueError("{} values of width {} need {} ciphertexts, got {}".format(
+                length, width, math.ceil(length / width), len(ctxts)))
+
+        self.HE = HE
+        self.ctxts = list(ctxts)
+        self.length = length
+        self.width = width
+
+    @classmethod
+    def encrypt(cls, HE, values, width=None):
+        """Encrypts the values, width per ciphertext (all the slots by default)."""
+        values = np.asarray(values)
+        width = HE.get_nSlots() if width is None else width
+
+        return cls(HE, [HE.encrypt(values[start:start + width]) for start in range(0, len(values), width)],
+                   len(values), width)
+
+    def decrypt(self):
+        """Decrypted values of the vector."""
+        return np.concatenate([self.HE.decrypt(c)[:self.width] for c in self.ctxts])[:self.length]
+
+    def _like(self, ctxts):
+        return CipherVector(self.HE, ctxts, self.length, self.width)
+
+    def _operands(self, other):
+        """The operand of each ciphertext: the ciphertexts of a vector, the blocks of a sequence of values, or the
+        number or ciphertext itself"""
+        if isinstance(other, CipherVector):
+            if (other.length, other.width) != (self.length, self.width):
+                raise ValueError("Cannot combine vectors of {} and {} values, {} and {} per ciphertext".format(
+                    self.length, other.length, self.width, other.width))
+            return other.ctxts
+        if isinstance(other, (list, tuple, np.ndarray)):
+            values = np.asarray(other)
+            return [values[start:start + self.width] for start in range(0, self.length, self.width)]
+
+        return [other] * len(self.ctxts)
+
+    def _apply(self, op, other):
+        return self._like([op(c, x) for c, x in zip(self.ctxts, self._operands(other))])
+
+    def __add__(self, other):
+        return self._apply(operator.add, other)
+
+    def __radd__(self, other):
+        return self._apply(operator.add, other)
+
+    def __sub__(self, other):
+        return self._apply(operator.sub, other)
+
+    def __rsub__(self, other):
+        return self._like([x - c for c, x in zip(self.ctxts, self._operands(other))])
+
+    def __mul__(self, other):
+        return self._apply(operator.mul, other)
+
+    def __rmul__(self, other):
+        return self._apply(operator.mul, other)
+
+    def __pow__(self, exponent):
+        return self._like([c ** exponent for c in self.ctxts])
+
+    def __neg__(self):
+        return self._like([-c for c in self.ctxts])
+
+    def map(self, f):
+        """Vector of f applied to each ciphertext, for computations that stay within the width of a ciphertext."""
+        return self._like([f(c) for c in self.ctxts])
+
+    def total(self):
+        """Sum of the ciphertexts of the vector (the ciphertext itself if there is only one): slot s holds the values
+        of slot s of every ciphertext added up."""
+        return total(self.ctxts)
+
+    def rescale(self):
+        """Rescales the ciphertexts in place."""
+        for c in self.ctxts:
+            self.HE.rescale_to_next(c)
+
+        return self
+
+    def relinearize(self):
+        """Relinearizes the ciphertexts in place."""
+        for c in self.ctxts:
+            self.HE.relinearize(c)
+
+        return self
+
+    def rotate(self, k):
+        """The vector rotated cyclically k positions to the left (to the right if k is negative), one level below."""
+        k %= self.length
+        rotated = {}
+        pieces = [[] for _ in self.ctxts]
+        for offset in (k, k - self.length):
+            self._move(offset, rotated, pieces)
+
+        c_rotated = [total(products, in_place=True) for products in pieces]
+        for c in c_rotated:
+            self.HE.rescale_to_next(c)
+
+        return self._like(c_rotated)
+
+    def _move(self, offset, rotated, pieces):
+        """Adds to the pieces of each ciphertext the masked products moving value i + offset to position i, for the
+        positions and values inside the vector; rotated keeps the rotated ciphertexts by (index, slots)"""
+        HE, width = self.HE, self.width
+        n_slots = HE.get_nSlots()
+        n_ctxts, slots = divmod(offset, width)
+        positions = np.arange(width)
+        for i in range(len(self.ctxts)):
+            end = min(width, self.length - i * width)
+            # Slots [0, width - slots) come from ciphertext i + n_ctxts, the others from the next one
+            for j, step, start, stop in ((i + n_ctxts, slots, 0, width - slots),
+                                         (i + n_ctxts + 1, slots - width, width - slots, end)):
+                stop = min(stop, end)
+                if not 0 <= j < len(self.ctxts) or start >= stop:
+                    continue
+                step %= n_slots
+                if step == 0:
+                    c = self.ctxts[j]
+                else:
+                    if (j, step) not in rotated:
+                        rotated[(j, step)] = HE.rotate(self.ctxts[j], step, True)
+                    c = rotated[(j, step)]
+                pieces[i].append(c * ((positions >= start) & (positions < stop)).astype(float))
+
+    def release(self):
+        """Hands the ciphertexts of the vector to the ciphertext pool of the backend; the vector cannot be used
+        afterwards."""
+        self.HE.release(*self.ctxts)
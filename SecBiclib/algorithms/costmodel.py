@@ -0,0 +1,113 @@
+"""
+    SecBic-CCA: A Python library of privacy-preserving biclustering algorithm (Cheng and Church) with Homomorphic Encryption
+
+    Copyright (C) 2023  Shokofeh VahidianSadegh
+
+    This file is part of SecBic-CCA.
+
+"""
+import json
+import time
+import numpy as np
+from SecBiclib.algorithms.profiling import HEProfile
+
+
+class CostModel:
+    """Seconds taken by each HE operation on the local machine, to turn operation counts into time
+
+    Operation names are those of profiling.HEProfile. An operation that was not calibrated costs as much as its
+    ciphertext-ciphertext counterpart ('add' for 'add_plain'), or nothing if that is missing too.
+
+    Parameters
+    ----------
+    op_seconds : dict
+        Seconds per operation, by operation name.
+
+    params : dict, default: None
+        contextGen parameters the model was calibrated with.
+
+    setup_seconds : float, default: 0.0
+        Seconds taken by the context and key setup.
+    """
+
+    def __init__(self, op_seconds, params=None, setup_seconds=0.0):
+        self.op_seconds = dict(op_seconds)
+        self.params = params
+        self.setup_seconds = setup_seconds
+
+    @classmethod
+    def calibrate(cls, backend, repeats=10):
+        """Measures the seconds per operation of the backend (the first backend of a session group), timing every
+        primitive repeats times on ciphertexts of random values."""
+        if hasattr(backend, 'sessions'):
+            backend = backend.sessions[0]
+
+        t0 = time.perf_counter()
+        backend.start().wait()
+        setup_seconds = time.perf_counter() - t0
+
+        # Values of a generator of its own, so that calibrating during a run leaves the global random state unchanged
+        n_slots = backend.get_nSlots()
+        random_state = np.random.RandomState(0)
+        if backend.scheme == 'BFV':
+            values = random_state.randint(0, 1000, size=n_slots)
+        else:
+            values = random_state.uniform(0, 1000, size=n_slots)
+
+        profile = HEProfile()
+        previous = backend.profile, backend.memory, backend.tracer
+        backend.profile, backend.memory, backend.tracer = profile, None, None
+        try:
+            x = backend.encrypt(values)
+            y = backend.encrypt(values)
+            for _ in range(repeats):
+                backend.encrypt(values)
+                backend.decrypt(x)
+                backend.rotate(x, 1, True)
+                backend.cumul_add(x, True)
+                x + y, x - y, x * y, x ** 2, -x, x.copy()
+                x + 1, x - 1, x * 2, 1 - x
+                backend.relinearize(x * y)
+                if backend.scheme != 'BFV':
+                    backend.rescale_to_next(x * 2)
+        finally:
+            backend.profile, backend.memory, backend.tracer = previous
+
+        totals = profile.totals('op')
+        op_seconds = {op: seconds / count for op, (count, seconds) in totals.items()}
+
+        return cls(op_seconds, backend.params, setup_seconds)
+
+    def seconds(self, op, count=1):
+        """Predicted seconds of count operations."""
+        if op in self.op_seconds:
+            return count * self.op_seconds[op]
+
+        return count * self.op_seconds.get(op.replace('_plain', ''), 0.0)
+
+    def predict(self, counts):
+        """Predicted seconds of the operations counted in {op: count}."""
+        return sum(self.seconds(op, count) for op, count in counts.items())
+
+    def to_dict(self):
+        return {'op_seconds': self.op_seconds, 'params': self.params, 'setup_seconds': self.setup_seconds}
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls(**json.load(f))
+
+    def report(self):
+        """Human readable table of the calibrated operation costs."""
+        lines = ['HE cost model (setup {:.3f} s)'.format(self.setup_seconds)]
+        for op in sorted(self.op_seconds, key=lambda op: -self.op_seconds[op]):
+            lines.append('  {:<16} {:>12.6f} s'.format(op, self.op_seconds[op]))
+
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return self.report()
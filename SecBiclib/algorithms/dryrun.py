@@ -0,0 +1,205 @@
+"""
+    SecBic-CCA: A Python library of privacy-preserving biclustering algorithm (Cheng and Church) with Homomorphic Encryption
+
+    Copyright (C) 2023  Shokofeh VahidianSadegh
+
+    This file is part of SecBic-CCA.
+
+"""
+from functools import partial
+import numpy as np
+from SecBiclib.algorithms.memory import MemoryTracker
+from SecBiclib.algorithms.profiling import HEProfile, ScopedRecorder
+
+# Decimals the CKKS kernels round the decrypted MSRs to (see ciphermatrix.CipherMatrix.decrypt_row_means)
+MSR_DECIMALS = 2
+
+
+def _rounded(msr, decimals):
+    return msr if decimals is None else np.round(msr, decimals)
+
+
+def plain_msr(data, decimals=MSR_DECIMALS):
+    """Plaintext counterpart of the MSR kernels: MSR, row MSRs and column MSRs of the bicluster data, the row and
+    column MSRs rounded to decimals like the decrypted ones (not rounded if None), the MSR being their mean"""
+    residues = data - data.mean(axis=1)[:, np.newaxis] - data.mean(axis=0) + data.mean()
+    squared_residues = residues * residues
+    col_msr = _rounded(np.mean(squared_residues, axis=0), decimals)
+
+    return np.mean(col_msr), _rounded(np.mean(squared_residues, axis=1), decimals), col_msr
+
+
+def plain_msr_col_addition(data, data_rows, decimals=MSR_DECIMALS):
+    """Plaintext counterpart of the column addition kernels: column MSRs of every column of data_rows, rounded"""
+    residues = data_rows - data.mean(axis=1)[:, np.newaxis] - data_rows.mean(axis=0) + data.mean()
+
+    return _rounded(np.mean(residues * residues, axis=0), decimals)
+
+
+def plain_msr_row_addition(data, data_cols, decimals=MSR_DECIMALS):
+    """Plaintext counterpart of the row addition kernels: row MSRs and inverted row MSRs of every row of data_cols,
+    rounded"""
+    row_means = data_cols.mean(axis=1)[:, np.newaxis]
+    col_means = data.mean(axis=0)
+    residues = data_cols - row_means - col_means + data.mean()
+    inverse_residues = -data_cols + row_means - col_means + data.mean()
+
+    return (_rounded(np.mean(residues * residues, axis=1), decimals),
+            _rounded(np.mean(inverse_residues * inverse_residues, axis=1), decimals))
+
+
+def plain_masked_msr(matrix, rows, cols):
+    return plain_msr(matrix.data[rows][:, cols])
+
+
+def plain_masked_msr_col_addition(matrix, rows, cols):
+    return plain_msr_col_addition(matrix.data[rows][:, cols], matrix.data[rows])
+
+
+def plain_masked_msr_row_addition(matrix, rows, cols):
+    return plain_msr_row_addition(matrix.data[rows][:, cols], matrix.data[:, cols])
+
+
+# Plaintext counterparts of the MSR, column addition and row addition kernels, on submatrices (rounded like the CKKS
+# kernels, or exact like the BFV ones) and on an encrypted matrix with masks (maskedmsr)
+PLAIN_KERNELS = (plain_msr, plain_msr_col_addition, plain_msr_row_addition)
+EXACT_PLAIN_KERNELS = tuple(partial(kernel, decimals=None) for kernel in PLAIN_KERNELS)
+MASKED_PLAIN_KERNELS = (plain_masked_msr, plain_masked_msr_col_addition, plain_masked_msr_row_addition)
+
+
+class KernelCall:
+    """Kernel call recorded by a dry run, with its predicted cost
+
+    Parameters
+    ----------
+    phase : str
+        Algorithm phase of the call.
+
+    purpose : str
+        Purpose of the call ('ranking' or 'threshold', see hesession.SessionRouter).
+
+    kernel : str
+        Name of the kernel function.
+
+    shapes : list
+        Shapes of the submatrices passed to the kernel.
+
+    counts : dict
+        Number of HE operations of the call, by operation name.
+
+    peak_bytes : int
+        Peak memory of the live ciphertexts of the call.
+
+    seconds : float
+        Predicted seconds of the call.
+    """
+
+    def __init__(self, phase, purpose, kernel, shapes, counts, peak_bytes, seconds):
+        self.phase = phase
+        self.purpose = purpose
+        self.kernel = kernel
+        self.shapes = shapes
+        self.counts = counts
+        self.peak_bytes = peak_bytes
+        self.seconds = seconds
+
+
+class ExplainPlan(ScopedRecorder):
+    """Dry run of a secured biclustering: the plan of its kernel calls and their predicted cost
+
+    The algorithm runs its deletion and addition loops as usual, but this object stands in for the session router:
+    each kernel call is recorded with the shapes of its submatrices, run on counting backends (backends.CountingBackend,
+    which follow levels and sizes only) to count its HE operations and peak ciphertext memory, and answered with the
+    plaintext MSRs, so that the control flow is the one of the secured run. The cost model turns the counts into time.
+
+    Parameters
+    ----------
+    sessions : SecBiclib.algorithms.hesession.SessionRouter
+        Router over counting backends with the parameters of the secured run.
+
+    kernels : tuple
+        MSR, column addition and row addition kernels of the secured run.
+
+    cost_model : SecBiclib.algorithms.costmodel.CostModel
+        Seconds per HE operation on the local machine.
+
+    plain_kernels : tuple, default: PLAIN_KERNELS
+        Plaintext counterparts of the kernels.
+    """
+
+    def __init__(self, sessions, kernels, cost_model, plain_kernels=PLAIN_KERNELS):
+        super().__init__()
+        self.sessions = sessions
+        self.plain_kernels = dict(zip(kernels, plain_kernels))
+        self.cost_model = cost_model
+        self.calls = []
+        self.biclustering = None
+
+    @property
+    def two_tier(self):
+        return self.sessions.two_tier
+
+    def run(self, purpose, kernel, *args):
+        """Records the kernel call, predicts its cost and returns its plaintext results."""
+        session = self.sessions.session(purpose)
+        session.cost_model = self.cost_model
+        session.profile = HEProfile()
+        session.memory = MemoryTracker()
+        kernel(session, *args)
+
+        counts = {op: count for op, (count, _) in session.profile.totals('op').items()}
+        self.calls.append(KernelCall(self.current_phase, purpose, kernel.__name__, [np.shape(a) for a in args], counts,
+                                     session.memory.peak_bytes, self.cost_model.predict(counts)))
+
+        return self.plain_kernels[kernel](*args)
+
+    @property
+    def predicted_seconds(self):
+        """Predicted seconds of the whole run, key setup included."""
+        return self.cost_model.setup_seconds + sum(call.seconds for call in self.calls)
+
+    @property
+    def peak_bytes(self):
+        return max([call.peak_bytes for call in self.calls], default=0)
+
+    def totals(self, by='phase'):
+        """Returns {name: (calls, HE operations, predicted seconds, peak bytes)} by 'phase' or 'kernel'."""
+        totals = {}
+        for call in self.calls:
+            name = getattr(call, by)
+            calls, ops, seconds, peak = totals.get(name, (0, 0, 0.0, 0))
+            totals[name] = (calls + 1, ops + sum(call.counts.values()), seconds + call.seconds,
+                            max(peak, call.peak_bytes))
+
+        return totals
+
+    def op_counts(self):
+        counts = {}
+        for call in self.calls:
+            for op, count in call.counts.items():
+                counts[op] = counts.get(op, 0) + count
+
+        return counts
+
+    def report(self):
+        """Per-phase report of the predicted cost."""
+        lines = ['Explain plan: {} kernel calls, predicted {:.1f} s (key setup {:.1f} s), peak {:.1f} MB'.format(
+            len(self.calls), self.predicted_seconds, self.cost_model.setup_seconds, self.peak_bytes / 2 ** 20)]
+        for by in ('phase', 'kernel'):
+            lines.append('  {:<32} {:>7} {:>10} {:>12} {:>10}'.format('by ' + by, 'calls', 'HE ops', 'predicted s',
+                                                                      'peak MB'))
+            totals = self.totals(by)
+            for name in sorted(totals, key=lambda name: -totals[name][2]):
+                calls, ops, seconds, peak = totals[name]
+                lines.append('    {:<30} {:>7} {:>10} {:>12.1f} {:>10.1f}'.format(str(name), calls, ops, seconds,
+                                                                                peak / 2 ** 20))
+
+        lines.append('  by op:')
+        counts = self.op_counts()
+        for op in sorted(counts, key=lambda op: -self.cost_model.seconds(op, counts[op])):
+            lines.append('    {:<30} {:>10} {:>12.1f} s'.format(op, counts[op], self.cost_model.seconds(op, counts[op])))
+
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return self.report()
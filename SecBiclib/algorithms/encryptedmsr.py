@@ -1,10 +1,37 @@
 import itertools
 import math
-import Pyfhel
 import numpy as np
-from SecBiclib.algorithms import optencryptedmsr
-import inspect
-src = inspect.getsource(Pyfhel)
+from SecBiclib.algorithms import optencryptedmsr, packedmsr
+from SecBiclib.algorithms.ciphermatrix import ROW_MAJOR, CipherMatrix
+from SecBiclib.algorithms.ciphervector import CipherVector
+from SecBiclib.algorithms.primitives import rotate_and_sum_count, rotate_and_sum_steps
+from SecBiclib.algorithms.rotations import cumul_add_steps, merge_steps
+from SecBiclib.algorithms.tracing import annotate
+
+# Rescales on the longest multiplicative path of the single ciphertext path (means, each a single plaintext product
+# folding its division and mask, and squared residues, the MSRs being divided after decryption); calculate_msr runs
+# optencryptedmsr or packedmsr instead for larger data or when they are predicted to be faster
+MULT_DEPTH = max(2, optencryptedmsr.MULT_DEPTH, packedmsr.MULT_DEPTH)
+
+
+def min_slots(data_shape):
+    """Smallest number of slots needed for data of the given shape"""
+    return optencryptedmsr.min_slots(data_shape)
+
+
+def rotation_steps(data_shape, n_slots):
+    """Rotation steps used on data of the given shape and on its submatrices small enough for a single ciphertext
+    (rotate-and-sum over the slots of a row and over the rows of a column, and their replication), with their number
+    of uses per call"""
+    n_rows, n_cols = data_shape
+    fitting_rows = min(n_rows, n_slots // n_cols)
+    single = merge_steps({step: 1 for step in cumul_add_steps(n_slots)}, rotate_and_sum_steps(n_cols),
+                         rotate_and_sum_steps(n_cols), rotate_and_sum_steps(n_cols, -1),
+                         rotate_and_sum_steps(fitting_rows, n_cols), rotate_and_sum_steps(fitting_rows, n_cols),
+                         rotate_and_sum_steps(fitting_rows, -n_cols))
+
+    return merge_steps(optencryptedmsr.rotation_steps(data_shape, n_slots),
+                       packedmsr.rotation_steps(data_shape, n_slots), single)
 
 
 def enlarge(array):
@@ -46,24 +73,17 @@ def array_shift(array, by):
 
 def shift(HE, cipher_data, by, data_size):
     """Shift the ciphertexts based on by measure"""
-    shifted_cipher = cipher_data.copy()
-    shifted_data = cipher_data << by
+    shifted_data = HE.rotate(cipher_data, by, True)
 
     return shifted_data
 
 
 def _list_shift(HE, cipher_list, by, sub_len):
-    """Shift the list of ciphertexts based on by measure"""
+    """Shift the list of ciphertexts, sub_len values each, by by measure as one vector"""
     if by == 0:
         return cipher_list
-    elif by > sub_len:
-        raise ValueError("Value of shift distance Argument 'by' cannot be larger than the size of sub-ciphertexts")
 
-    for i in range(len(cipher_list)):
-        # Shift of the single ciphertext
-        cipher_list[i] = cipher_list[i] << 1
-
-    return cipher_list
+    return CipherVector(HE, cipher_list, sub_len * len(cipher_list), sub_len).rotate(by).ctxts
 
 
 def _cipher_ones(HE, start, end, length):
@@ -95,111 +115,57 @@ def get_scale(cipher_data):
     return scales
 
 
-def _col_sum(HE, cipher_data, data_size):
-    """Sum of columns in the ciphertext"""
-    n_rows = data_size[0]
-    n_cols = data_size[1]
-    c_col_sum = cipher_data.copy()
-
-    for i in range(1, n_rows):
-        c_col_sum += shift(HE, cipher_data, n_cols * i, data_size)
-
-    return c_col_sum
-
-
-def _row_sum(HE, cipher_data, data_size):
-    """Sum of rows in the ciphertext"""
-    n_cols = data_size[1]
-    c_row_sum = cipher_data.copy()
+def single_op_counts(data_shape):
+    """Number of HE operations of a call of the single ciphertext path on data of the given shape, by
+    profiling.HEProfile operation name"""
+    n_rows, n_cols = data_shape
+    n_rotations = 3 * (rotate_and_sum_count(n_rows) + rotate_and_sum_count(n_cols))
 
-    for i in range(1, n_cols):
-        c_row_sum += cipher_data << i
+    return {'encrypt': 1, 'decrypt': 2, 'rotate': n_rotations, 'cumul_add': 1, 'add': n_rotations, 'sub': 3,
+            'mul_plain': 3, 'pow': 1, 'relinearize': 1, 'rescale': 4}
 
-    return c_row_sum
 
+def choose_kernel(HE, data_shape):
+    """Returns the name, function and predicted seconds of the cheapest implementation for data of the given shape,
+    according to the cost model of the backend; the single ciphertext path is a candidate only if the data fits, and
+    the packed path only if at least two columns fit in a ciphertext (encodings are left out of the counts: the
+    constants and masks come from the backend's plaintext cache after the first call)"""
+    n_slots = HE.get_nSlots()
+    candidates = {'calculate_opt_msr': (optencryptedmsr.calculate_opt_msr,
+                                        optencryptedmsr.op_counts(data_shape, n_slots, HE.no_ciphertexts))}
+    if packedmsr.layout(data_shape[0], n_slots)[1] >= 2:
+        candidates['calculate_packed_msr'] = (packedmsr.calculate_packed_msr,
+                                              packedmsr.op_counts(data_shape, n_slots))
+    if data_shape[0] * data_shape[1] <= n_slots:
+        candidates['calculate_single_msr'] = (calculate_single_msr, single_op_counts(data_shape))
 
-def col_mean(HE, cipher_data, data_size):
-    """Mean of cols in the ciphertext"""
-    N_rows = data_size[0]
+    # Rotations by steps without a key of their own cost several key switches
+    if HE.rotation_plan is not None:
+        for _, counts in candidates.values():
+            counts['rotate'] = counts.get('rotate', 0) * HE.rotation_plan.mean_key_switches
 
-    mean = _col_sum(HE, cipher_data, data_size) / [N_rows for i in range(data_size[1])]
+    cost_model = HE.get_cost_model()
+    predicted = {name: cost_model.predict(counts) for name, (_, counts) in candidates.items()}
+    name = min(predicted, key=predicted.get)
 
-    # For finding residues, repeated values are added
-    rotated_mean = mean.copy()
-    for j in range(N_rows - 1):
-        rotated_mean = mean + HE.rotate(rotated_mean, -data_size[1], True)
-
-    return rotated_mean
-
-def row_mean(HE, cipher_data, data_size):
-    """Mean of rows in the ciphertext"""
-    N_cols = data_size[1]
-
-    mean = _row_sum(HE, cipher_data, data_size) / [N_cols for i in range(data_size[0] * data_size[1])]
-
-    # For finding residues, repeated values are added
-    plain = [1 if i%N_cols == 0 else 0 for i in range(data_size[0] * data_size[1])]
-    mean = mean * plain
-    rotated_mean = mean.copy()
-    for j in range(N_cols - 1):
-        rotated_mean = mean + HE.rotate(rotated_mean, -1, True)
-
-    return rotated_mean
-
-
-def data_mean(HE, cipher_data, data_size):
-    """Mean of data in the ciphertext"""
-    n_elements = data_size[0] * data_size[1]
-
-    sum_data = HE.cumul_add(cipher_data, True)
-    mean = sum_data / [n_elements for i in range(data_size[0] * data_size[1])]
-
-    return mean
+    return name, candidates[name][0], predicted[name]
 
 
 def calculate_msr(HE, cipher_data):
     """Calculate the mean squared residues of the rows, of the columns and of the full data matrix
-    by homomorphic encryption"""
-    tol = 1e-2
+    by homomorphic encryption, with the implementation predicted to be the fastest"""
+    name, kernel, predicted_seconds = choose_kernel(HE, cipher_data.shape)
+    if HE.profile is not None:
+        HE.profile.record_choice('calculate_msr', name, predicted_seconds)
+    annotate(HE, implementation=name, predicted_seconds=predicted_seconds)
 
-    # Get the size of data, and data_cols
-    data_size = cipher_data.shape
-    n_elements = data_size[0] * data_size[1]
-    no_ciphertexts = math.ceil(len(cipher_data.flatten()) / HE.get_nSlots())
+    return kernel(HE, cipher_data)
 
-    if len(cipher_data.flatten()) > (HE.get_nSlots()):
-        dec_msr, dec_row_msr, dec_col_msr = optencryptedmsr.calculate_opt_msr(HE, cipher_data)
 
-        return dec_msr, dec_row_msr, dec_col_msr
+def calculate_single_msr(HE, cipher_data):
+    """Calculate the mean squared residues with all the data in a single ciphertext"""
+    c_data = CipherMatrix.encrypt(HE, cipher_data, ROW_MAJOR)
+    msr = c_data.msr()
+    c_data.release()
 
-    else:
-        data_size_actual = data_size
-        ciphertext = HE.encrypt(cipher_data.flatten())
-
-        # Mean value calculation
-        cipher_row_mean = row_mean(HE, ciphertext, data_size_actual)
-        cipher_col_mean = col_mean(HE, ciphertext, data_size_actual)
-        cipher_data_mean = data_mean(HE, ciphertext, data_size_actual)
-
-        HE.rescale_to_next(cipher_row_mean)
-        HE.rescale_to_next(cipher_col_mean)
-        HE.rescale_to_next(cipher_data_mean)
-
-        # Residue and Squared Residue calculation
-        cipher_residue = ciphertext - cipher_row_mean - cipher_col_mean + cipher_data_mean
-        cipher_square_residue = cipher_residue ** 2
-        HE.rescale_to_next(cipher_square_residue)
-        cipher_row_msr = row_mean(HE, ~cipher_square_residue, data_size_actual)
-        cipher_col_msr = col_mean(HE, ~cipher_square_residue, data_size_actual)
-        cipher_msr = data_mean(HE, ~cipher_square_residue, data_size_actual)
-
-        HE.rescale_to_next(cipher_msr)
-        HE.rescale_to_next(cipher_row_msr)
-        HE.rescale_to_next(cipher_col_msr)
-
-        # Decrypt all the results
-        decrypted_msr = HE.decrypt(cipher_msr)[0]
-        decrypted_msr_row = HE.decrypt(cipher_row_msr)[:n_elements:data_size[1]]
-        decrypted_msr_col = HE.decrypt(cipher_col_msr)[:data_size[1]]
-
-        return decrypted_msr, decrypted_msr_row, decrypted_msr_col
\ No newline at end of file
+    return msr
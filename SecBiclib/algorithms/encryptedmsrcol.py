@@ -1,10 +1,32 @@
-import math
-
-import Pyfhel
 import numpy as np
-import inspect
 from SecBiclib.algorithms import optencryptedmsrcol
-src = inspect.getsource(Pyfhel)
+from SecBiclib.algorithms.ciphermatrix import ROW_MAJOR, CipherMatrix, release
+from SecBiclib.algorithms.ciphervector import CipherVector
+from SecBiclib.algorithms.primitives import rotate_and_sum_steps
+from SecBiclib.algorithms.rotations import cumul_add_steps, merge_steps
+
+# Rescales on the longest multiplicative path of the single ciphertext path (means, each a single plaintext product
+# folding its division and mask, and squared residues, the column MSRs being divided after decryption); larger data
+# falls back to optencryptedmsrcol
+MULT_DEPTH = max(2, optencryptedmsrcol.MULT_DEPTH)
+
+
+def min_slots(data_shape):
+    """Smallest number of slots needed for data of the given shape"""
+    return optencryptedmsrcol.min_slots(data_shape)
+
+
+def rotation_steps(data_shape, n_slots):
+    """Rotation steps used on data of the given shape and on its submatrices small enough for a single ciphertext
+    (rotate-and-sum over the slots of a row and over the rows of a column, and their replication), with their number
+    of uses per call"""
+    n_rows, n_cols = data_shape
+    fitting_rows = min(n_rows, n_slots // n_cols)
+    single = merge_steps({step: 1 for step in cumul_add_steps(n_slots)}, rotate_and_sum_steps(n_cols),
+                         rotate_and_sum_steps(n_cols, -1), rotate_and_sum_steps(fitting_rows, n_cols),
+                         rotate_and_sum_steps(fitting_rows, n_cols), rotate_and_sum_steps(fitting_rows, -n_cols))
+
+    return merge_steps(optencryptedmsrcol.rotation_steps(data_shape, n_slots), single)
 
 
 def enlarge(array):
@@ -46,24 +68,17 @@ def array_shift(array, by):
 
 def shift(HE, cipher_data, by, data_size):
     """Shift the ciphertexts based on by measure"""
-    shifted_cipher = cipher_data.copy()
-    shifted_data = cipher_data << by
+    shifted_data = HE.rotate(cipher_data, by, True)
 
     return shifted_data
 
 
 def _list_shift(HE, cipher_list, by, sub_len):
-    """Shift the list of ciphertexts based on by measure"""
+    """Shift the list of ciphertexts, sub_len values each, by by measure as one vector"""
     if by == 0:
         return cipher_list
-    elif by > sub_len:
-        raise ValueError("Value of shift distance Argument 'by' cannot be larger than the size of sub-ciphertexts")
-
-    for i in range(len(cipher_list)):
-        # Shift of the single ciphertext
-        cipher_list[i] = cipher_list[i] << 1
 
-    return cipher_list
+    return CipherVector(HE, cipher_list, sub_len * len(cipher_list), sub_len).rotate(by).ctxts
 
 
 def _cipher_ones(HE, start, end, length):
@@ -94,104 +109,31 @@ def get_scale(cipher_data):
     return scales
 
 
-def _col_sum(HE, cipher_data, data_size):
-    """Sum of columns in the ciphertext"""
-    n_rows = data_size[0]
-    n_cols = data_size[1]
-    c_col_sum = cipher_data.copy()
-
-    for i in range(1, n_rows):
-        c_col_sum += shift(HE, cipher_data, n_cols * i, data_size)
-
-    return c_col_sum
-
-
-def _row_sum(HE, cipher_data, data_size):
-    """Sum of rows in the ciphertext"""
-    n_cols = data_size[1]
-    c_row_sum = cipher_data.copy()
-
-    for i in range(1, n_cols):
-        c_row_sum += cipher_data << i
-
-    return c_row_sum
-
-
-def col_mean(HE, cipher_data, data_size):
-    """Mean of cols in the ciphertext"""
-    N_rows = data_size[0]
-    mean = _col_sum(HE, cipher_data, data_size) / [N_rows for i in range(data_size[1])]
-
-    # For finding residues, repeated values are added
-    rotated_mean = mean.copy()
-    for j in range(N_rows - 1):
-        rotated_mean = mean + HE.rotate(rotated_mean, -data_size[1], True)
-
-    return rotated_mean
-
-
-def row_mean(HE, cipher_data, data_size):
-    """Mean of rows in the ciphertext"""
-    N_cols = data_size[1]
-    mean = _row_sum(HE, cipher_data, data_size) / [N_cols for i in range(data_size[0] * data_size[1])]
-
-    # For finding residues, repeated values are added
-    plain = [1 if i%N_cols == 0 else 0 for i in range(data_size[0] * data_size[1])]
-    mean = mean * plain
-    rotated_mean = mean.copy()
-    for j in range(N_cols - 1):
-        rotated_mean = mean + HE.rotate(rotated_mean, -1, True)
-
-    return rotated_mean
-
-
-def data_mean(HE, cipher_data, data_size):
-    """Mean of data in the ciphertext"""
-    n_elements = data_size[0] * data_size[1]
-    sum_data = HE.cumul_add(cipher_data, True)
-    mean = sum_data / [n_elements for i in range(data_size[0] * data_size[1])]
-
-    return mean
-
-
 def calculate_msr_col_addition(HE, cipher_data, cipher_data_rows):
     """Calculate the mean squared residues of the columns for the node addition step homomorphically"""
     # Get the size of data, and data_cols
     data_size = cipher_data.shape
     data_rows_size = cipher_data_rows.shape
-    n_elements = data_size[0] * data_size[1]
-    no_ciphertexts = math.ceil(len(cipher_data.flatten()) / HE.get_nSlots())
-    tol = 1e-2
 
     # Check if storing an input data in lists is needed
     # 1. first conditions when both data and data_col's sizes are above number of ciphertext's slot
-    if (len(cipher_data.flatten()) > (HE.get_nSlots()) or len(cipher_data_rows.flatten()) > (HE.get_nSlots())):
+    # 2. the single ciphertext path needs data and data_rows laid out with the same number of columns
+    if (len(cipher_data.flatten()) > (HE.get_nSlots()) or len(cipher_data_rows.flatten()) > (HE.get_nSlots())) \
+            or data_size[1] != data_rows_size[1]:
         dec_col_msr = optencryptedmsrcol.calculate_opt_msr_col_addition(HE, cipher_data, cipher_data_rows)
 
         return dec_col_msr
     else:
-        data_size_actual = data_size
-        data_rows_size_actual = data_rows_size
-        ciphertext = HE.encrypt(cipher_data.flatten())
-        ciphertext_rows = HE.encrypt(cipher_data_rows.flatten())
-
-        # Mean value calculation
-        cipher_row_mean = row_mean(HE, ciphertext, data_size_actual)
-        cipher_col_mean = col_mean(HE, ciphertext_rows, data_rows_size_actual)
-        cipher_data_mean = data_mean(HE, ciphertext, data_size_actual)
-
-        HE.rescale_to_next(cipher_row_mean)
-        HE.rescale_to_next(cipher_col_mean)
-        HE.rescale_to_next(cipher_data_mean)
-
-        # Residue and Squared Residue calculation
-        cipher_col_residue = ciphertext_rows - cipher_row_mean - cipher_col_mean + cipher_data_mean
-        cipher_col_square_residue = cipher_col_residue ** 2
-        HE.rescale_to_next(cipher_col_square_residue)
-        cipher_col_msr = col_mean(HE, ~cipher_col_square_residue, data_rows_size_actual)
-        HE.rescale_to_next(cipher_col_msr)
-
-        # Decrypt the results
-        decrypted_col_msr = HE.decrypt(cipher_col_msr)[:data_size[1]]
-
-        return decrypted_col_msr
\ No newline at end of file
+        bicluster = CipherMatrix.encrypt(HE, cipher_data, ROW_MAJOR)
+        data_rows = CipherMatrix.encrypt(HE, cipher_data_rows, ROW_MAJOR)
+
+        # Squared residues and their column means (the column MSRs)
+        c_row_mean, c_col_means, c_all_mean = bicluster.row_means(), data_rows.col_means(), bicluster.total_mean()
+        c_squared = data_rows.residues(c_row_mean, c_col_means, c_all_mean).squared()
+        release(HE, c_row_mean, c_col_means, c_all_mean)
+
+        col_msr = c_squared.decrypt_col_means()
+        for matrix in (c_squared, data_rows, bicluster):
+            matrix.release()
+
+        return col_msr
@@ -0,0 +1,266 @@
+"""
+    SecBic-CCA: A Python library of privacy-preserving biclustering algorithm (Cheng and Church) with Homomorphic Encryption
+
+    Copyright (C) 2023  Shokofeh VahidianSadegh
+
+    This file is part of SecBic-CCA.
+
+"""
+import math
+
+# Largest total modulus bit count allowed for each ring dimension and security level
+# (HomomorphicEncryption.org security standard, as enforced by Microsoft SEAL)
+MAX_MODULUS_BITS = {
+    128: {2 ** 12: 109, 2 ** 13: 218, 2 ** 14: 438, 2 ** 15: 881},
+    192: {2 ** 12: 75, 2 ** 13: 152, 2 ** 14: 305, 2 ** 15: 611},
+    256: {2 ** 12: 58, 2 ** 13: 118, 2 ** 14: 237, 2 ** 15: 476},
+}
+
+# Slots of the largest ring dimension; the column-per-ciphertext kernels split taller columns into row chunks
+MAX_SLOTS = max(MAX_MODULUS_BITS[128]) // 2
+
+# SEAL primes are limited to 60 bits and CKKS scales below 20 bits are too noisy to be useful
+MAX_PRIME_BITS = 60
+MIN_SCALE_BITS = 20
+
+# BFV noise budget assumed to be left in a fresh ciphertext above the plaintext modulus, and consumed by each
+# multiplication on top of the plaintext modulus and ring dimension bits
+BFV_FRESH_NOISE_BITS = 20
+BFV_MULT_NOISE_BITS = 10
+
+
+class CKKSParameterPlan:
+    """CKKS parameter set chosen by plan_ckks_parameters, with the figures that led to it.
+
+    Parameters
+    ----------
+    n : int
+        Ring dimension (polynomial modulus degree); a ciphertext holds n / 2 slots.
+
+    scale_bits : int
+        Bits of the encoding scale (and of every intermediate prime of the modulus chain).
+
+    qi_sizes : list
+        Bit sizes of the modulus chain primes.
+
+    security : int
+        Security level in bits.
+
+    depth : int
+        Number of rescales the chain supports.
+
+    slots_needed : int
+        Smallest number of slots the kernels need for the data shape.
+
+    precision_bits : int
+        Targeted number of fractional bits of the decrypted results.
+
+    integer_bits : int
+        Bits reserved for the integer part of the decrypted results.
+    """
+
+    def __init__(self, n, scale_bits, qi_sizes, security, depth, slots_needed, precision_bits, integer_bits):
+        self.n = n
+        self.scale_bits = scale_bits
+        self.qi_sizes = qi_sizes
+        self.security = security
+        self.depth = depth
+        self.slots_needed = slots_needed
+        self.precision_bits = precision_bits
+        self.integer_bits = integer_bits
+
+    @property
+    def total_bits(self):
+        return sum(self.qi_sizes)
+
+    @property
+    def max_bits(self):
+        return MAX_MODULUS_BITS[self.security][self.n]
+
+    @property
+    def params(self):
+        """Keyword arguments for Pyfhel.contextGen."""
+        return {
+            'scheme': 'CKKS',
+            'n': self.n,
+            'scale': 2 ** self.scale_bits,
+            'qi_sizes': list(self.qi_sizes),
+            'sec': self.security
+        }
+
+    def report(self):
+        """Human readable summary of the chosen parameters."""
+        return '\n'.join([
+            'CKKS parameter plan',
+            '  ring dimension n   : 2^{} ({} slots, {} needed)'.format(int(math.log2(self.n)), self.n // 2,
+                                                                       self.slots_needed),
+            '  modulus chain      : {} ({} primes)'.format(self.qi_sizes, len(self.qi_sizes)),
+            '  total modulus bits : {} of {} allowed at {}-bit security'.format(self.total_bits, self.max_bits,
+                                                                              self.security),
+            '  scale              : 2^{}'.format(self.scale_bits),
+            '  rescale depth      : {}'.format(self.depth),
+            '  precision          : {} fractional bits, {} integer bits'.format(self.precision_bits,
+                                                                                self.integer_bits),
+        ])
+
+    def __str__(self):
+        return self.report()
+
+
+def plan_ckks_parameters(data_shape, value_range, kernels, security=128, precision_bits=10, noise_bits=20,
+                         extra_levels=1):
+    """Choose the smallest CKKS ring dimension and shortest modulus chain for a secured MSR computation.
+
+    The chain is [q0] + depth * [scale] + [special prime], where depth is the largest MULT_DEPTH declared by the
+    kernels plus extra_levels, the scale gives precision_bits fractional bits after noise_bits are lost to encoding,
+    rescaling and rotation noise, and q0 leaves room for the integer part of the decrypted MSR values (bounded by the
+    squared value range). The ring dimension is the smallest one whose security bound admits the chain and whose
+    slot count satisfies every kernel's min_slots for the data shape.
+
+    Parameters
+    ----------
+    data_shape : tuple
+        Shape (rows, cols) of the data matrix.
+
+    value_range : tuple
+        Minimum and maximum value of the data matrix.
+
+    kernels : list
+        Kernel modules the run will use. Each declares MULT_DEPTH and min_slots(data_shape).
+
+    security : int, default: 128
+        Security level in bits (128, 192 or 256).
+
+    precision_bits : int, default: 10
+        Fractional bits required in the decrypted results.
+
+    noise_bits : int, default: 20
+        Bits of the scale assumed to be lost to CKKS approximation noise.
+
+    extra_levels : int, default: 1
+        Rescale levels kept in reserve on top of the kernels' declared depth.
+    """
+    if security not in MAX_MODULUS_BITS:
+        raise ValueError("security must be one of {}, got {}".format(sorted(MAX_MODULUS_BITS), security))
+
+    depth = max(kernel.MULT_DEPTH for kernel in kernels) + extra_levels
+    slots_needed = max(kernel.min_slots(data_shape) for kernel in kernels)
+
+    scale_bits = max(precision_bits + noise_bits, MIN_SCALE_BITS)
+    span = max(float(value_range[1]) - float(value_range[0]), 1.0)
+    integer_bits = math.ceil(math.log2(span * span)) + 1
+    first_bits = scale_bits + integer_bits
+
+    if first_bits > MAX_PRIME_BITS:
+        raise ValueError("Cannot reach {} fractional bits for values spanning {}: the first prime would need {} bits "
+                         "(max {})".format(precision_bits, span, first_bits, MAX_PRIME_BITS))
+
+    qi_sizes = [first_bits] + depth * [scale_bits] + [first_bits]
+
+    for n in sorted(MAX_MODULUS_BITS[security]):
+        if n // 2 >= slots_needed and sum(qi_sizes) <= MAX_MODULUS_BITS[security][n]:
+            return CKKSParameterPlan(n, scale_bits, qi_sizes, security, depth, slots_needed, precision_bits,
+                                     integer_bits)
+
+    raise ValueError("No ring dimension fits a {}-bit modulus chain with {} slots at {}-bit security".format(
+        sum(qi_sizes), slots_needed, security))
+
+
+class BFVParameterPlan:
+    """BFV parameter sets chosen by plan_bfv_parameters: one context per plaintext modulus, whose results are combined
+    with the Chinese Remainder Theorem when a single modulus cannot hold them.
+
+    Parameters
+    ----------
+    n : int
+        Ring dimension (polynomial modulus degree).
+
+    t_bits : list
+        Bit sizes of the (distinct, batching-friendly) plaintext moduli.
+
+    security : int
+        Security level in bits.
+
+    depth : int
+        Multiplicative depth the coefficient modulus must support.
+
+    slots_needed : int
+        Smallest number of slots the kernels need for the data shape.
+
+    result_bits : int
+        Bits of the largest exact integer result of the kernels.
+    """
+
+    def __init__(self, n, t_bits, security, depth, slots_needed, result_bits):
+        self.n = n
+        self.t_bits = t_bits
+        self.security = security
+        self.depth = depth
+        self.slots_needed = slots_needed
+        self.result_bits = result_bits
+
+    @property
+    def params(self):
+        """Keyword arguments for Pyfhel.contextGen, one dictionary per plaintext modulus."""
+        return [{'scheme': 'BFV', 'n': self.n, 't_bits': bits, 'sec': self.security} for bits in self.t_bits]
+
+    def report(self):
+        """Human readable summary of the chosen parameters."""
+        return '\n'.join([
+            'BFV parameter plan',
+            '  ring dimension n   : 2^{} ({} slots, {} needed)'.format(int(math.log2(self.n)), self.n,
+                                                                       self.slots_needed),
+            '  plaintext moduli   : {} bits ({} context(s))'.format(self.t_bits, len(self.t_bits)),
+            '  exact results up to: {} bits'.format(self.result_bits),
+            '  multiplicative depth: {} at {}-bit security'.format(self.depth, self.security),
+        ])
+
+    def __str__(self):
+        return self.report()
+
+
+def plan_bfv_parameters(data_shape, value_range, kernels, security=128):
+    """Choose BFV plaintext moduli and the smallest ring dimension for exact integer MSR kernels.
+
+    The kernels declare max_result_bits(data_shape, value_range), the size of their largest decrypted integer. The
+    plaintext moduli (at most MAX_PRIME_BITS each, of distinct sizes so that they are coprime) are added until their
+    product holds it. The ring dimension is the smallest one whose default coefficient modulus keeps a noise budget
+    for the kernels' MULT_DEPTH and whose slots satisfy min_slots(data_shape).
+
+    Parameters
+    ----------
+    data_shape : tuple
+        Shape (rows, cols) of the data matrix.
+
+    value_range : tuple
+        Minimum and maximum value of the data matrix.
+
+    kernels : list
+        Kernel modules the run will use. Each declares MULT_DEPTH, min_slots(data_shape) and
+        max_result_bits(data_shape, value_range).
+
+    security : int, default: 128
+        Security level in bits (128, 192 or 256).
+    """
+    if security not in MAX_MODULUS_BITS:
+        raise ValueError("security must be one of {}, got {}".format(sorted(MAX_MODULUS_BITS), security))
+
+    depth = max(kernel.MULT_DEPTH for kernel in kernels)
+    slots_needed = max(kernel.min_slots(data_shape) for kernel in kernels)
+    result_bits = max(kernel.max_result_bits(data_shape, value_range) for kernel in kernels)
+
+    # A b-bit prime is at least 2 ** (b - 1)
+    if result_bits < MAX_PRIME_BITS:
+        t_bits = [max(MIN_SCALE_BITS, result_bits + 1)]
+    else:
+        t_bits = []
+        while sum(bits - 1 for bits in t_bits) < result_bits:
+            t_bits.append(MAX_PRIME_BITS - len(t_bits))
+
+    for n in sorted(MAX_MODULUS_BITS[security]):
+        noise_bits = t_bits[0] + BFV_FRESH_NOISE_BITS + depth * (t_bits[0] + int(math.log2(n)) + BFV_MULT_NOISE_BITS)
+        if n >= slots_needed and noise_bits <= MAX_MODULUS_BITS[security][n]:
+            return BFVParameterPlan(n, t_bits, security, depth, slots_needed, result_bits)
+
+    raise ValueError("No ring dimension fits {}-bit plaintext moduli with {} slots at {}-bit security".format(
+        t_bits[0], slots_needed, security))
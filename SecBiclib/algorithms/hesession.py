@@ -0,0 +1,486 @@
+"""
+    SecBic-CCA: A Python library of privacy-preserving biclustering algorithm (Cheng and Church) with Homomorphic Encryption
+
+    Copyright (C) 2023  Shokofeh VahidianSadegh
+
+    This file is part of SecBic-CCA.
+
+"""
+from os import makedirs
+from os.path import expanduser, isfile, join
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from SecBiclib.algorithms.profiling import kernel as recorded_kernel
+
+# The modulus chain holds the depth of the CKKS MSR kernels (3 rescales, see their MULT_DEPTH) plus one level in
+# reserve, 4 levels in all (it was [60] + 10 * [30] + [60], 10 levels, before the kernels were cut to three levels)
+DEFAULT_CKKS_PARAMS = {
+    'scheme': 'CKKS',
+    'n': 2 ** 14,
+    'scale': 2 ** 30,
+    'qi_sizes': [60] + 4 * [30] + [60]
+}
+
+_KEY_FILES = ('context', 'pub.key', 'sec.key', 'relin.key', 'rotate.key')
+
+# Marks a key store entry whose rotation keys are the full set, generated instead of the planned ones
+_FULL_ROTATION_KEYS = 'rotate.full'
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+class HESession:
+    """Homomorphic Encryption session holding a Pyfhel context and its keys
+
+    The context, the public/secret keys, the relinearization key and the rotation keys are generated once. If a key
+    store directory is given, they are saved in a sub-directory named after the parameter set and loaded back on later
+    runs instead of being generated again. Key generation can be started in a background thread with start() while
+    the caller loads and preprocesses the data; get() waits for it and returns the ready Pyfhel object.
+
+    The session can be used in place of the Pyfhel object it holds: attributes are looked up on the Pyfhel object,
+    except rotate(), which builds rotations without a key of their own from the keys of the rotation plan. Pyfhel
+    releases without targeted rotation keys get the full set instead (full_rotation_keys is then True), and rotate()
+    uses it directly.
+
+    The key store contains the secret key, so it is created with owner-only permissions and should be kept on a
+    trusted machine.
+
+    Parameters
+    ----------
+    params : dict, default: None
+        Keyword arguments of Pyfhel.contextGen. If None, DEFAULT_CKKS_PARAMS is used.
+
+    key_dir : str, default: None
+        Root directory of the key store. If None, keys are kept in memory only.
+
+    rotation_plan : SecBiclib.algorithms.rotations.RotationPlan, default: None
+        Rotation steps to generate Galois keys for. If None, the full set of rotation keys is generated.
+
+    kernels : sequence of modules, default: None
+        Kernel modules the session will run, each declaring MULT_DEPTH. A ValueError is raised if one of them is
+        deeper than the levels of the modulus chain.
+    """
+
+    def __init__(self, params=None, key_dir=None, rotation_plan=None, kernels=None):
+        self.params = dict(DEFAULT_CKKS_PARAMS if params is None else params)
+        if kernels is not None:
+            check_depth(self.params, kernels)
+        self.key_dir = None if key_dir is None else expanduser(key_dir)
+        self.rotation_plan = rotation_plan
+        self.loaded_from_store = False
+        self.full_rotation_keys = False
+        self._HE = None
+        self._thread = None
+        self._error = None
+        self._lock = threading.Lock()
+
+    @property
+    def fingerprint(self):
+        """Short hash identifying the parameter set and the rotation keys."""
+        return parameters_fingerprint(self.params, self.rotation_plan)
+
+    @property
+    def path(self):
+        """Directory of the key store entry of this parameter set, or None if no key store is used."""
+        if self.key_dir is None:
+            return None
+
+        return join(self.key_dir, self.fingerprint)
+
+    @property
+    def ready(self):
+        return self._HE is not None
+
+    def start(self):
+        """Starts loading or generating the context and keys in a background thread."""
+        with self._lock:
+            # A setup that failed (and set _error) is started again
+            if self._HE is not None or (self._thread is not None and self._error is None):
+                return self
+
+            self._error = None
+            self._thread = threading.Thread(target=self._setup_in_thread, name='HESession-keygen', daemon=True)
+            self._thread.start()
+
+        return self
+
+    def get(self):
+        """Returns the Pyfhel object, waiting for (or running) the context and key setup if needed."""
+        if self._HE is None:
+            self.start()
+            with self._lock:
+                thread = self._thread
+            if thread is not None:
+                thread.join()
+
+            with self._lock:
+                if self._HE is None and self._thread is thread:
+                    # Every caller waiting on the failed setup gets its error; the next start() tries again
+                    raise self._error
+
+            # Another caller started the setup again in the meantime
+            return self.get()
+
+        return self._HE
+
+    def wait(self):
+        """Waits for the context and key setup and returns the session."""
+        self.get()
+
+        return self
+
+    def rotate(self, ctxt, k, in_new_ctxt=False):
+        """Rotates the ciphertext by k slots, composing the rotation from planned keys if k has no key."""
+        HE = self.get()
+        if self.rotation_plan is None or self.full_rotation_keys:
+            return HE.rotate(ctxt, k, in_new_ctxt)
+
+        rotated = ctxt.copy() if in_new_ctxt else ctxt
+        for step in self.rotation_plan.decompose(k):
+            HE.rotate(rotated, step)
+
+        return rotated
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        return getattr(self.get(), name)
+
+    def _setup_in_thread(self):
+        try:
+            self._HE = self._setup()
+        except Exception as e:
+            with self._lock:
+                self._error = e
+
+    def _setup(self):
+        path = self.path
+        if path is not None and self._in_store(path):
+            HE = self._load(path)
+            self.loaded_from_store = True
+        else:
+            HE = self._generate()
+            if path is not None:
+                self._save(HE, path)
+
+        return HE
+
+    def _generate(self):
+        from Pyfhel import Pyfhel
+        HE = Pyfhel()
+        HE.contextGen(**self.params)  # Generate context for the chosen scheme
+        HE.keyGen()  # Key Generation: generates a pair of public/secret keys
+        self._rotate_key_gen(HE)  # Rotation values in the vector
+        HE.relinKeyGen()  # Relinearization key generation
+
+        return HE
+
+    def _rotate_key_gen(self, HE):
+        if self.rotation_plan is None:
+            HE.rotateKeyGen()
+            return
+
+        try:
+            HE.rotateKeyGen(rot_steps=self.rotation_plan.signed_key_steps)
+        except TypeError:
+            # Pyfhel releases without targeted rotation keys: fall back to the full set, no composition needed
+            HE.rotateKeyGen()
+            self.full_rotation_keys = True
+
+    @staticmethod
+    def _in_store(path):
+        return all(isfile(join(path, name)) for name in _KEY_FILES)
+
+    def _load(self, path):
+        from Pyfhel import Pyfhel
+        HE = Pyfhel()
+        HE.load_context(join(path, 'context'))
+        HE.load_public_key(join(path, 'pub.key'))
+        HE.load_secret_key(join(path, 'sec.key'))
+        HE.load_relin_key(join(path, 'relin.key'))
+        HE.load_rotate_key(join(path, 'rotate.key'))
+        self.full_rotation_keys = isfile(join(path, _FULL_ROTATION_KEYS))
+
+        return HE
+
+    def _save(self, HE, path):
+        makedirs(path, mode=0o700, exist_ok=True)
+        # The marker and the parameters go first: the entry is only read back once all its key files are in place
+        if self.full_rotation_keys:
+            self._write(path, _FULL_ROTATION_KEYS, lambda tmp: open(tmp, 'w').close())
+        self._write(path, 'params.json', self._dump_params)
+        self._write(path, 'context', HE.save_context)
+        self._write(path, 'pub.key', HE.save_public_key)
+        self._write(path, 'sec.key', HE.save_secret_key)
+        self._write(path, 'relin.key', HE.save_relin_key)
+        self._write(path, 'rotate.key', HE.save_rotate_key)
+
+    def _dump_params(self, file_name):
+        with open(file_name, 'w') as f:
+            json.dump(self.params, f, indent=2)
+
+    @staticmethod
+    def _write(path, name, save):
+        """Saves a key store file with save(file_name) into an owner-only temporary file, moved into place once
+        complete, so that a concurrent or interrupted run never reads a partial file."""
+        fd, tmp = tempfile.mkstemp(prefix='.{}.'.format(name), dir=path)
+        os.close(fd)
+        try:
+            save(tmp)
+            os.chmod(tmp, 0o600)
+            os.replace(tmp, join(path, name))
+        except BaseException:
+            if isfile(tmp):
+                os.remove(tmp)
+            raise
+
+
+class SessionGroup:
+    """HE sessions of one scheme that differ only in their plaintext modulus
+
+    Exact integer (BFV) kernels whose results do not fit a single plaintext modulus run on several sessions and combine
+    the decrypted residues with the Chinese Remainder Theorem. The group starts and waits for all its sessions; its
+    params are those of the first session.
+
+    Parameters
+    ----------
+    sessions : list
+        HESession objects, largest plaintext modulus first.
+    """
+
+    def __init__(self, sessions):
+        self.sessions = list(sessions)
+
+    @property
+    def params(self):
+        return self.sessions[0].params
+
+    @property
+    def moduli(self):
+        """Plaintext modulus of each session."""
+        return [session.t for session in self.sessions]
+
+    def start(self):
+        for session in self.sessions:
+            session.start()
+
+        return self
+
+    def wait(self):
+        for session in self.sessions:
+            session.wait()
+
+        return self
+
+    def clear_pool(self):
+        """Frees the pooled ciphertext buffers of every session."""
+        for session in self.sessions:
+            session.clear_pool()
+
+    def __iter__(self):
+        return iter(self.sessions)
+
+    def __len__(self):
+        return len(self.sessions)
+
+    @property
+    def profile(self):
+        return self.sessions[0].profile
+
+    @profile.setter
+    def profile(self, profile):
+        for session in self.sessions:
+            session.profile = profile
+
+    @property
+    def memory(self):
+        return self.sessions[0].memory
+
+    @memory.setter
+    def memory(self, memory):
+        for session in self.sessions:
+            session.memory = memory
+
+    @property
+    def tracer(self):
+        return self.sessions[0].tracer
+
+    @tracer.setter
+    def tracer(self, tracer):
+        for session in self.sessions:
+            session.tracer = tracer
+
+
+class SessionRouter:
+    """Routes secured MSR computations to the HE session suited to their purpose
+
+    Ranking computations (argmax of row/column MSRs, comparisons against a multiple of the MSR) only need the order of
+    the values and run on the ranking session, which can use a small, low precision context. Threshold computations
+    (the msr <= msr_threshold decisions) run on the threshold session, with the precise context. With a single
+    session, both purposes use it. The number of kernel calls and the time spent are kept per purpose.
+
+    The sessions are HE backends (see backends.py). The profile, memory tracker and tracer given to record_with() are
+    set on them, and each kernel call is attributed to the kernel function in all of them.
+
+    Parameters
+    ----------
+    ranking : HESession
+        Session for ranking computations.
+
+    threshold : HESession, default: None
+        Session for threshold computations. If None, the ranking session is used.
+    """
+
+    PURPOSES = ('ranking', 'threshold')
+
+    def __init__(self, ranking, threshold=None):
+        self.ranking = ranking
+        self.threshold = ranking if threshold is None else threshold
+        self.calls = dict.fromkeys(self.PURPOSES, 0)
+        self.seconds = dict.fromkeys(self.PURPOSES, 0.0)
+        self.profile = None
+        self.memory = None
+        self.tracer = None
+
+    @property
+    def two_tier(self):
+        return self.threshold is not self.ranking
+
+    def session(self, purpose):
+        return self.ranking if purpose == 'ranking' else self.threshold
+
+    def start(self):
+        self.ranking.start()
+        self.threshold.start()
+
+        return self
+
+    def wait(self):
+        self.ranking.wait()
+        self.threshold.wait()
+
+        return self
+
+    def record_with(self, profile=None, memory=None, tracer=None):
+        """Records the HE operations of the sessions in the profiling.HEProfile, their live ciphertexts in the
+        memory.MemoryTracker and their timeline in the tracing.Tracer given (None disables any of them)."""
+        self.profile = profile
+        self.memory = memory
+        self.tracer = tracer
+        for session in (self.ranking, self.threshold):
+            session.profile = profile
+            session.memory = memory
+            session.tracer = tracer
+
+        return self
+
+    def run(self, purpose, kernel, *args):
+        """Calls kernel(session, *args) on the session of the given purpose and records its usage."""
+        t0 = time.perf_counter()
+        with recorded_kernel(kernel.__name__, self.profile, self.memory, self.tracer):
+            result = kernel(self.session(purpose), *args)
+        self.calls[purpose] += 1
+        self.seconds[purpose] += time.perf_counter() - t0
+
+        return result
+
+    def report(self):
+        """Human readable summary of the usage of each context."""
+        lines = ['HE context usage']
+        for purpose in self.PURPOSES:
+            # Sessions made from a Pyfhel object alone have no parameters to read the ring size from
+            params = self.session(purpose).params
+            log_n = '?' if params is None else params['n'].bit_length() - 1
+            lines.append('  {:<9} : n=2^{:<2} {:>6} kernel calls {:>10.3f} s'.format(
+                purpose, log_n, self.calls[purpose], self.seconds[purpose]))
+
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return self.report()
+
+
+def parameters_fingerprint(params, rotation_plan=None):
+    """Returns a short, stable hash of a contextGen parameter set and of the planned rotation keys."""
+    key_steps = None if rotation_plan is None else rotation_plan.key_steps
+    encoded = json.dumps([params, key_steps], sort_keys=True, default=str).encode()
+
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def chain_depth(params):
+    """Returns the levels of the CKKS modulus chain of the parameters (the primes between the first one and the
+    special prime), or None if the parameters have no chain."""
+    if params.get('scheme', 'CKKS').upper() != 'CKKS' or 'qi_sizes' not in params:
+        return None
+
+    return len(params['qi_sizes']) - 2
+
+
+def check_depth(params, kernels):
+    """Raises a ValueError if a kernel module declares a MULT_DEPTH larger than the levels of the modulus chain."""
+    depth = chain_depth(params)
+    if depth is None:
+        return
+
+    for kernel in kernels:
+        if kernel.MULT_DEPTH > depth:
+            raise ValueError("MULT_DEPTH of {} must be at most {}, the levels of qi_sizes {}, got {}".format(
+                kernel.__name__, depth, params['qi_sizes'], kernel.MULT_DEPTH))
+
+
+def get_session(params=None, key_dir=None, rotation_plan=None, kernels=None):
+    """Returns the in-process HESession shared by every caller using the same parameter set, rotation keys and key
+    store.
+
+    Parameters
+    ----------
+    params : dict, default: None
+        Keyword arguments of Pyfhel.contextGen. If None, DEFAULT_CKKS_PARAMS is used.
+
+    key_dir : str, default: None
+        Root directory of the key store. If None, keys are kept in memory only.
+
+    rotation_plan : SecBiclib.algorithms.rotations.RotationPlan, default: None
+        Rotation steps to generate Galois keys for. If None, the full set of rotation keys is generated.
+
+    kernels : sequence of modules, default: None
+        Kernel modules the session will run. A ValueError is raised if one of them is deeper than the modulus chain.
+    """
+    params = dict(DEFAULT_CKKS_PARAMS if params is None else params)
+    if kernels is not None:
+        check_depth(params, kernels)
+    key_dir = None if key_dir is None else expanduser(key_dir)
+    key = (parameters_fingerprint(params, rotation_plan), key_dir)
+
+    with _sessions_lock:
+        if key not in _sessions:
+            _sessions[key] = HESession(params, key_dir, rotation_plan)
+
+        return _sessions[key]
+
+
+def get_session_group(params_list, key_dir=None):
+    """Returns a SessionGroup of shared sessions, one per contextGen parameter set.
+
+    Parameters
+    ----------
+    params_list : list
+        Keyword arguments of Pyfhel.contextGen for each session, largest plaintext modulus first.
+
+    key_dir : str, default: None
+        Root directory of the key store. If None, keys are kept in memory only.
+    """
+    return SessionGroup([get_session(params, key_dir) for params in params_list])
+
+
+def clear_sessions():
+    """Drops every shared session, so that the next get_session call builds a new one."""
+    with _sessions_lock:
+        _sessions.clear()
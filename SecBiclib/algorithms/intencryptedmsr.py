@@ -0,0 +1,174 @@
+import math
+import numpy as np
+from SecBiclib.algorithms.rotations import cumul_add_steps
+
+# Exact integer (BFV) MSR kernels. Residues are scaled by the number of elements so that they stay integers, squared
+# once, and divided after decryption. Results too large for one plaintext modulus are computed on a group of sessions
+# with distinct moduli and recovered with the Chinese Remainder Theorem.
+
+# One ciphertext-ciphertext multiplication (squared residues) and one plaintext mask multiplication
+MULT_DEPTH = 2
+
+
+def min_slots(data_shape):
+    """Smallest number of slots needed for data of the given shape (one column per ciphertext, in the first of the two
+    batching rows)"""
+    return 2 * data_shape[0]
+
+
+def rotation_steps(data_shape, n_slots):
+    """Rotation steps used on data of the given shape (sums over a batching row), with their number of uses per
+    call"""
+    return {step: data_shape[1] + 1 for step in cumul_add_steps(n_slots // 2)}
+
+
+def result_bits(count, n_elements, span):
+    """Bits of a sum of count squared residues scaled by n_elements, for values spanning span (a residue is at most
+    twice the span)"""
+    bound = 4 * count * n_elements ** 2 * max(int(span), 1) ** 2
+
+    return bound.bit_length()
+
+
+def max_result_bits(data_shape, value_range):
+    """Bits of the largest integer decrypted for data of the given shape and value range"""
+    n_rows, n_cols = data_shape
+    span = int(math.ceil(value_range[1] - value_range[0]))
+
+    return result_bits(max(n_rows, n_cols), n_rows * n_cols, span)
+
+
+def _sessions_for(HE, bits):
+    """Sessions of the group whose plaintext moduli together hold results of the given size"""
+    sessions = list(HE) if hasattr(HE, 'sessions') else [HE]
+    product = 1
+    for k, session in enumerate(sessions):
+        product *= session.t
+        if product >= 2 ** bits:
+            return sessions[:k + 1]
+
+    raise ValueError("The plaintext moduli of the BFV sessions hold {} bits, {} are needed; plan the sessions with "
+                     "plan_bfv_parameters".format(product.bit_length() - 1, bits))
+
+
+def _crt(residues, moduli):
+    """Combines residue vectors modulo coprime moduli into exact Python integers"""
+    product = math.prod(moduli)
+    total = np.zeros(len(residues[0]), dtype=object)
+    for r, t in zip(residues, moduli):
+        share = product // t
+        total = total + np.mod(np.asarray(r, dtype=np.int64).astype(object), t) * (share * pow(share, -1, t))
+
+    return total % product
+
+
+def _total(HE, c):
+    """Sum of the first batching row, in every slot of that row"""
+    total = c.copy()
+    for step in sorted(cumul_add_steps(HE.get_nSlots() // 2)):
+        total += HE.rotate(total, step, True)
+
+    return total
+
+
+def _sum(ctxts):
+    total = ctxts[0].copy()
+    for c in ctxts[1:]:
+        total += c
+
+    return total
+
+
+def _square(HE, c):
+    sq = c * c
+    HE.relinearize(sq)
+
+    return sq
+
+
+def _residue_sums(HE, data, row_data, col_data, sub_shape, total_from_rows, rows=True, cols=True, inverse=False):
+    """Decrypted sums of squared scaled residues of the rows of data (row totals) and of its columns (column totals).
+
+    Row means are taken over row_data and column means over col_data. The mean of all elements is the one of the
+    bicluster of shape sub_shape, which is row_data if total_from_rows and col_data otherwise. With inverse, the sums of
+    the squared inverted residues are returned too.
+    """
+    n_rows, n_cols = data.shape
+    n_elements = sub_shape[0] * sub_shape[1]
+    # Plaintext constants cover the rows of the data only (the backend pads them with zeros)
+    scaled = lambda value: np.full(n_rows, value, dtype=np.int64)
+
+    c_data = [HE.encrypt(np.asarray(data[:, j], dtype=np.int64)) for j in range(n_cols)]
+    c_row_sum = _sum([HE.encrypt(np.asarray(row_data[:, j], dtype=np.int64)) for j in range(row_data.shape[1])])
+    c_col_sum = [_total(HE, HE.encrypt(np.asarray(col_data[:, j], dtype=np.int64))) for j in range(col_data.shape[1])]
+    c_all_sum = _total(HE, c_row_sum) if total_from_rows else _sum(c_col_sum)
+
+    # n_elements * (x_ij - r_i - c_j + m) = (n_elements * x_ij - n_rows * R_i) + (M - n_cols * C_j), the second term
+    # masked to the rows of the data
+    c_row_term = c_row_sum * scaled(sub_shape[0])
+    c_all_term = c_all_sum * scaled(1)
+    sq_res = [[] for _ in range(2 if inverse else 1)]
+    for j in range(n_cols):
+        c_a = c_data[j] * scaled(n_elements) - c_row_term
+        c_b = c_all_term - c_col_sum[j] * scaled(sub_shape[1])
+        sq_res[0].append(_square(HE, c_a + c_b))
+        if inverse:
+            sq_res[1].append(_square(HE, c_b - c_a))
+
+    results = []
+    for sq in sq_res:
+        row_tot = HE.decrypt(_sum(sq))[:n_rows] if rows else np.zeros(0, dtype=np.int64)
+        col_tot = np.array([HE.decrypt(_total(HE, c))[0] for c in sq] if cols else [], dtype=np.int64)
+        results.append((row_tot, col_tot))
+
+    return results
+
+
+def _exact_sums(HE, bits, *args, **kwargs):
+    """Runs _residue_sums on as many sessions as the result size requires and combines them exactly"""
+    sessions = _sessions_for(HE, bits)
+    moduli = [session.t for session in sessions]
+    per_session = [_residue_sums(session, *args, **kwargs) for session in sessions]
+
+    return [(_crt([s[k][0] for s in per_session], moduli), _crt([s[k][1] for s in per_session], moduli))
+            for k in range(len(per_session[0]))]
+
+
+def _exact_mean(totals, divisor):
+    return np.array([float(v) / divisor for v in totals])
+
+
+def calculate_int_msr(HE, data):
+    """Exact MSR, row MSRs and column MSRs of integer data"""
+    n_rows, n_cols = data.shape
+    n_elements = n_rows * n_cols
+    bits = result_bits(max(n_rows, n_cols), n_elements, np.ptp(data))
+    [(row_tot, col_tot)] = _exact_sums(HE, bits, data, data, data, data.shape, True)
+
+    msr = float(sum(col_tot)) / (n_elements ** 3)
+    row_msr = _exact_mean(row_tot, n_elements ** 2 * n_cols)
+    col_msr = _exact_mean(col_tot, n_elements ** 2 * n_rows)
+
+    return msr, row_msr, col_msr
+
+
+def calculate_int_msr_col_addition(HE, data, data_rows):
+    """Exact column MSRs of every column of data_rows against the bicluster data (rows of the bicluster)"""
+    n_rows, n_cols = data.shape
+    n_elements = n_rows * n_cols
+    bits = result_bits(n_rows, n_elements, np.ptp(data_rows))
+    [(_, col_tot)] = _exact_sums(HE, bits, data_rows, data, data_rows, data.shape, True, rows=False)
+
+    return _exact_mean(col_tot, n_elements ** 2 * n_rows)
+
+
+def calculate_int_msr_row_addition(HE, data, data_cols):
+    """Exact row MSRs and inverted row MSRs of every row of data_cols against the bicluster data (columns of the
+    bicluster)"""
+    n_rows, n_cols = data.shape
+    n_elements = n_rows * n_cols
+    bits = result_bits(n_cols, n_elements, np.ptp(data_cols))
+    [(row_tot, _), (row_inv_tot, _)] = _exact_sums(HE, bits, data_cols, data_cols, data, data.shape, False,
+                                                   cols=False, inverse=True)
+
+    return _exact_mean(row_tot, n_elements ** 2 * n_cols), _exact_mean(row_inv_tot, n_elements ** 2 * n_cols)
@@ -0,0 +1,103 @@
+import numpy as np
+from SecBiclib.algorithms.ciphermatrix import CipherMatrix, release
+from SecBiclib.algorithms.rotations import cumul_add_steps
+
+# Rescales on the longest multiplicative path: means (row masks folding the divisions), squared residues, column sums
+# over the row mask, then column MSRs gathered into one ciphertext by masks folding the division
+MULT_DEPTH = 4
+
+
+def min_slots(data_shape):
+    """Smallest number of slots needed for data of the given shape (one full column per ciphertext)"""
+    return data_shape[0]
+
+
+def rotation_steps(data_shape, n_slots):
+    """Rotation steps used on data of the given shape (cumul_add only), with their number of uses per call"""
+    return {step: 2 * data_shape[1] + 1 for step in cumul_add_steps(n_slots)}
+
+
+class EncryptedMatrix:
+    """Data matrix encrypted once, one full column per ciphertext, for the masked kernels
+
+    The kernels select the rows of a bicluster with plaintext 0/1 masks and its columns by ciphertext index, with the
+    numbers of rows and columns as public scalars, so that the matrix is not encrypted again for every submatrix. The
+    columns are encrypted on first use on each backend (the ranking and threshold contexts of the two-tier mode each
+    get their own copy). When values of the data change, refresh() encrypts again only the columns holding them.
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        Data matrix, whose number of rows must fit in the slots of a ciphertext.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.encrypted = {}
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    def columns(self, HE):
+        """Ciphertexts of the columns of the matrix on the backend."""
+        if id(HE) not in self.encrypted:
+            if self.shape[0] > HE.get_nSlots():
+                raise ValueError("Cannot encrypt columns of {} rows in {} slots".format(self.shape[0],
+                                                                                     HE.get_nSlots()))
+            self.encrypted[id(HE)] = (HE, np.array([HE.encrypt(self.data[:, j]) for j in range(self.shape[1])]))
+
+        return self.encrypted[id(HE)][1]
+
+    def refresh(self, col_indices):
+        """Encrypts again the given columns of the data, on every backend they were encrypted on."""
+        for HE, c_columns in self.encrypted.values():
+            for j in col_indices:
+                c_columns[j] = HE.encrypt(self.data[:, j])
+
+
+def calculate_masked_msr(HE, matrix, rows, cols):
+    """Calculate the mean squared residues of the rows, of the columns and of the bicluster selected by the boolean
+    rows and cols masks in the encrypted matrix"""
+    bicluster = CipherMatrix.masked(HE, matrix.columns(HE)[cols], rows)
+    msr, row_msr, col_msr = bicluster.msr()
+    bicluster.release()
+
+    return msr, row_msr[rows], col_msr
+
+
+def calculate_masked_msr_col_addition(HE, matrix, rows, cols):
+    """Calculate the mean squared residues of every column of the matrix over the bicluster rows, for the node
+    addition step"""
+    c_data = matrix.columns(HE)
+    bicluster = CipherMatrix.masked(HE, c_data[cols], rows)
+    data_rows = CipherMatrix.masked(HE, c_data, rows)
+
+    c_row_mean, c_col_means, c_all_mean = bicluster.row_means(), data_rows.col_means(), bicluster.total_mean()
+    c_squared = data_rows.residues(c_row_mean, c_col_means, c_all_mean).squared()
+    release(HE, c_row_mean, c_col_means, c_all_mean)
+
+    col_msr = c_squared.decrypt_col_means()
+    for matrix in (c_squared, bicluster):
+        matrix.release()
+
+    return col_msr
+
+
+def calculate_masked_msr_row_addition(HE, matrix, rows, cols):
+    """Calculate the mean squared residues of every row of the matrix and of its inverse over the bicluster columns,
+    for the node addition step"""
+    bicluster = CipherMatrix.masked(HE, matrix.columns(HE)[cols], rows)
+
+    # The row means are those of every row, and the residues of the rows outside the bicluster are their residues
+    c_row_mean, c_col_means, c_all_mean = bicluster.means()
+    c_squared = bicluster.residues(c_row_mean, c_col_means, c_all_mean).squared()
+    c_inverse_squared = bicluster.residues(c_row_mean, c_col_means, c_all_mean, inverse=True).squared()
+    release(HE, c_row_mean, c_col_means, c_all_mean)
+
+    row_msr = c_squared.decrypt_row_means()
+    row_inverse_msr = c_inverse_squared.decrypt_row_means()
+    for matrix in (c_squared, c_inverse_squared, bicluster):
+        matrix.release()
+
+    return row_msr, row_inverse_msr
@@ -0,0 +1,184 @@
+"""
+    SecBic-CCA: A Python library of privacy-preserving biclustering algorithm (Cheng and Church) with Homomorphic Encryption
+
+    Copyright (C) 2023  Shokofeh VahidianSadegh
+
+    This file is part of SecBic-CCA.
+
+"""
+from SecBiclib.algorithms.profiling import ScopedRecorder
+
+# Number of primes of SEAL's default BFV coefficient modulus (128-bit security) for each ring dimension; ciphertexts
+# use all of them but the special prime
+BFV_DEFAULT_PRIMES = {2 ** 12: 3, 2 ** 13: 5, 2 ** 14: 9, 2 ** 15: 16}
+
+
+def ciphertext_bytes(params, level=0, size=2):
+    """Memory of a ciphertext with the given contextGen parameters, number of rescales (level) and number of
+    polynomials (size): each polynomial holds n 64-bit coefficients per remaining prime of the modulus chain"""
+    n = params['n']
+    if 'qi_sizes' in params:
+        n_primes = len(params['qi_sizes']) - 1 - level
+    else:
+        n_primes = BFV_DEFAULT_PRIMES.get(n, 2) - 1
+
+    return size * max(n_primes, 1) * n * 8
+
+
+class HEMemoryBudgetError(MemoryError):
+    """Raised when live ciphertexts would exceed the memory budget of a MemoryTracker."""
+
+
+class MemoryTracker(ScopedRecorder):
+    """Live ciphertext accounting of a secured run
+
+    A backend with a memory tracker reports every ciphertext it creates and every ciphertext released (or changed
+    in size by a rescale or relinearization). The tracker keeps the number and bytes of live ciphertexts per level,
+    the overall peak, the peak reached in each algorithm phase and kernel function, and the number and bytes of all
+    the allocations (the allocation churn). With a budget, a ciphertext that would bring the live bytes above it
+    raises an HEMemoryBudgetError before it is allocated: backends check() the bytes of the result of each operation,
+    predicted from the level and size of its operands, before running it, and allocate() checks the actual bytes again.
+
+    Parameters
+    ----------
+    budget : int, default: None
+        Largest number of bytes of live ciphertexts allowed. If None, there is no limit.
+    """
+
+    def __init__(self, budget=None):
+        super().__init__()
+        self.budget = budget
+        self.live = {}
+        self.live_bytes = 0
+        self.peak_bytes = 0
+        self.allocations = 0
+        self.allocated_bytes = 0
+        self.phase_peaks = {}
+        self.kernel_peaks = {}
+        self._open = []
+
+    def check(self, n_bytes, level):
+        """Raises an HEMemoryBudgetError if n_bytes more of ciphertexts at the given level would exceed the budget."""
+        live_bytes = self.live_bytes + n_bytes
+        if self.budget is not None and live_bytes > self.budget:
+            raise HEMemoryBudgetError(
+                "HE memory budget of {:.1f} MB exceeded: a {:.1f} MB ciphertext at level {} would bring the {} live "
+                "ciphertexts ({:.1f} MB) to {:.1f} MB in phase {}, kernel {}".format(
+                    self.budget / 2 ** 20, n_bytes / 2 ** 20, level, self.live_count, self.live_bytes / 2 ** 20,
+                    live_bytes / 2 ** 20, self.current_phase, self.current_kernel))
+
+    def allocate(self, n_bytes, level):
+        self.check(n_bytes, level)
+        live_bytes = self.live_bytes + n_bytes
+
+        count, level_bytes = self.live.get(level, (0, 0))
+        self.live[level] = (count + 1, level_bytes + n_bytes)
+        self.live_bytes = live_bytes
+        self.allocations += 1
+        self.allocated_bytes += n_bytes
+
+        if live_bytes > self.peak_bytes:
+            self.peak_bytes = live_bytes
+        for scope in self._open:
+            peaks = self.phase_peaks if scope[0] == 'phase' else self.kernel_peaks
+            if live_bytes > peaks[scope[1]]:
+                peaks[scope[1]] = live_bytes
+
+    def release(self, n_bytes, level):
+        count, level_bytes = self.live[level]
+        self.live[level] = (count - 1, level_bytes - n_bytes)
+        self.live_bytes -= n_bytes
+
+    @property
+    def live_count(self):
+        return sum(count for count, _ in self.live.values())
+
+    def _enter(self, scope):
+        peaks = self.phase_peaks if scope[0] == 'phase' else self.kernel_peaks
+        peaks[scope[1]] = max(peaks.get(scope[1], 0), self.live_bytes)
+        self._open.append(scope)
+
+    def _exit(self, scope):
+        self._open.remove(scope)
+
+    def report(self):
+        """Human readable summary of live and peak ciphertext memory."""
+        lines = ['HE ciphertext memory: peak {:.1f} MB, {} live ciphertexts ({:.1f} MB), {} allocations ({:.1f} MB)'
+                 .format(self.peak_bytes / 2 ** 20, self.live_count, self.live_bytes / 2 ** 20, self.allocations,
+                         self.allocated_bytes / 2 ** 20)]
+        for level in sorted(self.live):
+            count, level_bytes = self.live[level]
+            if count:
+                lines.append('  level {:<3} {:>6} ciphertexts {:>10.1f} MB'.format(level, count, level_bytes / 2 ** 20))
+        for title, peaks in (('phase', self.phase_peaks), ('kernel', self.kernel_peaks)):
+            lines.append('  peak by {}:'.format(title))
+            for name in sorted(peaks, key=lambda name: -peaks[name]):
+                lines.append('    {:<32} {:>10.1f} MB'.format(name, peaks[name] / 2 ** 20))
+
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return self.report()
+
+
+class CiphertextPool:
+    """Buffers of the ciphertexts the kernels no longer use, reused as the destination of later encryptions
+
+    A backend hands the ciphertexts released by the kernels (see HEBackend.release) to its pool, and encrypts into a
+    pooled buffer when there is one instead of allocating a new ciphertext, so that the deletion loops, which encrypt
+    and drop the columns of a submatrix on every call, recycle the same buffers. The pool holds at most max_buffers
+    buffers (for_context sizes it from a number of bytes of fresh ciphertexts of a context); further releases are
+    dropped and freed as usual. Each buffer is kept with the memory accounting of its ciphertext, if any.
+
+    Parameters
+    ----------
+    max_buffers : int
+        Largest number of pooled buffers.
+    """
+
+    def __init__(self, max_buffers):
+        self.max_buffers = max_buffers
+        self.buffers = []
+        self.released = 0
+        self.reused = 0
+        self.dropped = 0
+
+    @classmethod
+    def for_context(cls, params, max_bytes):
+        """Pool of at most max_bytes of fresh ciphertexts of the context with the given contextGen parameters."""
+        return cls(max(1, max_bytes // ciphertext_bytes(params)))
+
+    def put(self, raw, accounted=None):
+        """Pools the buffer of a released ciphertext; returns False if the pool is full."""
+        if len(self.buffers) >= self.max_buffers:
+            self.dropped += 1
+            return False
+
+        self.buffers.append((raw, accounted))
+        self.released += 1
+        return True
+
+    def take(self):
+        """Returns a pooled buffer and its accounting, or None if the pool is empty."""
+        if not self.buffers:
+            return None
+
+        self.reused += 1
+        return self.buffers.pop()
+
+    def clear(self):
+        """Drops the pooled buffers and returns them, keeping the statistics."""
+        buffers, self.buffers = self.buffers, []
+
+        return buffers
+
+    def __len__(self):
+        return len(self.buffers)
+
+    def report(self):
+        """Human readable pool statistics."""
+        return 'Ciphertext pool: {} buffers released, {} reused, {} dropped, {} pooled (of {})'.format(
+            self.released, self.reused, self.dropped, len(self), self.max_buffers)
+
+    def __str__(self):
+        return self.report()
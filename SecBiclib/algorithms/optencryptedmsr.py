@@ -1,59 +1,43 @@
-import Pyfhel
-import numpy as np
-import inspect
-src = inspect.getsource(Pyfhel)
+from SecBiclib.algorithms.ciphermatrix import COLUMNS, CipherMatrix, row_chunks
+from SecBiclib.algorithms.heparams import MAX_SLOTS
+from SecBiclib.algorithms.rotations import cumul_add_steps
 
+# Rescales on the longest multiplicative path: means of the sums, squared residues, column MSRs gathered by a mask
+# folding their division; each constant is folded into a single plaintext product, rescaled before the next product
+MULT_DEPTH = 3
 
-def calculate_opt_msr(HE, cipher_data):
-
-    data_size = cipher_data.shape
-    n_elements = data_size[0] * data_size[1]
-    tol = 1e-2
-    decr_round = lambda c: np.round(HE.decrypt(c), int(np.log10(1 / tol)))
-    decr_cols = lambda c_cols: np.round(
-        np.asarray([HE.decrypt(c) for c in c_cols]), int(np.log10(1 / tol))).T
-
-    # encrypt data --> One column per ciphertext
-    c_data = np.array([HE.encrypt(cipher_data[:, i]) for i in range(data_size[1])])
-
-    # sum for each row --> sum all ciphertexts
-    c_row_sum = sum(c_data)
 
-    # sum for each column --> sum all elements on each ciphertext
-    c_col_sum = np.array([HE.cumul_add(c, in_new_ctxt=True) for c in c_data])
+def min_slots(data_shape):
+    """Smallest number of slots needed for data of the given shape (one column per ciphertext, split into row chunks
+    beyond the slots of the largest ring dimension)"""
+    return min(data_shape[0], MAX_SLOTS)
 
-    # sum for all elements --> sum all row/col sums
-    c_all_sum = c_col_sum.sum()
 
-    # Square residues (non-normalized)
-    res = c_data * n_elements - c_row_sum * data_size[0] - c_col_sum * data_size[1] + c_all_sum
-    sq_res = res ** 2
-    for i in range(len(sq_res)):
-        HE.rescale_to_next(sq_res[i])
-        HE.relinearize(sq_res[i])
+def rotation_steps(data_shape, n_slots):
+    """Rotation steps used on data of the given shape (cumul_add only), with their number of uses per call"""
+    return {step: 2 * data_shape[1] + 1 for step in cumul_add_steps(n_slots)}
 
-    c_msr_row_p1 = sum(sq_res) / data_size[1]
-    c_msr_row_p2 = c_msr_row_p1 / n_elements
-    c_msr_row = c_msr_row_p2 / n_elements
-    HE.rescale_to_next(c_msr_row)
-    dec_row_msr = decr_round(c_msr_row)[:data_size[0]]
 
-    c_msr_sum = np.array([HE.cumul_add(c, in_new_ctxt=True) for c in sq_res])
-    c_msr_col_p1 = c_msr_sum / [data_size[0]]
-    c_msr_col_p2 = c_msr_col_p1 / [n_elements]
-    c_msr_col = c_msr_col_p2 / [n_elements]
-    for i in range(len(c_msr_col)):
-        HE.rescale_to_next(c_msr_col[i])
-    dec_col_msr = (decr_cols(c_msr_col)[0][:data_size[1]]).T
-
-    c_msr_p1 = c_msr_sum.sum() / (n_elements)
-    c_msr_p2 = c_msr_p1 / (n_elements)
-    c_msr = c_msr_p2 / (n_elements)
-    HE.rescale_to_next(c_msr)
-    dec_msr = decr_round(c_msr)[0]
-
-    return dec_msr, dec_row_msr, dec_col_msr
+def op_counts(data_shape, n_slots, no_ciphertexts=None):
+    """Number of HE operations of a call on data of the given shape, by profiling.HEProfile operation name, with the
+    columns split into row chunks as by a backend of n_slots slots and the given no_ciphertexts"""
+    n_rows, n_cols = data_shape
+    chunks = row_chunks(n_rows, n_slots, no_ciphertexts)
+    n_chunks = len(chunks)
+    # The column and total means are computed once per distinct chunk length
+    n_lengths = len({stop - start for start, stop in chunks})
 
+    return {'encrypt': n_chunks * n_cols, 'decrypt': n_chunks + 1, 'cumul_add': 2 * n_cols + 1,
+            'add': 4 * n_chunks * n_cols - n_chunks - n_cols - 2, 'sub': n_chunks * (2 * n_cols + 1),
+            'mul_plain': n_chunks + (n_lengths + 1) * n_cols + n_lengths, 'pow': n_chunks * n_cols,
+            'relinearize': n_chunks * n_cols, 'rescale': n_chunks * (n_cols + 1) + n_lengths * (n_cols + 1) + 1}
 
 
+def calculate_opt_msr(HE, cipher_data):
+    """Calculate the mean squared residues of the rows, of the columns and of the full data matrix with one column
+    per ciphertext (or per row chunk of the columns, see ciphermatrix.ChunkedMatrix)"""
+    c_data = CipherMatrix.encrypt(HE, cipher_data, COLUMNS)
+    msr = c_data.msr()
+    c_data.release()
 
+    return msr
@@ -0,0 +1,47 @@
+import math
+from SecBiclib.algorithms.ciphermatrix import PACKED, CipherMatrix, packed_layout as layout
+from SecBiclib.algorithms.rotations import cumul_add_steps
+
+# Rescales on the longest multiplicative path: means (column sums gathered by a plaintext mask folding the division),
+# squared residues, then masked
+MULT_DEPTH = 3
+
+
+def min_slots(data_shape):
+    """Smallest number of slots needed for data of the given shape (one full column per segment)"""
+    return data_shape[0]
+
+
+def rotation_steps(data_shape, n_slots):
+    """Rotation steps used on data of the given shape (sums within a segment, their replication over it and sums
+    across segments), with their number of uses per call; rows beyond the slots are left to optencryptedmsr"""
+    segment, n_segments = layout(min(data_shape[0], n_slots), n_slots)
+    n_ctxts = math.ceil(data_shape[1] / n_segments)
+    steps = {step: 1 for step in cumul_add_steps(n_slots)}
+    steps.update({step: 3 for step in cumul_add_steps(n_slots) if step >= segment})
+    steps.update({step: 2 * n_ctxts for step in cumul_add_steps(segment)})
+    steps.update({-step: n_ctxts for step in cumul_add_steps(segment)})
+
+    return steps
+
+
+def op_counts(data_shape, n_slots):
+    """Number of HE operations of a call on data of the given shape, by profiling.HEProfile operation name"""
+    segment, n_segments = layout(data_shape[0], n_slots)
+    n_ctxts = math.ceil(data_shape[1] / n_segments)
+    in_segment = int(math.log2(segment))
+    across = int(math.log2(n_segments))
+
+    return {'encrypt': n_ctxts, 'decrypt': n_ctxts + 1, 'cumul_add': 1, 'rotate': 3 * n_ctxts * in_segment + 2 * across,
+            'add': 3 * n_ctxts * in_segment + 2 * across + 2 * n_ctxts - 2, 'sub': 2 * n_ctxts + 1,
+            'mul_plain': 2 * n_ctxts + 2, 'pow': n_ctxts, 'relinearize': n_ctxts, 'rescale': 3 * n_ctxts + 2}
+
+
+def calculate_packed_msr(HE, cipher_data):
+    """Calculate the mean squared residues of the rows, of the columns and of the full data matrix with several
+    columns packed side by side in each ciphertext, in segments as short as the number of rows allows"""
+    c_data = CipherMatrix.encrypt(HE, cipher_data, PACKED)
+    msr = c_data.msr()
+    c_data.release()
+
+    return msr
@@ -0,0 +1,65 @@
+"""
+    SecBic-CCA: A Python library of privacy-preserving biclustering algorithm (Cheng and Church) with Homomorphic Encryption
+
+    Copyright (C) 2023  Shokofeh VahidianSadegh
+
+    This file is part of SecBic-CCA.
+
+"""
+
+
+def rotate_and_sum(HE, ctxt, length, step=1):
+    """Sums length slots step apart: slot p receives x[p] + x[p + step] + ... + x[p + (length - 1) * step], the slots
+    being read cyclically. Takes at most 2 * log2(length) rotations, by step times powers of two and by step.
+
+    The window is doubled for each bit of length after the leading one, and extended by one slot when the bit is set:
+    sum(p, 2w) = sum(p, w) + sum(p + w * step, w) and sum(p, w + 1) = x[p] + sum(p + step, w). Each rotation is a new
+    ciphertext the sums are added to in place; ctxt itself is returned for a length of 1."""
+    result = ctxt
+    width = 1
+    for bit in bin(length)[3:]:
+        rotated = HE.rotate(result, width * step, True)
+        rotated += result
+        result = rotated
+        width *= 2
+        if bit == '1':
+            HE.rotate(result, step)
+            result += ctxt
+            width += 1
+
+    return result
+
+
+def replicate(HE, ctxt, length, step=1):
+    """Copies each slot p into the slots p + step, ..., p + (length - 1) * step, which must hold zeros (the other
+    slots add up where the copies overlap)."""
+    return rotate_and_sum(HE, ctxt, length, -step)
+
+
+def segment_sums(HE, ctxt, segment):
+    """Sums of the slots of each segment of the given power of two length, in the first slot of the segment."""
+    return rotate_and_sum(HE, ctxt, segment)
+
+
+def across_segments_sums(HE, ctxt, segment):
+    """Sums of the slots at the same offset of every segment of the given power of two length, in all of them."""
+    return rotate_and_sum(HE, ctxt, HE.get_nSlots() // segment, segment)
+
+
+def rotate_and_sum_steps(length, step=1):
+    """Rotation steps used by rotate_and_sum(length, step), with their number of uses"""
+    steps = {}
+    width = 1
+    for bit in bin(length)[3:]:
+        steps[width * step] = steps.get(width * step, 0) + 1
+        width *= 2
+        if bit == '1':
+            steps[step] = steps.get(step, 0) + 1
+            width += 1
+
+    return steps
+
+
+def rotate_and_sum_count(length):
+    """Number of rotations (and of additions) of rotate_and_sum over length slots"""
+    return sum(rotate_and_sum_steps(length).values())
@@ -0,0 +1,183 @@
+"""
+    SecBic-CCA: A Python library of privacy-preserving biclustering algorithm (Cheng and Church) with Homomorphic Encryption
+
+    Copyright (C) 2023  Shokofeh VahidianSadegh
+
+    This file is part of SecBic-CCA.
+
+"""
+from contextlib import ExitStack, contextmanager, nullcontext
+
+
+class ScopedRecorder:
+    """Base class of the recorders of a secured run, which attribute what they record to the current algorithm phase
+    and kernel function, set with the phase() and kernel() context managers; span() marks other parts of the run for
+    the recorders that time them"""
+
+    def __init__(self):
+        self.current_phase = None
+        self.current_kernel = None
+
+    @contextmanager
+    def phase(self, name):
+        """Attributes what is recorded inside the block to the given algorithm phase."""
+        previous, self.current_phase = self.current_phase, name
+        self._enter(('phase', name))
+        try:
+            yield self
+        finally:
+            self._exit(('phase', name))
+            self.current_phase = previous
+
+    @contextmanager
+    def kernel(self, name):
+        """Attributes what is recorded inside the block to the given kernel function."""
+        previous, self.current_kernel = self.current_kernel, name
+        self._enter(('kernel', name))
+        try:
+            yield self
+        finally:
+            self._exit(('kernel', name))
+            self.current_kernel = previous
+
+    def span(self, name, category='run', **args):
+        return nullcontext(self)
+
+    def _enter(self, scope):
+        pass
+
+    def _exit(self, scope):
+        pass
+
+
+class HEProfile(ScopedRecorder):
+    """Counts and times of the HE primitives of a secured run, per algorithm phase, kernel and operation
+
+    A backend with a profile records every primitive it runs (see HEBackend._apply) under the current phase and
+    kernel. Operations are named after the backend primitives: 'encrypt', 'decrypt', 'rotate', 'cumul_add', 'rescale',
+    'relinearize', 'add', 'sub', 'mul' (ciphertext products), 'pow', 'neg', 'copy', and '<op>_plain' for operations
+    with a plaintext operand.
+
+    Kernels dispatching between implementations record their choices (see record_choice) under the current phase, with
+    the predicted seconds of the implementation chosen. The backend also records the ciphertext allocations it avoided
+    (see record_saving): operations evaluated in place ('in_place') and encryptions into a pooled buffer ('pooled').
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.counts = {}
+        self.seconds = {}
+        self.choices = {}
+        self.savings = {}
+
+    def record(self, op, seconds, count=1):
+        key = (self.current_phase, self.current_kernel, op)
+        self.counts[key] = self.counts.get(key, 0) + count
+        self.seconds[key] = self.seconds.get(key, 0.0) + seconds
+
+    def record_choice(self, dispatcher, choice, predicted_seconds):
+        key = (self.current_phase, dispatcher, choice)
+        count, seconds = self.choices.get(key, (0, 0.0))
+        self.choices[key] = (count + 1, seconds + predicted_seconds)
+
+    def record_saving(self, kind, n_bytes):
+        """Records a ciphertext allocation of n_bytes avoided, of the given kind ('in_place' or 'pooled')."""
+        key = (self.current_phase, self.current_kernel, kind)
+        count, saved_bytes = self.savings.get(key, (0, 0))
+        self.savings[key] = (count + 1, saved_bytes + n_bytes)
+
+    @property
+    def total_count(self):
+        return sum(self.counts.values())
+
+    @property
+    def total_seconds(self):
+        return sum(self.seconds.values())
+
+    def totals(self, by='op'):
+        """Returns {name: (count, seconds)} summed over the other keys, by 'phase', 'kernel' or 'op'."""
+        index = ('phase', 'kernel', 'op').index(by)
+        totals = {}
+        for key, count in self.counts.items():
+            count_sum, seconds_sum = totals.get(key[index], (0, 0.0))
+            totals[key[index]] = (count_sum + count, seconds_sum + self.seconds[key])
+
+        return totals
+
+    def to_dict(self):
+        """Structured profile: one entry per phase, kernel and operation."""
+        return {
+            'total_count': self.total_count,
+            'total_seconds': self.total_seconds,
+            'operations': [{'phase': phase, 'kernel': kernel, 'op': op, 'count': self.counts[(phase, kernel, op)],
+                            'seconds': self.seconds[(phase, kernel, op)]}
+                           for phase, kernel, op in sorted(self.counts, key=str)],
+            'choices': [{'phase': phase, 'dispatcher': dispatcher, 'choice': choice,
+                         'count': self.choices[(phase, dispatcher, choice)][0],
+                         'predicted_seconds': self.choices[(phase, dispatcher, choice)][1]}
+                        for phase, dispatcher, choice in sorted(self.choices, key=str)],
+            'savings': [{'phase': phase, 'kernel': kernel, 'kind': kind,
+                         'count': self.savings[(phase, kernel, kind)][0],
+                         'bytes': self.savings[(phase, kernel, kind)][1]}
+                        for phase, kernel, kind in sorted(self.savings, key=str)],
+        }
+
+    def report(self):
+        """Human readable summary by phase, kernel and operation."""
+        lines = ['HE profile: {} operations, {:.3f} s'.format(self.total_count, self.total_seconds)]
+        for by in ('phase', 'kernel', 'op'):
+            lines.append('  by {}:'.format(by))
+            totals = self.totals(by)
+            for name in sorted(totals, key=lambda name: -totals[name][1]):
+                lines.append('    {:<32} {:>9} {:>12.3f} s'.format(str(name), *totals[name]))
+
+        if self.choices:
+            lines.append('  kernel choices (predicted s):')
+            for phase, dispatcher, choice in sorted(self.choices, key=str):
+                count, seconds = self.choices[(phase, dispatcher, choice)]
+                lines.append('    {:<32} {:>9} {:>12.3f} s'.format('{}: {} -> {}'.format(phase, dispatcher, choice),
+                                                                   count, seconds))
+
+        if self.savings:
+            lines.append('  allocations avoided:')
+            savings = {}
+            for (_, _, kind), (count, saved_bytes) in self.savings.items():
+                total_count, total_bytes = savings.get(kind, (0, 0))
+                savings[kind] = (total_count + count, total_bytes + saved_bytes)
+            for kind in sorted(savings):
+                lines.append('    {:<32} {:>9} {:>12.1f} MB'.format(kind, savings[kind][0], savings[kind][1] / 2 ** 20))
+
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return self.report()
+
+
+@contextmanager
+def phase(name, *recorders):
+    """Enters the phase of every recorder given (None for a disabled one)."""
+    with ExitStack() as stack:
+        for recorder in recorders:
+            if recorder is not None:
+                stack.enter_context(recorder.phase(name))
+        yield
+
+
+@contextmanager
+def span(name, *recorders, **args):
+    """Enters the span of every recorder given (None for a disabled one)."""
+    with ExitStack() as stack:
+        for recorder in recorders:
+            if recorder is not None:
+                stack.enter_context(recorder.span(name, **args))
+        yield
+
+
+@contextmanager
+def kernel(name, *recorders):
+    """Enters the kernel of every recorder given (None for a disabled one)."""
+    with ExitStack() as stack:
+        for recorder in recorders:
+            if recorder is not None:
+                stack.enter_context(recorder.kernel(name))
+        yield
@@ -0,0 +1,188 @@
+"""
+    SecBic-CCA: A Python library of privacy-preserving biclustering algorithm (Cheng and Church) with Homomorphic Encryption
+
+    Copyright (C) 2023  Shokofeh VahidianSadegh
+
+    This file is part of SecBic-CCA.
+
+"""
+from collections import deque
+import math
+
+# Keys a plan generates by default besides the powers of two, for the steps that save the most rotations
+HOT_KEYS = 4
+
+
+def cumul_add_steps(n_slots):
+    """Rotation steps used by Pyfhel's cumul_add over all the slots (powers of two)"""
+    return {2 ** i for i in range(int(math.log2(n_slots)))}
+
+
+def merge_steps(*step_uses):
+    """Adds up the uses per call of rotation steps given as dictionaries."""
+    merged = {}
+    for uses in step_uses:
+        for step, count in uses.items():
+            merged[step] = merged.get(step, 0) + count
+
+    return merged
+
+
+def galois_key_bytes(n, n_primes):
+    """Size in bytes of one Galois (rotation) key: one key-switching ciphertext per data prime, each made of two
+    polynomials over all the primes of the chain"""
+    return (n_primes - 1) * 2 * n_primes * n * 8
+
+
+class RotationPlan:
+    """Rotation steps of a secured run and the subset of them that gets a Galois key.
+
+    The positive powers of two always get a key: cumul_add uses them, and every other step can be built from them. A
+    step the kernels use at least min_uses times per call gets its own key too, one at a time the step saving the most
+    key switches per call given the keys chosen so far (negative steps, whose decomposition into positive powers of two
+    is the longest, usually come first), as long as the plan stays within max_keys (by default the powers of two plus
+    HOT_KEYS steps, well below the full key set). Steps without a key are decomposed into the shortest sequence of
+    keyed steps, one key switch each: key_switches() gives their number, which the backends count as rotations.
+
+    Parameters
+    ----------
+    n_slots : int
+        Number of slots of a ciphertext.
+
+    required_steps : dict
+        Rotation steps used by the kernels of the run, mapped to their number of uses per kernel call.
+
+    n_primes : int, default: None
+        Number of primes in the modulus chain, used to report key memory.
+
+    max_keys : int, default: None
+        Largest number of keys to generate. If None, the number of powers of two plus HOT_KEYS.
+
+    min_uses : int, default: 2
+        Smallest number of uses per call for a step to get its own key.
+    """
+
+    def __init__(self, n_slots, required_steps, n_primes=None, max_keys=None, min_uses=2):
+        self.n_slots = n_slots
+        self.n_primes = n_primes
+
+        uses = {}
+        for step, count in required_steps.items():
+            if step % n_slots != 0:
+                uses[step % n_slots] = uses.get(step % n_slots, 0) + count
+        self.required_steps = sorted(uses)
+
+        self.uses = uses
+
+        basis = cumul_add_steps(n_slots)
+        self.max_keys = len(basis) + HOT_KEYS if max_keys is None else max_keys
+        self.key_steps = sorted(basis)
+        self._paths = None
+        hot = [step for step in self.required_steps if step not in basis and uses[step] >= min_uses]
+        for _ in range(self.max_keys - len(basis)):
+            saved = {step: uses[step] * (self.key_switches(step) - 1) for step in hot if step not in self.key_steps}
+            if not saved or max(saved.values()) <= 0:
+                break
+            self.key_steps = sorted(self.key_steps + [min(saved, key=lambda step: (-saved[step], step))])
+            self._paths = None
+
+    @classmethod
+    def for_kernels(cls, kernels, data_shape, n_slots, n_primes=None, max_keys=None):
+        """Builds the plan for the rotation steps the kernels use on data of the given shape (uses per call of a step
+        are those of the kernel using it most)."""
+        steps = {}
+        for kernel in kernels:
+            for step, count in kernel.rotation_steps(data_shape, n_slots).items():
+                steps[step] = max(steps.get(step, 0), count)
+
+        return cls(n_slots, steps, n_primes, max_keys)
+
+    @property
+    def full_key_count(self):
+        """Number of keys generated by rotateKeyGen() without steps: both directions of every power of two, plus the
+        conjugation key"""
+        return 2 * int(math.log2(self.n_slots)) + 1
+
+    @property
+    def signed_key_steps(self):
+        """Key steps as signed rotations in (-n_slots / 2, n_slots / 2], as passed to rotateKeyGen."""
+        half = self.n_slots // 2
+        return [step - self.n_slots if step > half else step for step in self.key_steps]
+
+    def decompose(self, step):
+        """Returns the shortest list of keyed steps whose rotations add up to the given step."""
+        step %= self.n_slots
+        if step == 0:
+            return []
+
+        if self._paths is None:
+            self._paths = self._shortest_paths()
+
+        path = []
+        while step != 0:
+            key_step = self._paths[step]
+            path.append(key_step)
+            step = (step - key_step) % self.n_slots
+
+        return path
+
+    def key_switches(self, step):
+        """Number of key switches (rotations by a keyed step) of a rotation by the given step."""
+        return len(self.decompose(step))
+
+    @property
+    def mean_key_switches(self):
+        """Mean number of key switches of a rotation by the required steps, weighted by their uses per call."""
+        n_uses = sum(self.uses.values())
+        if n_uses == 0:
+            return 1.0
+
+        return sum(count * self.key_switches(step) for step, count in self.uses.items()) / n_uses
+
+    def _shortest_paths(self):
+        """Breadth-first search over the step residues, recording the last keyed step of a shortest path to each."""
+        last_step = [None] * self.n_slots
+        last_step[0] = 0
+        queue = deque([0])
+
+        while queue:
+            reached = queue.popleft()
+            for key_step in self.key_steps:
+                step = (reached + key_step) % self.n_slots
+                if last_step[step] is None:
+                    last_step[step] = key_step
+                    queue.append(step)
+
+        return last_step
+
+    def key_bytes(self, n_keys):
+        if self.n_primes is None:
+            return None
+
+        return n_keys * galois_key_bytes(2 * self.n_slots, self.n_primes)
+
+    @property
+    def saved_bytes(self):
+        """Key memory saved with respect to the full key set."""
+        if self.n_primes is None:
+            return None
+
+        return self.key_bytes(self.full_key_count) - self.key_bytes(len(self.key_steps))
+
+    def report(self):
+        """Human readable summary of the plan."""
+        composed = [step for step in self.required_steps if step not in set(self.key_steps)]
+        lines = [
+            'Rotation plan',
+            '  rotation keys      : {} of {} in the full set'.format(len(self.key_steps), self.full_key_count),
+            '  required steps     : {} ({} built from other keys)'.format(len(self.required_steps), len(composed)),
+            '  key switches       : {:.2f} per rotation'.format(self.mean_key_switches),
+        ]
+        if self.n_primes is not None:
+            lines.append('  key memory         : {:.1f} MB ({:.1f} MB saved)'.format(
+                self.key_bytes(len(self.key_steps)) / 2 ** 20, self.saved_bytes / 2 ** 20))
+
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return self.report()
@@ -7,12 +7,22 @@
 
 """
 from SecBiclib.algorithms import optencryptedmsrow
-from SecBiclib.algorithms import encryptedmsr, encryptedmsrow, encryptedmsrcol
+from SecBiclib.algorithms import encryptedmsr, encryptedmsrow, encryptedmsrcol, intencryptedmsr, maskedmsr
 from SecBiclib.algorithms._base import BaseBiclusteringAlgorithm
+from SecBiclib.algorithms.callbacks import ProgressMonitor, StopRun
+from SecBiclib.algorithms.ciphercache import CiphertextCache
+from SecBiclib.algorithms.backends import CountingBackend, HEBackend, PyfhelBackend, SimulatedBackend
+from SecBiclib.algorithms.costmodel import CostModel
+from SecBiclib.algorithms.dryrun import EXACT_PLAIN_KERNELS, MASKED_PLAIN_KERNELS, PLAIN_KERNELS, ExplainPlan
+from SecBiclib.algorithms.hesession import DEFAULT_CKKS_PARAMS, SessionGroup, SessionRouter, check_depth, get_session
+from SecBiclib.algorithms.heparams import plan_bfv_parameters, plan_ckks_parameters
+from SecBiclib.algorithms.memory import MemoryTracker
+from SecBiclib.algorithms.profiling import HEProfile, phase, span
+from SecBiclib.algorithms.rotations import RotationPlan
+from SecBiclib.algorithms.tracing import Tracer
 from SecBiclib.models import Bicluster, Biclustering
-from sklearn.utils.validation import check_array
-from Pyfhel import Pyfhel
 import numpy as np
+import time
 
 
 
@@ -35,14 +45,147 @@ class SecuredChengChurchAlgorithm(BaseBiclusteringAlgorithm):
 
     data_min_cols : int, default: 100
         Minimum number of dataset columns required to perform multiple column deletion.
+
+    he_session : SecBiclib.algorithms.hesession.HESession or SecBiclib.algorithms.backends.HEBackend, default: None
+        Homomorphic Encryption session providing the context and keys, or backend to run the kernels on. If None, the
+        session shared in-process for the default CKKS parameters (and key_dir) is used.
+
+    key_dir : str, default: None
+        Directory of the key store where the context and keys are saved and loaded back on later runs. Ignored if
+        he_session is given.
+
+    he_params : dict or str, default: None
+        Keyword arguments of Pyfhel.contextGen. If 'auto', the smallest CKKS parameters fitting the data shape, value
+        range and MSR kernels are chosen by heparams.plan_ckks_parameters and the plan is kept in he_plan. If None,
+        the default CKKS parameters are used. Ignored if he_session is given.
+
+    rotation_keys : str, default: 'targeted'
+        If 'targeted', Galois keys are only generated for the rotation steps the kernels use on the data shape (see
+        rotations.RotationPlan, kept in rotation_plan with the key memory it saved); other steps are built from them.
+        If 'full', the full set of rotation keys is generated. Ignored if he_session is given.
+
+    precision_mode : str, default: 'single'
+        If 'two_tier', a second, low precision HE context ranks rows and columns (argmax and multiple deletion
+        comparisons, node addition) and the precise context only settles msr <= msr_threshold decisions whose ranking
+        estimate lies within ranking_margin of the threshold. The usage of each context is kept in precision_usage.
+        If 'single', one context does everything.
+
+    ranking_params : dict, default: None
+        Keyword arguments of Pyfhel.contextGen for the ranking context of the 'two_tier' mode. If None, they are
+        planned with ranking_precision_bits fractional bits.
+
+    ranking_precision_bits : int, default: 4
+        Fractional bits targeted by the planned ranking context.
+
+    ranking_margin : float, default: 0.05
+        Relative distance to msr_threshold below which the ranking MSR is confirmed on the precise context.
+
+    scheme : str, default: 'CKKS'
+        If 'BFV', the exact integer kernels of intencryptedmsr compute the MSRs of the (integer) data without
+        approximation error, on BFV contexts planned by heparams.plan_bfv_parameters (plan kept in he_plan) and
+        combined with the Chinese Remainder Theorem when one plaintext modulus is too small. he_params, rotation_keys
+        and precision_mode do not apply. If 'CKKS', the approximate CKKS kernels are used.
+
+    backend : str, default: 'pyfhel'
+        If 'simulated', the kernels run on backends.SimulatedBackend, a NumPy plaintext simulation with the slots,
+        rotations and levels of the same parameters: nothing is encrypted, for profiling and large-scale tests only.
+        If 'pyfhel', they run on Pyfhel. Ignored if he_session is given.
+
+    profile : bool, default: False
+        If True, every HE operation is counted and timed per algorithm phase, kernel function and operation type, and
+        the profiling.HEProfile is returned in the profile attribute of the Biclustering. If False, nothing is recorded.
+
+    track_memory : bool, default: False
+        If True, live ciphertexts are accounted per level, with their peak memory per phase and kernel function, in a
+        memory.MemoryTracker kept in memory_usage.
+
+    memory_budget : int, default: None
+        Largest number of bytes of live ciphertexts allowed. A run exceeding it stops with an HEMemoryBudgetError
+        naming the phase and kernel. Implies track_memory.
+
+    trace : bool or str, default: False
+        If True, the run is recorded as nested spans (run, bicluster, phase, kernel call, batch of HE primitives) in a
+        tracing.Tracer kept in tracer, whose save() writes Chrome trace JSON for Perfetto. If a path, the trace is also
+        written there at the end of the run. If False, nothing is recorded.
+
+    execution : str, default: 'per_call'
+        If 'encrypt_once', the data matrix is encrypted once per run (one full column per ciphertext, see
+        maskedmsr.EncryptedMatrix) and the kernels of maskedmsr select the rows and columns of the bicluster with
+        plaintext masks, the numbers of rows and columns being public. After each bicluster, only the columns whose
+        values were masked are encrypted again. The rows of the data must fit in the slots of a
+        ciphertext, and the scheme must be 'CKKS'. If 'per_call', every kernel call encrypts its submatrix.
+
+    callbacks : list, default: None
+        Callables called with a callbacks.IterationEvent (phase, row and column counts, MSR, elapsed time and HE
+        operations so far) after every deletion and addition iteration and every bicluster found. A callback returning
+        True stops the run, which returns the biclusters completed so far. HE operations are counted whenever callbacks
+        are given.
+
+    cache_bytes : int, default: None
+        If given, the column-per-ciphertext kernels (optencryptedmsr, optencryptedmsrcol, optencryptedmsrow) take the
+        ciphertexts of the columns they encrypt from a least recently used ciphertext cache of at most that many bytes
+        in all, shared by the HE contexts (see ciphercache.CiphertextCache), so that the columns of a submatrix seen by
+        an earlier call are not encrypted again. The cache adds up to cache_bytes to the peak memory of the run. It is
+        kept in cache_usage for its statistics and emptied at the end of the run. If None, every call encrypts its
+        columns.
+
+    no_ciphertexts : int, default: None
+        Least number of ciphertexts the rows of each column are split into by the column-per-ciphertext kernels (see
+        ciphermatrix.ChunkedMatrix), whose partial sums are added up homomorphically. Columns taller than the slots of
+        a ciphertext are split into as many row chunks as needed anyway, so that any number of rows can be processed.
+        If None, each column takes as few ciphertexts as the slots allow.
     """
 
+    # MSR kernels used by run(), so that the parameter planner can size the modulus chain and slots
+    kernels = (encryptedmsr, encryptedmsrcol, optencryptedmsrow)
+    int_kernels = (intencryptedmsr,)
+
+    # MSR kernels of the 'encrypt_once' execution, their MSR, column addition and row addition kernels
+    masked_kernels = (maskedmsr,)
+    masked_kernel_functions = (maskedmsr.calculate_masked_msr, maskedmsr.calculate_masked_msr_col_addition,
+                               maskedmsr.calculate_masked_msr_row_addition)
+
+    # MSR, column addition and row addition kernels of each scheme
+    scheme_kernels = {
+        'CKKS': (encryptedmsr.calculate_msr, encryptedmsrcol.calculate_msr_col_addition,
+                 optencryptedmsrow.calculate_opt_msr_row_addition),
+        'BFV': (intencryptedmsr.calculate_int_msr, intencryptedmsr.calculate_int_msr_col_addition,
+                intencryptedmsr.calculate_int_msr_row_addition),
+    }
+
     def __init__(self, num_biclusters=5, msr_threshold=300, multiple_node_deletion_threshold=1.2,
-                 data_min_cols=100):
+                 data_min_cols=100, he_session=None, key_dir=None, he_params=None, rotation_keys='targeted',
+                 precision_mode='single', ranking_params=None, ranking_precision_bits=4, ranking_margin=0.05,
+                 scheme='CKKS', backend='pyfhel', profile=False, track_memory=False, memory_budget=None, trace=False,
+                 execution='per_call', callbacks=None, cache_bytes=None, no_ciphertexts=None):
         self.num_biclusters = num_biclusters
         self.msr_threshold = msr_threshold
         self.multiple_node_deletion_threshold = multiple_node_deletion_threshold
         self.data_min_cols = data_min_cols
+        self.he_session = he_session
+        self.key_dir = key_dir
+        self.he_params = he_params
+        self.rotation_keys = rotation_keys
+        self.precision_mode = precision_mode
+        self.ranking_params = ranking_params
+        self.ranking_precision_bits = ranking_precision_bits
+        self.ranking_margin = ranking_margin
+        self.scheme = scheme
+        self.backend = backend
+        self.profile = profile
+        self.track_memory = track_memory
+        self.memory_budget = memory_budget
+        self.trace = trace
+        self.execution = execution
+        self.callbacks = callbacks
+        self.cache_bytes = cache_bytes
+        self.no_ciphertexts = no_ciphertexts
+        self.he_plan = None
+        self.rotation_plan = None
+        self.precision_usage = None
+        self.memory_usage = None
+        self.tracer = None
+        self.cache_usage = None
 
     def run(self, data):
         """Compute biclustering.
@@ -51,36 +194,114 @@ class SecuredChengChurchAlgorithm(BaseBiclusteringAlgorithm):
         ----------
         data : numpy.ndarray
         """
-        # Creating empty Pyfhel object
-        HE = Pyfhel()
-        ckks_params = {
-            'scheme': 'CKKS',
-            'n': 2 ** 14,
-            'scale': 2 ** 30,
-            'qi_sizes': [60] + 10 * [30] + [60]
-        }
-        HE.contextGen(**ckks_params)  # Generate context for ckks scheme
-        HE.keyGen()  # Key Generation: generates a pair of public/secret keys
-        HE.rotateKeyGen()  # Rotation values in the vector
-        HE.relinKeyGen()  # Relinearization key generation
+        from sklearn.utils.validation import check_array
+        self._validate_parameters()
+
+        # Context and key generation (or loading from the key store) starts first and runs in the background while the
+        # data is converted and validated and the run is set up, as the parameters only depend on the shape and range
+        # of the data. Data they cannot be planned for is left for check_array to report.
+        try:
+            sessions = self._get_sessions(np.asarray(data)).start()
+        except (TypeError, ValueError):
+            sessions = None
 
+        data = check_array(data, dtype=int, copy=True)
+        if sessions is None:
+            sessions = self._get_sessions(data).start()
+
+        profile = HEProfile() if self.profile or self.callbacks else None
+        memory = MemoryTracker(self.memory_budget) if self.track_memory or self.memory_budget is not None else None
+        tracer = Tracer() if self.trace else None
+        with span('run', tracer, shape=data.shape, scheme=self.scheme):
+            t0 = time.perf_counter()
+            with span('key_setup', tracer):
+                HE = sessions.wait().record_with(profile, memory, tracer)
+            self.precision_usage = HE
+            self.memory_usage = memory
+            self.tracer = tracer
+            if profile is not None:
+                with profile.phase('setup'):
+                    profile.record('key_setup', time.perf_counter() - t0)
+
+            self.cache_usage = self._set_caches(HE, self.cache_bytes)
+            self._set_row_chunks(HE)
+            progress = ProgressMonitor(self.callbacks, profile)
+            try:
+                biclusters = self._find_biclusters(data, HE, progress, profile, memory, tracer)
+            finally:
+                self._set_caches(HE, None)
+                for purpose in HE.PURPOSES:
+                    HE.session(purpose).clear_pool()
+                # Frees the matrix encrypted once, so that no ciphertext outlives the run
+                self._matrix = None
+                self._progress = None
+
+        if isinstance(self.trace, str):
+            tracer.save(self.trace)
+
+        return Biclustering(biclusters, profile if self.profile else None)
+
+    def explain(self, data, cost_model=None):
+        """Dry run: predicts the cost of run(data) without encrypting.
+
+        The deletion and addition loops run on plaintext MSRs, and every kernel call is recorded with its submatrix
+        shapes and turned into predicted HE operation counts, time and peak memory (see dryrun.ExplainPlan).
+
+        Parameters
+        ----------
+        data : numpy.ndarray
+
+        cost_model : SecBiclib.algorithms.costmodel.CostModel, default: None
+            Seconds per HE operation. If None, it is calibrated on the local machine with the HE context the run
+            would use (whose keys are kept for the run).
+        """
+        from sklearn.utils.validation import check_array
         data = check_array(data, dtype=int, copy=True)
         self._validate_parameters()
 
+        if cost_model is None:
+            cost_model = CostModel.calibrate(self._get_sessions(data).session('threshold'))
+
+        if self.execution == 'encrypt_once':
+            plain_kernels = MASKED_PLAIN_KERNELS
+        else:
+            plain_kernels = EXACT_PLAIN_KERNELS if self.scheme == 'BFV' else PLAIN_KERNELS
+        sessions = self._set_row_chunks(self._get_sessions(data, 'counting'))
+        plan = ExplainPlan(sessions, self._kernel_functions(), cost_model, plain_kernels)
+        try:
+            plan.biclustering = Biclustering(self._find_biclusters(data, plan, ProgressMonitor(self.callbacks), plan))
+        finally:
+            self._matrix = None
+            self._progress = None
+
+        return plan
+
+    def _find_biclusters(self, data, HE, progress, *recorders):
+        """Runs the deletion and addition steps for each bicluster with the kernels routed by HE, reporting to the
+        progress monitor, in the phases of the recorders given."""
         num_rows, num_cols = data.shape
         min_value = np.min(data)
         max_value = np.max(data)
-
         msr_thr = self.msr_threshold
 
         biclusters = []
+        self._progress = progress
+        self._matrix = maskedmsr.EncryptedMatrix(data) if self.execution == 'encrypt_once' else None
         for i in range(self.num_biclusters):
             rows = np.ones(num_rows, dtype=bool)
             cols = np.ones(num_cols, dtype=bool)
-
-            self._multiple_node_deletion(data, rows, cols, msr_thr, HE)
-            self._single_node_deletion(data, rows, cols, msr_thr, HE)
-            self._node_addition(data, rows, cols, HE)
+            progress.new_bicluster(i)
+
+            try:
+                with span('bicluster {}'.format(i), *recorders, index=i):
+                    with phase('multiple_node_deletion', *recorders):
+                        self._multiple_node_deletion(data, rows, cols, msr_thr, HE)
+                    with phase('single_node_deletion', *recorders):
+                        self._single_node_deletion(data, rows, cols, msr_thr, HE)
+                    with phase('node_addition', *recorders):
+                        self._node_addition(data, rows, cols, HE)
+            except StopRun:
+                break
 
             row_indices = np.nonzero(rows)[0]
             col_indices = np.nonzero(cols)[0]
@@ -94,18 +315,131 @@ class SecuredChengChurchAlgorithm(BaseBiclusteringAlgorithm):
                 data[row_indices[:, np.newaxis], col_indices] = np.random.uniform(low=min_value, high=max_value,
                                                                                   size=bicluster_shape)
 
+                # only the ciphertexts of the masked columns change in the encrypted matrix
+                if self._matrix is not None:
+                    with phase('masking', *recorders):
+                        self._matrix.refresh(col_indices)
+
             biclusters.append(Bicluster(row_indices, col_indices))
 
-        return Biclustering(biclusters)
+            try:
+                progress.completed(len(biclusters), rows, cols)
+            except StopRun:
+                break
+
+        return biclusters
+
+    def _set_caches(self, HE, max_bytes):
+        """Empties the ciphertext caches of the sessions of the router and gives them a new cache of max_bytes in all
+        (none if None). Returns the cache of each purpose."""
+        cache = None if max_bytes is None else CiphertextCache(max_bytes)
+        usage = {}
+        for purpose in HE.PURPOSES:
+            session = HE.session(purpose)
+            if getattr(session, 'cache', None) is not None:
+                session.cache.clear()
+            session.cache = usage[purpose] = cache
+
+        return usage if max_bytes is not None else None
+
+    def _set_row_chunks(self, HE):
+        """Sets the least number of row chunks of the columns on the sessions of the router, and returns it."""
+        for purpose in HE.PURPOSES:
+            HE.session(purpose).no_ciphertexts = self.no_ciphertexts
+
+        return HE
+
+    def _get_sessions(self, data, backend=None):
+        """Returns the router over the HE backend(s) for the configured (or planned) parameters, of the configured kind
+        unless another backend kind is given."""
+        backend = self.backend if backend is None else backend
+        if self.he_session is not None:
+            session = self.he_session if isinstance(self.he_session, HEBackend) else PyfhelBackend(self.he_session)
+            if backend == 'counting':
+                session = CountingBackend(session.params)
+        elif self.scheme == 'BFV':
+            self.he_plan = plan_bfv_parameters(data.shape, (np.min(data), np.max(data)), self.int_kernels)
+            return SessionRouter(SessionGroup([self._get_backend(data, params, backend)
+                                               for params in self.he_plan.params]))
+        else:
+            params = DEFAULT_CKKS_PARAMS if self.he_params is None else self.he_params
+            if isinstance(params, str) and params == 'auto':
+                self.he_plan = plan_ckks_parameters(data.shape, (np.min(data), np.max(data)),
+                                                    self._kernel_modules())
+                params = self.he_plan.params
+
+            session = self._get_backend(data, params, backend)
+            self.rotation_plan = session.rotation_plan
+
+        if self.precision_mode == 'single':
+            return SessionRouter(session)
+
+        ranking_params = self.ranking_params
+        if ranking_params is None:
+            ranking_params = plan_ckks_parameters(data.shape, (np.min(data), np.max(data)), self._kernel_modules(),
+                                                  precision_bits=self.ranking_precision_bits).params
+
+        return SessionRouter(self._get_backend(data, ranking_params, backend), session)
+
+    def _get_backend(self, data, params, backend):
+        """Returns a backend of the given kind ('pyfhel', 'simulated' or 'counting') for the parameters."""
+        if backend in ('simulated', 'counting'):
+            check_depth(params, self._kernel_modules())
+            # Rotations are counted in key switches of the rotation keys a Pyfhel session would get
+            session = SimulatedBackend(params) if backend == 'simulated' else CountingBackend(params)
+            session.rotation_plan = self._get_rotation_plan(data, params)
+            return session
+
+        return PyfhelBackend(get_session(params, self.key_dir, self._get_rotation_plan(data, params),
+                                         self._kernel_modules()))
+
+    def _get_rotation_plan(self, data, params):
+        """Returns the plan of targeted rotation keys for the parameters, or None for the full set of keys."""
+        if self.rotation_keys != 'targeted' or params['scheme'].upper() != 'CKKS':
+            return None
+
+        n_primes = len(params['qi_sizes']) if 'qi_sizes' in params else None
+        return RotationPlan.for_kernels(self._kernel_modules(), data.shape, params['n'] // 2, n_primes)
+
+    def _kernel_modules(self):
+        """Kernel modules of the run, for parameter and rotation key planning."""
+        return self.masked_kernels if self.execution == 'encrypt_once' else self.kernels
+
+    def _kernel_functions(self):
+        """MSR, column addition and row addition kernels of the run."""
+        if self.execution == 'encrypt_once':
+            return self.masked_kernel_functions
+
+        return self.scheme_kernels[self.scheme]
+
+    def _kernel_args(self, data, rows, cols, *views):
+        """Arguments of the kernels for the bicluster: the encrypted matrix and the masks when encrypting once, else
+        the submatrix followed by the given views of the data."""
+        if self.execution == 'encrypt_once':
+            return self._matrix, rows, cols
+
+        return (data[rows][:, cols],) + views
+
+    def _calculate_msr(self, data, rows, cols, HE):
+        """Calculates the MSRs of the submatrix on the ranking context."""
+        return HE.run('ranking', self._kernel_functions()[0], *self._kernel_args(data, rows, cols))
+
+    def _above_threshold(self, msr, data, rows, cols, msr_thr, HE):
+        """Decides msr > msr_thr, confirming the ranking MSR on the precise context when it is too close to call."""
+        if HE.two_tier and abs(msr - msr_thr) <= self.ranking_margin * msr_thr:
+            msr = HE.run('threshold', self._kernel_functions()[0], *self._kernel_args(data, rows, cols))[0]
+
+        return msr > msr_thr
 
     def _single_node_deletion(self, data, rows, cols, msr_thr, HE):
         """Performs the single row/column deletion step (this is a direct implementation of the Algorithm 1 described in
         the original paper)"""
-        msr, row_msr, col_msr = encryptedmsr.calculate_msr(HE, data[rows][:, cols])
+        msr, row_msr, col_msr = self._calculate_msr(data, rows, cols, HE)
 
-        while msr > msr_thr:
+        while self._above_threshold(msr, data, rows, cols, msr_thr, HE):
             self._single_deletion(data, rows, cols, row_msr, col_msr)
-            msr, row_msr, col_msr = encryptedmsr.calculate_msr(HE, data[rows][:, cols])
+            msr, row_msr, col_msr = self._calculate_msr(data, rows, cols, HE)
+            self._progress.iteration('single_node_deletion', rows, cols, msr)
 
     def _single_deletion(self, data, rows, cols, row_msr, col_msr):
         """Deletes a row or column from the bicluster being computed."""
@@ -125,9 +459,9 @@ class SecuredChengChurchAlgorithm(BaseBiclusteringAlgorithm):
     def _multiple_node_deletion(self, data, rows, cols, msr_thr, HE):
         """Performs the multiple row/column deletion step (this is a direct implementation of the Algorithm 2 described in
         the original paper)"""
-        msr, row_msr, col_msr = encryptedmsr.calculate_msr(HE, data[rows][:, cols])
+        msr, row_msr, col_msr = self._calculate_msr(data, rows, cols, HE)
 
-        stop = True if msr <= msr_thr else False
+        stop = not self._above_threshold(msr, data, rows, cols, msr_thr, HE)
 
         while not stop:
             cols_old = np.copy(cols)
@@ -138,40 +472,46 @@ class SecuredChengChurchAlgorithm(BaseBiclusteringAlgorithm):
             rows[rows2remove] = False
 
             if len(cols) >= self.data_min_cols:
-                msr, row_msr, col_msr = encryptedmsr.calculate_msr(HE, data[rows][:, cols])
+                msr, row_msr, col_msr = self._calculate_msr(data, rows, cols, HE)
                 col_indices = np.nonzero(cols)[0]
                 cols2remove = col_indices[np.where(col_msr > self.multiple_node_deletion_threshold * msr)]
                 cols[cols2remove] = False
 
-            msr, row_msr, col_msr = encryptedmsr.calculate_msr(HE, data[rows][:, cols])
+            msr, row_msr, col_msr = self._calculate_msr(data, rows, cols, HE)
 
             # Tests if the new MSR value is smaller than the acceptable MSR threshold.
             # Tests if no rows and no columns were removed during this iteration.
             # If one of the conditions is true the loop must stop, otherwise it will become an infinite loop.
-            if msr <= msr_thr or (np.all(rows == rows_old) and np.all(cols == cols_old)):
+            if (np.all(rows == rows_old) and np.all(cols == cols_old)) or \
+                    not self._above_threshold(msr, data, rows, cols, msr_thr, HE):
                 stop = True
+            self._progress.iteration('multiple_node_deletion', rows, cols, msr)
 
     def _node_addition(self, data, rows, cols, HE):
         """Performs the row/column addition step (this is a direct implementation of the Algorithm 3 described in
         the original paper)"""
 
+        _, msr_col_addition, msr_row_addition = self._kernel_functions()
+
         stop = False
         while not stop:
             cols_old = np.copy(cols)
             rows_old = np.copy(rows)
 
-            msr, _, _ = encryptedmsr.calculate_msr(HE, data[rows][:, cols])
-            col_msr = encryptedmsrcol.calculate_msr_col_addition(HE, data[rows][:, cols], data[rows])
+            msr, _, _ = self._calculate_msr(data, rows, cols, HE)
+            col_msr = HE.run('ranking', msr_col_addition, *self._kernel_args(data, rows, cols, data[rows]))
             cols2add = np.where(col_msr <= msr)[0]
             cols[cols2add] = True
 
-            msr, _, _ = encryptedmsr.calculate_msr(HE, data[rows][:, cols])
-            row_msr, row_inverse_msr = optencryptedmsrow.calculate_opt_msr_row_addition(HE, data[rows][:, cols], data[:, cols])
+            msr, _, _ = self._calculate_msr(data, rows, cols, HE)
+            row_msr, row_inverse_msr = HE.run('ranking', msr_row_addition, *self._kernel_args(data, rows, cols,
+                                                                                              data[:, cols]))
             rows2add = np.where(np.logical_or(row_msr <= msr, row_inverse_msr <= msr))[0]
             rows[rows2add] = True
 
             if np.all(rows == rows_old) and np.all(cols == cols_old):
                 stop = True
+            self._progress.iteration('node_addition', rows, cols, msr)
 
 
     def _validate_parameters(self):
@@ -187,4 +527,41 @@ class SecuredChengChurchAlgorithm(BaseBiclusteringAlgorithm):
                 "multiple_node_deletion_threshold must be >= 1.0, got {}".format(self.multiple_node_deletion_threshold))
 
         if self.data_min_cols < 100:
-            raise ValueError("data_min_cols must be >= 100, got {}".format(self.data_min_cols))
\ No newline at end of file
+            raise ValueError("data_min_cols must be >= 100, got {}".format(self.data_min_cols))
+
+        if self.he_params is not None and self.he_params != 'auto' and not isinstance(self.he_params, dict):
+            raise ValueError("he_params must be None, 'auto' or a dict, got {}".format(self.he_params))
+
+        if self.rotation_keys not in ('targeted', 'full'):
+            raise ValueError("rotation_keys must be 'targeted' or 'full', got {}".format(self.rotation_keys))
+
+        if self.precision_mode not in ('single', 'two_tier'):
+            raise ValueError("precision_mode must be 'single' or 'two_tier', got {}".format(self.precision_mode))
+
+        if self.ranking_margin < 0.0:
+            raise ValueError("ranking_margin must be >= 0.0, got {}".format(self.ranking_margin))
+
+        if self.scheme not in self.scheme_kernels:
+            raise ValueError("scheme must be one of {}, got {}".format(sorted(self.scheme_kernels), self.scheme))
+
+        if self.memory_budget is not None and self.memory_budget <= 0:
+            raise ValueError("memory_budget must be None or > 0, got {}".format(self.memory_budget))
+
+        if self.backend not in ('pyfhel', 'simulated'):
+            raise ValueError("backend must be 'pyfhel' or 'simulated', got {}".format(self.backend))
+
+        if self.scheme == 'BFV' and self.precision_mode != 'single':
+            raise ValueError("precision_mode must be 'single' with the BFV scheme, got {}".format(self.precision_mode))
+
+        if self.cache_bytes is not None and self.cache_bytes <= 0:
+            raise ValueError("cache_bytes must be > 0 or None, got {}".format(self.cache_bytes))
+
+        if self.no_ciphertexts is not None and self.no_ciphertexts <= 0:
+            raise ValueError("no_ciphertexts must be > 0 or None, got {}".format(self.no_ciphertexts))
+
+        if self.execution not in ('per_call', 'encrypt_once'):
+            raise ValueError("execution must be 'per_call' or 'encrypt_once', got {}".format(self.execution))
+
+        if self.execution == 'encrypt_once' and self.scheme != 'CKKS':
+            raise ValueError("execution must be 'per_call' with the {} scheme, got {}".format(self.scheme,
+                                                                                           self.execution))
\ No newline at end of file
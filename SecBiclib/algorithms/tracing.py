@@ -0,0 +1,101 @@
+"""
+    SecBic-CCA: A Python library of privacy-preserving biclustering algorithm (Cheng and Church) with Homomorphic Encryption
+
+    Copyright (C) 2023  Shokofeh VahidianSadegh
+
+    This file is part of SecBic-CCA.
+
+"""
+from contextlib import contextmanager
+import json
+import os
+import threading
+import time
+from SecBiclib.algorithms.profiling import ScopedRecorder
+
+
+class Tracer(ScopedRecorder):
+    """Timeline of a secured run as nested spans, exportable to the Chrome trace event format
+
+    Spans nest as run > bicluster > phase > kernel call > HE primitive batch: the run and bicluster spans are opened
+    with span(), the phase and kernel spans by the phase() and kernel() scopes of the recorder, and a backend with a
+    tracer reports each primitive it runs (see HEBackend._apply), consecutive primitives of the same operation being
+    merged into one batch span. Kernels can attach details to their span with annotate(). The trace saved by save()
+    opens in Perfetto (ui.perfetto.dev) or chrome://tracing.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.events = []
+        self._origin = time.perf_counter()
+        self._stack = []
+        self._batch = None
+
+    @contextmanager
+    def span(self, name, category='run', **args):
+        """Records the block as a span, with the given arguments shown in the trace viewer."""
+        self._begin(name, category, args)
+        try:
+            yield self
+        finally:
+            self._end()
+
+    def add_span(self, name, start, end, category='run', **args):
+        """Records a span from perf_counter times measured elsewhere."""
+        self._complete(name, category, start, end, args)
+
+    def record(self, op, start, end):
+        """Records an HE primitive run between the given perf_counter times."""
+        if self._batch is not None and self._batch[0] == op:
+            self._batch[2] = end
+            self._batch[3] += 1
+        else:
+            self._flush()
+            self._batch = [op, start, end, 1]
+
+    def annotate(self, **args):
+        """Adds arguments to the innermost open span."""
+        if self._stack:
+            self._stack[-1][3].update(args)
+
+    def _enter(self, scope):
+        self._begin(scope[1], scope[0], {})
+
+    def _exit(self, scope):
+        self._end()
+
+    def _begin(self, name, category, args):
+        self._flush()
+        self._stack.append((name, category, time.perf_counter(), dict(args)))
+
+    def _end(self):
+        self._flush()
+        name, category, start, args = self._stack.pop()
+        self._complete(name, category, start, time.perf_counter(), args)
+
+    def _flush(self):
+        if self._batch is not None:
+            op, start, end, count = self._batch
+            self._batch = None
+            self._complete(op, 'he', start, end, {'count': count})
+
+    def _complete(self, name, category, start, end, args):
+        self.events.append({'name': name, 'cat': category, 'ph': 'X', 'ts': (start - self._origin) * 1e6,
+                            'dur': (end - start) * 1e6, 'pid': os.getpid(), 'tid': threading.get_ident(),
+                            'args': args})
+
+    def to_dict(self):
+        self._flush()
+        return {'traceEvents': sorted(self.events, key=lambda event: event['ts']), 'displayTimeUnit': 'ms'}
+
+    def save(self, path):
+        """Writes the trace as Chrome trace event JSON."""
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, default=str)
+
+
+def annotate(HE, **args):
+    """Adds arguments to the current span of the backend's tracer, if tracing."""
+    tracer = getattr(HE, 'tracer', None)
+    if tracer is not None:
+        tracer.annotate(**args)
@@ -9,7 +9,6 @@
 
 from os.path import dirname, join
 import numpy as np
-import pandas as pd
 
 def load_yeast_tavazoie():
     """Load and return the yeast dataset (Tavazoie et al., 2000) used in the original biclustering study
@@ -23,6 +22,8 @@ def load_yeast_tavazoie():
     Tavazoie, S., Hughes, J. D., Campbell, M. J., Cho, R. J., & Church, G. M. (1999). Systematic determination of genetic
     network architecture. Nature genetics, 22(3), 281-285.
     """
+    import pandas as pd
+
     module_dir = dirname(__file__)
     data = np.loadtxt(join(module_dir, 'data', 'yeast_tavazoie', 'yeast_tavazoie.txt'), dtype=np.double)
     genes = np.loadtxt(join(module_dir, 'data', 'yeast_tavazoie', 'genes_yeast_tavazoie.txt'), dtype=str)
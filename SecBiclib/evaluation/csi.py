@@ -8,7 +8,6 @@
 """
 
 import numpy as np
-from scipy import sparse as sp
 from .check import check_biclusterings
 
 
@@ -91,6 +90,7 @@ def _biclustering_to_soft_clustering(biclustering, num_rows, num_cols):
 
 def _calculate_association(clustering, num_rows, num_cols, sparse):
     if sparse:
+        from scipy import sparse as sp
         association = sp.dok_matrix((len(clustering), num_rows * num_cols), dtype=np.int)
     else:
         association = np.zeros((len(clustering), num_rows * num_cols), dtype=np.int)
@@ -127,5 +127,6 @@ def _calculate_disagreements(predicted_coassociation, reference_coassociation, p
 
 def _triu(a, sparse):
     if sparse:
+        from scipy import sparse as sp
         return sp.triu(a, k=1)
     return np.triu(a, k=1)
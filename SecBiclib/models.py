@@ -79,13 +79,18 @@ class Biclustering:
     ----------
     biclusters : list
         A list of instances from the Bicluster class.
+
+    profile : SecBiclib.algorithms.profiling.HEProfile, default: None
+        Homomorphic Encryption operation profile of the run that computed the biclustering, if it was profiled.
     """
 
-    def __init__(self, biclusters):
+    def __init__(self, biclusters, profile=None):
         if all(isinstance(b, Bicluster) for b in biclusters):
             self.biclusters = biclusters
         else:
             raise ValueError("biclusters list contains an element that is not a Bicluster instance")
 
+        self.profile = profile
+
     def __str__(self):
         return '\n'.join(str(b) for b in self.biclusters)
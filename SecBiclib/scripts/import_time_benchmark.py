@@ -0,0 +1,36 @@
+import subprocess
+import sys
+import numpy as np
+
+# each statement runs in a fresh interpreter, so that nothing is imported beforehand
+statements = (
+    'import numpy',
+    'import SecBiclib',
+    'from SecBiclib.algorithms import ChengChurchAlgorithm',
+    'from SecBiclib.datasets import load_yeast_tavazoie',
+    'from SecBiclib.evaluation import clustering_error, csi',
+    'from SecBiclib.algorithms import SecuredChengChurchAlgorithm',
+)
+
+# dependencies that should only be loaded by the code that needs them
+heavy_modules = ('Pyfhel', 'sklearn', 'pandas', 'scipy')
+
+probe = '''
+import sys, time
+t0 = time.perf_counter()
+{}
+print(time.perf_counter() - t0)
+print(' '.join(name for name in {!r} if name in sys.modules))
+'''
+
+repeats = 5
+
+for statement in statements:
+    seconds = []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, '-c', probe.format(statement, heavy_modules)], capture_output=True,
+                                text=True, check=True).stdout.splitlines()
+        seconds.append(float(output[0]))
+    loaded = output[1] if len(output) > 1 and output[1] else '-'
+
+    print("{:<62} {:>8.1f} ms   loads: {}".format(statement, np.median(seconds) * 1000, loaded))
@@ -0,0 +1,45 @@
+import time
+import numpy as np
+from SecBiclib.algorithms import ChengChurchAlgorithm, encryptedmsr, intencryptedmsr
+from SecBiclib.algorithms.backends import PyfhelBackend
+from SecBiclib.algorithms.heparams import plan_bfv_parameters, plan_ckks_parameters
+from SecBiclib.algorithms.hesession import SessionGroup, get_session, get_session_group
+from SecBiclib.datasets import load_yeast_tavazoie, synthetic
+
+# load yeast data used in the original Cheng and Church's paper
+yeast = load_yeast_tavazoie().values
+
+# missing value imputation suggested by Cheng and Church
+missing = np.where(yeast < 0.0)
+yeast[missing] = np.random.randint(low=0, high=800, size=len(missing[0]))
+
+# constant bicluster model, scaled to integers with two decimals
+const_data, _ = synthetic.make_const_data()
+const_data = np.round(const_data * 100).astype(int)
+
+cca = ChengChurchAlgorithm()
+
+for name, data in (('yeast', yeast.astype(int)), ('synthetic', const_data)):
+    value_range = (np.min(data), np.max(data))
+    ckks_plan = plan_ckks_parameters(data.shape, value_range, (encryptedmsr,))
+    bfv_plan = plan_bfv_parameters(data.shape, value_range, (intencryptedmsr,))
+    ckks = PyfhelBackend(get_session(ckks_plan.params)).wait()
+    bfv = SessionGroup([PyfhelBackend(session) for session in get_session_group(bfv_plan.params)]).wait()
+
+    for n_rows in (100, 500, data.shape[0]):
+        rows = np.zeros(data.shape[0], dtype=bool)
+        rows[:n_rows] = True
+        cols = np.ones(data.shape[1], dtype=bool)
+        sub_data = data[rows][:, cols]
+        expected = cca._calculate_msr(data, rows, cols)
+
+        for scheme, kernel, HE in (('CKKS', encryptedmsr.calculate_msr, ckks),
+                                   ('BFV', intencryptedmsr.calculate_int_msr, bfv)):
+            m0 = time.perf_counter()
+            msr, row_msr, col_msr = kernel(HE, sub_data)
+            m1 = time.perf_counter()
+
+            error = max(abs(msr - expected[0]), np.max(np.abs(row_msr - expected[1])),
+                        np.max(np.abs(col_msr - expected[2])))
+            print("{:<9} {:>5}x{:<3} {:<4} {:>10.3f} s   max abs error {:.3e}".format(
+                name, n_rows, data.shape[1], scheme, m1 - m0, error))
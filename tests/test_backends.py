@@ -0,0 +1,160 @@
+import numpy as np
+import pytest
+
+from SecBiclib.algorithms.backends import PyfhelBackend, SimulatedBackend
+from SecBiclib.algorithms.profiling import HEProfile
+from SecBiclib.algorithms.secca import SecuredChengChurchAlgorithm
+
+
+class RawCiphertext:
+    """Stand-in for a Pyfhel PyCtxt, over a ciphertext of the simulation backend"""
+
+    def __init__(self, simulation, raw):
+        self.simulation = simulation
+        self.raw = raw
+
+    @property
+    def mod_level(self):
+        return self.raw.level
+
+    @property
+    def scale(self):
+        return self.raw.scale_bits
+
+    @property
+    def size(self):
+        return self.raw.size
+
+    def copy(self):
+        return RawCiphertext(self.simulation, self.simulation._copy(self.raw))
+
+    def _apply(self, op, other):
+        return getattr(self.simulation, op)(self.raw, other.raw if isinstance(other, RawCiphertext) else other)
+
+    def _inplace(self, op, other):
+        self.raw = self._apply(op, other)
+        return self
+
+    def __add__(self, other):
+        return RawCiphertext(self.simulation, self._apply('_add', other))
+
+    def __sub__(self, other):
+        return RawCiphertext(self.simulation, self._apply('_sub', other))
+
+    def __mul__(self, other):
+        return RawCiphertext(self.simulation, self._apply('_mul', other))
+
+    def __pow__(self, exponent):
+        return RawCiphertext(self.simulation, self._apply('_pow', exponent))
+
+    def __neg__(self):
+        return RawCiphertext(self.simulation, self.simulation._neg(self.raw))
+
+    def __iadd__(self, other):
+        return self._inplace('_add', other)
+
+    def __isub__(self, other):
+        return self._inplace('_sub', other)
+
+    def __imul__(self, other):
+        return self._inplace('_mul', other)
+
+    def __ipow__(self, exponent):
+        return self._inplace('_pow', exponent)
+
+
+class RawPyfhel:
+    """Stand-in for a CKKS Pyfhel object passed as he_session: the Pyfhel API, without the params of an HE session"""
+
+    def __init__(self):
+        self.simulation = SimulatedBackend()
+
+    def get_nSlots(self):
+        return self.simulation.get_nSlots()
+
+    def encrypt(self, values, ctxt=None):
+        raw = self.simulation._encrypt(values)
+        if ctxt is None:
+            return RawCiphertext(self.simulation, raw)
+
+        ctxt.raw = raw
+        return ctxt
+
+    def decrypt(self, ctxt):
+        return self.simulation._decrypt(ctxt.raw)
+
+    def encodeFrac(self, values, scale=None):
+        return self.simulation._encode(values, 0, scale)
+
+    def mod_switch_to_next(self, ptxt):
+        ptxt.level += 1
+
+    def _result(self, ctxt, raw, in_new_ctxt):
+        if in_new_ctxt:
+            return RawCiphertext(self.simulation, raw)
+
+        ctxt.raw = raw
+        return ctxt
+
+    def rotate(self, ctxt, k, in_new_ctxt=False):
+        return self._result(ctxt, self.simulation._rotate(ctxt.raw, k), in_new_ctxt)
+
+    def cumul_add(self, ctxt, in_new_ctxt=True):
+        return self._result(ctxt, self.simulation._cumul_add(ctxt.raw), in_new_ctxt)
+
+    def rescale_to_next(self, ctxt):
+        ctxt.raw = self.simulation._rescale(ctxt.raw)
+
+    def relinearize(self, ctxt):
+        ctxt.raw = self.simulation._relinearize(ctxt.raw)
+
+
+def test_in_place_operations_without_context_parameters():
+    HE = PyfhelBackend(RawPyfhel())
+    HE.profile = HEProfile()
+    ctxt = HE.encrypt(np.arange(4.0))
+    ctxt *= 2.0
+    ctxt += ctxt
+
+    assert HE.params is None
+    assert HE.profile.savings == {}
+    assert np.allclose(HE.decrypt(ctxt)[:4], 4 * np.arange(4.0), atol=1e-3)
+
+
+@pytest.mark.parametrize('he_session', [RawPyfhel, lambda: pytest.importorskip('Pyfhel').Pyfhel()])
+def test_run_with_a_pyfhel_object_as_he_session(he_session):
+    session = he_session()
+    if not isinstance(session, RawPyfhel):
+        session.contextGen(scheme='CKKS', n=2 ** 14, scale=2 ** 30, qi_sizes=[60] + 4 * [30] + [60])
+        session.keyGen()
+        session.rotateKeyGen()
+        session.relinKeyGen()
+    data = np.random.RandomState(0).randint(0, 100, (40, 6))
+
+    biclustering = SecuredChengChurchAlgorithm(num_biclusters=1, msr_threshold=300, he_session=session,
+                                               profile=True).run(data)
+
+    assert len(biclustering.biclusters) == 1
+
+
+def test_context_usage_report_without_context_parameters():
+    data = np.random.RandomState(0).randint(0, 100, (40, 6))
+    secca = SecuredChengChurchAlgorithm(num_biclusters=1, msr_threshold=300, he_session=RawPyfhel())
+    secca.run(data)
+
+    assert 'n=2^?' in secca.precision_usage.report()
+
+
+def test_released_ciphertexts_are_reused_by_later_encryptions():
+    HE = SimulatedBackend()
+    HE.profile = HEProfile()
+    first = HE.encrypt(np.arange(10.0))
+
+    HE.release(first)
+    assert first.raw is None and len(HE.pool.buffers) == 1
+    second = HE.encrypt(np.arange(10.0, 20.0))
+
+    assert not HE.pool.buffers
+    assert (HE.pool.released, HE.pool.reused) == (1, 1)
+    assert HE.profile.savings[(None, None, 'pooled')][0] == 1
+    np.testing.assert_allclose(HE.decrypt(second)[:10], np.arange(10.0, 20.0), atol=1e-3)
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from SecBiclib.algorithms import intencryptedmsr
+from SecBiclib.algorithms.backends import SimulatedBackend
+from SecBiclib.algorithms.heparams import plan_bfv_parameters
+from SecBiclib.algorithms.hesession import SessionGroup
+from SecBiclib.algorithms.secca import SecuredChengChurchAlgorithm
+
+
+def test_bfv_run_on_simulated_backend():
+    data = np.random.RandomState(1).randint(0, 100, (40, 6))
+    secca = SecuredChengChurchAlgorithm(num_biclusters=2, msr_threshold=300, scheme='BFV', backend='simulated')
+
+    biclustering = secca.run(data)
+
+    assert len(biclustering.biclusters) == 2
+    assert len(secca.he_plan.params) >= 1
+
+
+
+def test_int_msr_kernels_are_exact():
+    data = np.random.RandomState(2).randint(-50, 1000, (25, 7))
+    plan = plan_bfv_parameters(data.shape, (data.min(), data.max()), (intencryptedmsr,))
+    HE = SessionGroup([SimulatedBackend(params) for params in plan.params])
+
+    residues = data - data.mean(axis=1)[:, np.newaxis] - data.mean(axis=0) + data.mean()
+    msr, row_msr, col_msr = intencryptedmsr.calculate_int_msr(HE, data)
+
+    assert msr == pytest.approx(np.mean(residues ** 2), rel=1e-12)
+    assert np.allclose(row_msr, np.mean(residues ** 2, axis=1), rtol=1e-12, atol=0)
+    assert np.allclose(col_msr, np.mean(residues ** 2, axis=0), rtol=1e-12, atol=0)
+
+
+def test_session_group_clears_the_pool_of_every_session():
+    group = SessionGroup([SimulatedBackend({'scheme': 'BFV', 'n': 2 ** 13, 't': t}) for t in (65537, 114689)])
+    for session in group:
+        session.release(session.encrypt(np.arange(4)))
+        assert len(session.pool.buffers) == 1
+
+    group.clear_pool()
+
+    assert all(len(session.pool.buffers) == 0 for session in group)
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from SecBiclib.algorithms.cca import ChengChurchAlgorithm
+from SecBiclib.algorithms.secca import SecuredChengChurchAlgorithm
+
+PHASES = ['multiple_node_deletion', 'single_node_deletion', 'node_addition', 'bicluster']
+
+
+def algorithm(secured, **options):
+    if secured:
+        return SecuredChengChurchAlgorithm(msr_threshold=300, backend='simulated', **options)
+    return ChengChurchAlgorithm(msr_threshold=300, **options)
+
+
+@pytest.mark.parametrize('secured', [False, True])
+def test_callbacks_follow_the_phases_of_each_bicluster(secured):
+    events = []
+    data = np.random.RandomState(0).uniform(0, 100, (120, 12))
+    biclustering = algorithm(secured, num_biclusters=2, callbacks=[events.append]).run(data)
+
+    assert [event.phase for event in events].count('bicluster') == len(biclustering.biclusters) == 2
+    for index in range(2):
+        bicluster_events = [event for event in events if event.bicluster == index]
+        phases = [PHASES.index(event.phase) for event in bicluster_events]
+        assert phases == sorted(phases) and phases[-1] == 3
+        for phase in PHASES[:3]:
+            iterations = [event.iteration for event in bicluster_events if event.phase == phase]
+            assert iterations == list(range(1, len(iterations) + 1))
+
+    elapsed = [event.elapsed for event in events]
+    assert elapsed == sorted(elapsed)
+    operations = [event.he_operations for event in events]
+    if secured:
+        assert operations == sorted(operations) and operations[-1] > 0
+    else:
+        assert operations == [None] * len(events)
+
+
+@pytest.mark.parametrize('secured', [False, True])
+def test_callback_returning_true_stops_the_run(secured):
+    data = np.random.RandomState(0).uniform(0, 100, (120, 12))
+
+    def stop_after_first(event):
+        return event.phase == 'bicluster'
+
+    biclustering = algorithm(secured, num_biclusters=3, callbacks=[stop_after_first]).run(data)
+
+    assert len(biclustering.biclusters) == 1
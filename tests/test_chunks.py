@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from SecBiclib.algorithms import optencryptedmsr, optencryptedmsrcol, optencryptedmsrow
+from SecBiclib.algorithms.backends import SimulatedBackend
+from SecBiclib.algorithms.ciphermatrix import COLUMNS, ChunkedMatrix, CipherMatrix, row_chunks
+from SecBiclib.algorithms.dryrun import plain_msr, plain_msr_col_addition, plain_msr_row_addition
+from SecBiclib.algorithms.hesession import DEFAULT_CKKS_PARAMS
+from SecBiclib.algorithms.secca import SecuredChengChurchAlgorithm
+
+
+def small_backend(no_ciphertexts=None):
+    HE = SimulatedBackend(dict(DEFAULT_CKKS_PARAMS, n=2 ** 10))
+    HE.no_ciphertexts = no_ciphertexts
+    return HE
+
+
+def assert_msrs_close(plain, decrypted):
+    plain = plain if isinstance(plain, tuple) else (plain,)
+    decrypted = decrypted if isinstance(decrypted, tuple) else (decrypted,)
+    for plain_msr, msr in zip(plain, decrypted):
+        assert np.shape(plain_msr) == np.shape(msr)
+        assert np.allclose(plain_msr, msr, atol=0.011)
+
+
+def test_row_chunks_cover_the_rows_in_as_few_chunks_as_fit():
+    assert row_chunks(1300, 512) == [(0, 434), (434, 868), (868, 1300)]
+    assert row_chunks(100, 512, 3) == [(0, 34), (34, 68), (68, 100)]
+    assert row_chunks(2, 512, 5) == [(0, 1), (1, 2)]
+
+
+@pytest.mark.parametrize('n_rows, no_ciphertexts', [(1300, None), (200, 3)])
+def test_kernels_on_row_chunks_match_the_plaintext_msrs(n_rows, no_ciphertexts):
+    HE = small_backend(no_ciphertexts)
+    data = np.random.RandomState(0).uniform(0, 100, (n_rows, 6))
+    assert isinstance(CipherMatrix.encrypt(HE, data, COLUMNS), ChunkedMatrix)
+
+    assert_msrs_close(plain_msr(data), optencryptedmsr.calculate_opt_msr(HE, data))
+    assert_msrs_close(plain_msr_col_addition(data[:150, :4], data[:150]),
+                      optencryptedmsrcol.calculate_opt_msr_col_addition(HE, data[:150, :4], data[:150]))
+    assert_msrs_close(plain_msr_row_addition(data[:150, :4], data[:, :4]),
+                      optencryptedmsrow.calculate_opt_msr_row_addition(HE, data[:150, :4], data[:, :4]))
+
+
+def test_run_splits_the_columns_into_no_ciphertexts():
+    data = np.random.RandomState(0).uniform(0, 100, (120, 12))
+    results = []
+    for no_ciphertexts in (None, 3):
+        np.random.seed(0)
+        secca = SecuredChengChurchAlgorithm(num_biclusters=2, msr_threshold=300, backend='simulated',
+                                            no_ciphertexts=no_ciphertexts)
+        results.append([(len(b.rows), len(b.cols)) for b in secca.run(data).biclusters])
+
+    assert results[0] == results[1]
@@ -0,0 +1,50 @@
+import numpy as np
+
+from SecBiclib.algorithms.backends import SimulatedBackend
+from SecBiclib.algorithms.ciphercache import CiphertextCache
+from SecBiclib.algorithms.secca import SecuredChengChurchAlgorithm
+
+
+def test_cache_evicts_the_least_recently_used_columns_within_its_bytes():
+    HE = SimulatedBackend()
+    columns = np.random.RandomState(0).uniform(0, 100, (3, 50))
+    n_bytes = HE.ciphertext_bytes(HE.encrypt(columns[0]))
+    cache = CiphertextCache(2 * n_bytes)
+
+    first = cache.encrypt(HE, columns[0])
+    cache.encrypt(HE, columns[1])
+    assert cache.encrypt(HE, columns[0]) is first
+    cache.encrypt(HE, columns[2])
+
+    assert cache.n_bytes <= cache.max_bytes
+    assert (cache.hits, cache.misses, cache.evictions) == (1, 3, 1)
+    assert cache.encrypt(HE, columns[0]) is first
+    np.testing.assert_allclose(HE.decrypt(first)[:50], columns[0], atol=1e-3)
+
+
+def test_backends_share_the_bytes_of_one_cache():
+    backends = SimulatedBackend(), SimulatedBackend()
+    column = np.arange(50, dtype=float)
+    cache = CiphertextCache(2 * backends[0].ciphertext_bytes(backends[0].encrypt(column)))
+
+    ctxts = [cache.encrypt(HE, column) for HE in backends]
+
+    assert ctxts[0] is not ctxts[1]
+    assert len(cache) == 2
+    cache.encrypt(SimulatedBackend(), column)
+    assert len(cache) == 2 and cache.evictions == 1
+
+
+def test_run_caches_columns_within_cache_bytes_in_all():
+    data = np.random.RandomState(0).uniform(0, 100, (200, 12))
+    cache_bytes = 2 ** 23
+    peaks = []
+    for options in ({}, {'cache_bytes': cache_bytes}):
+        secca = SecuredChengChurchAlgorithm(num_biclusters=1, msr_threshold=300, backend='simulated',
+                                            precision_mode='two_tier', track_memory=True, **options)
+        secca.run(data)
+        peaks.append(secca.memory_usage.peak_bytes)
+
+    assert secca.cache_usage['ranking'] is secca.cache_usage['threshold']
+    assert secca.cache_usage['ranking'].hits > 0
+    assert peaks[1] - peaks[0] <= cache_bytes
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from SecBiclib.algorithms.backends import SimulatedBackend
+from SecBiclib.algorithms.ciphercache import CiphertextCache
+from SecBiclib.algorithms.ciphermatrix import COLUMNS, LAYOUTS, CipherMatrix
+from SecBiclib.algorithms.dryrun import plain_msr
+from SecBiclib.algorithms.profiling import HEProfile
+
+
+def decryptions(HE):
+    return HE.profile.totals('op').get('decrypt', (0, 0.0))[0]
+
+
+def test_masked_column_means_are_gathered_into_one_decryption():
+    data = np.random.RandomState(0).randint(0, 100, (50, 30)).astype(float)
+    HE = SimulatedBackend()
+    rows = np.zeros(HE.get_nSlots(), dtype=bool)
+    rows[[1, 4, 9, 16, 25, 36, 49]] = True
+    c_columns = [HE.encrypt(data[:, j]) for j in range(data.shape[1])]
+    HE.profile = HEProfile()
+
+    means = CipherMatrix.masked(HE, c_columns, rows).decrypt_col_means()
+
+    assert decryptions(HE) == 1
+    assert np.allclose(means, data[rows[:50]].mean(axis=0), atol=0.01)
+
+
+@pytest.mark.parametrize('layout', LAYOUTS)
+def test_msr_matches_the_plaintext_msr_in_every_layout(layout):
+    data = np.random.RandomState(0).uniform(0, 100, (40, 7))
+    HE = SimulatedBackend()
+
+    c_data = CipherMatrix.encrypt(HE, data, layout)
+    assert c_data.layout == layout and c_data.shape == data.shape
+
+    for plain, msr in zip(plain_msr(data), c_data.msr()):
+        assert np.shape(plain) == np.shape(msr)
+        assert np.allclose(plain, msr, atol=0.011)
+
+
+def test_msr_leaves_the_cached_columns_unchanged():
+    data = np.random.RandomState(0).uniform(0, 100, (40, 7))
+    HE = SimulatedBackend()
+    HE.cache = CiphertextCache(2 ** 30)
+
+    c_data = CipherMatrix.encrypt(HE, data, COLUMNS)
+    c_data.msr()
+    c_data.release()
+
+    again = CipherMatrix.encrypt(HE, data, COLUMNS)
+    assert HE.cache.hits == data.shape[1]
+    for j, c in enumerate(again.ctxts):
+        np.testing.assert_allclose(HE.decrypt(c)[:40], data[:, j], atol=1e-3)
+
+
+def test_unknown_layout_is_rejected():
+    with pytest.raises(ValueError, match='layout must be one of'):
+        CipherMatrix(SimulatedBackend(), [], (1, 1), 'diagonal')
+
+
+@pytest.mark.parametrize('layout', LAYOUTS)
+@pytest.mark.parametrize('n_cols', [5, 20])
+def test_column_means_take_one_decryption_whatever_the_number_of_columns(layout, n_cols):
+    data = np.random.RandomState(0).uniform(0, 100, (40, n_cols))
+    HE = SimulatedBackend()
+    c_data = CipherMatrix.encrypt(HE, data, layout)
+    HE.profile = HEProfile()
+
+    means = c_data.decrypt_col_means()
+
+    assert decryptions(HE) == 1
+    assert np.allclose(means, data.mean(axis=0), atol=0.011)
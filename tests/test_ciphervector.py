@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from SecBiclib.algorithms import encryptedmsrow
+from SecBiclib.algorithms.backends import SimulatedBackend
+from SecBiclib.algorithms.ciphervector import CipherVector
+from SecBiclib.algorithms.dryrun import plain_msr_row_addition
+from SecBiclib.algorithms.hesession import DEFAULT_CKKS_PARAMS
+from SecBiclib.algorithms.profiling import HEProfile
+
+
+def small_backend():
+    HE = SimulatedBackend(dict(DEFAULT_CKKS_PARAMS, n=2 ** 10))
+    HE.profile = HEProfile()
+    return HE
+
+
+@pytest.mark.parametrize('width', [None, 100])
+@pytest.mark.parametrize('k', [0, 1, -1, 37, 511, 512, 700, -900, 1999])
+def test_rotate_matches_np_roll_with_a_bounded_number_of_rotations(width, k):
+    HE = small_backend()
+    values = np.random.RandomState(0).uniform(-10, 10, 1300)
+    vector = CipherVector.encrypt(HE, values, width)
+    n_rotations = HE.profile.totals().get('rotate', (0, 0.0))[0]
+
+    rotated = vector.rotate(k)
+
+    np.testing.assert_allclose(rotated.decrypt(), np.roll(values, -k), atol=1e-3)
+    n_rotations = HE.profile.totals().get('rotate', (0, 0.0))[0] - n_rotations
+    assert n_rotations <= (2 if width is None else 4) * len(vector.ctxts)
+
+
+def test_row_addition_over_several_ciphertexts_matches_the_plaintext_msrs():
+    HE = small_backend()
+    data = np.random.RandomState(1).uniform(0, 100, (300, 6))
+    bicluster = data[:80, :4]
+
+    row_msr, row_inverse_msr = encryptedmsrow.calculate_msr_row_addition(HE, bicluster, data[:, :4])
+
+    plain_row_msr, plain_row_inverse_msr = plain_msr_row_addition(bicluster, data[:, :4], decimals=None)
+    np.testing.assert_allclose(row_msr, plain_row_msr, atol=0.01)
+    np.testing.assert_allclose(row_inverse_msr, plain_row_inverse_msr, atol=0.01)
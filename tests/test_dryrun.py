@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from SecBiclib.algorithms.backends import SimulatedBackend
+from SecBiclib.algorithms.costmodel import CostModel
+from SecBiclib.algorithms.dryrun import PLAIN_KERNELS
+from SecBiclib.algorithms.secca import SecuredChengChurchAlgorithm
+
+
+def shapes(biclustering):
+    return [(len(b.rows), len(b.cols)) for b in biclustering.biclusters]
+
+
+@pytest.mark.parametrize('options', [{}, {'execution': 'encrypt_once'}, {'scheme': 'BFV'}])
+def test_explain_finds_the_biclusters_of_the_run(options):
+    data = np.random.RandomState(1).randint(0, 100, (120, 12))
+    secca = SecuredChengChurchAlgorithm(num_biclusters=3, msr_threshold=300, backend='simulated', **options)
+
+    np.random.seed(1)
+    plan = secca.explain(data, CostModel({}))
+    np.random.seed(1)
+    biclustering = secca.run(data)
+
+    assert shapes(plan.biclustering) == shapes(biclustering)
+    for planned, found in zip(plan.biclustering.biclusters, biclustering.biclusters):
+        assert np.array_equal(planned.rows, found.rows) and np.array_equal(planned.cols, found.cols)
+
+
+
+def as_tuple(results):
+    return results if isinstance(results, tuple) else (results,)
+
+
+@pytest.mark.parametrize('index, args', [(0, lambda data: (data,)),
+                                         (1, lambda data: (data[:, :4], data)),
+                                         (2, lambda data: (data[:10], data))])
+def test_plain_kernels_round_like_the_ckks_kernels(index, args):
+    data = np.random.RandomState(2).randint(0, 100, (30, 6)).astype(float)
+    plain = as_tuple(PLAIN_KERNELS[index](*args(data)))
+    decrypted = as_tuple(SecuredChengChurchAlgorithm.scheme_kernels['CKKS'][index](SimulatedBackend(), *args(data)))
+
+    for plain_msr, msr in zip(plain, decrypted):
+        assert np.allclose(plain_msr, msr, atol=0.011)
+    # The MSR of the MSR kernel is the mean of the rounded column MSRs
+    for plain_msr in plain[1:] if index == 0 else plain:
+        assert np.array_equal(plain_msr, np.round(plain_msr, 2))
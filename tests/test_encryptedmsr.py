@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from SecBiclib.algorithms import encryptedmsr
+from SecBiclib.algorithms.backends import SimulatedBackend
+from SecBiclib.algorithms.costmodel import CostModel
+from SecBiclib.algorithms.dryrun import plain_msr
+from SecBiclib.algorithms.profiling import HEProfile
+
+
+def backend(op_seconds):
+    HE = SimulatedBackend()
+    HE.cost_model = CostModel(op_seconds)
+    return HE
+
+
+@pytest.mark.parametrize('op_seconds, choice', [({'rotate': 1.0}, 'calculate_opt_msr'),
+                                                ({'encrypt': 1.0, 'rotate': 0.01}, 'calculate_single_msr')])
+def test_dispatcher_picks_the_kernel_the_cost_model_predicts_fastest(op_seconds, choice):
+    name, _, _ = encryptedmsr.choose_kernel(backend(op_seconds), (40, 6))
+
+    assert name == choice
+
+
+def test_dispatcher_only_picks_the_single_ciphertext_kernel_for_data_fitting_the_slots():
+    HE = backend({'encrypt': 1.0})
+    name, _, _ = encryptedmsr.choose_kernel(HE, (HE.n_slots, 6))
+
+    assert name != 'calculate_single_msr'
+
+
+@pytest.mark.parametrize('op_seconds', [{'rotate': 1.0}, {'encrypt': 1.0}])
+def test_dispatched_msr_matches_the_plaintext_msr_and_records_the_choice(op_seconds):
+    HE = backend(op_seconds)
+    HE.profile = HEProfile()
+    data = np.random.RandomState(0).uniform(0, 100, (40, 6))
+
+    for plain, msr in zip(plain_msr(data), encryptedmsr.calculate_msr(HE, data)):
+        assert np.allclose(plain, msr, atol=0.011)
+
+    name, _, predicted_seconds = encryptedmsr.choose_kernel(HE, data.shape)
+    assert HE.profile.choices == {(None, 'calculate_msr', name): (1, predicted_seconds)}
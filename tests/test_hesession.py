@@ -0,0 +1,146 @@
+import os
+import stat
+import sys
+import threading
+import types
+
+import numpy as np
+import pytest
+
+from SecBiclib.algorithms.hesession import DEFAULT_CKKS_PARAMS, HESession
+from SecBiclib.algorithms.rotations import RotationPlan
+from SecBiclib.algorithms.secca import SecuredChengChurchAlgorithm
+
+
+class FakePyfhel:
+    """Pyfhel without targeted rotation keys, saving empty key files"""
+
+    def __init__(self):
+        self.rotations = []
+
+    def contextGen(self, **params):
+        pass
+
+    def keyGen(self):
+        pass
+
+    def relinKeyGen(self):
+        pass
+
+    def rotateKeyGen(self, **kwargs):
+        if kwargs:
+            raise TypeError("rotateKeyGen() got an unexpected keyword argument 'rot_steps'")
+
+    def rotate(self, ctxt, k, in_new_ctxt=False):
+        self.rotations.append(k)
+
+    def __getattr__(self, name):
+        if name.startswith('save_'):
+            return lambda path: open(path, 'w').close()
+        if name.startswith('load_'):
+            return lambda path: None
+        raise AttributeError(name)
+
+
+@pytest.fixture
+def fake_pyfhel(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'Pyfhel', types.SimpleNamespace(Pyfhel=FakePyfhel))
+
+
+def test_full_key_fallback_keeps_the_plan_and_the_store_entry(fake_pyfhel, tmp_path):
+    plan = RotationPlan(2 ** 13, {3: 4, 5: 4}, n_primes=6)
+    session = HESession(key_dir=str(tmp_path), rotation_plan=plan)
+    path = session.path
+    HE = session.get()
+
+    assert session.full_rotation_keys
+    assert session.rotation_plan is plan
+    assert session.path == path
+    assert HESession._in_store(path)
+
+    session.rotate(None, 3)
+    assert HE.rotations == [3]
+
+    reloaded = HESession(key_dir=str(tmp_path), rotation_plan=plan).wait()
+    assert reloaded.loaded_from_store
+    assert reloaded.full_rotation_keys
+
+
+def test_key_store_files_are_owner_only_and_written_whole(fake_pyfhel, tmp_path):
+    session = HESession(key_dir=str(tmp_path), rotation_plan=RotationPlan(2 ** 13, {3: 4}, n_primes=6))
+    session.get()
+
+    names = os.listdir(session.path)
+    assert not [name for name in names if name.startswith('.')]
+    for name in names:
+        assert stat.S_IMODE(os.stat(os.path.join(session.path, name)).st_mode) == 0o600
+
+
+def test_interrupted_save_leaves_no_partial_store_entry(monkeypatch, tmp_path):
+    class FailingPyfhel(FakePyfhel):
+        def save_rotate_key(self, path):
+            open(path, 'w').close()
+            raise OSError('disk full')
+
+    monkeypatch.setitem(sys.modules, 'Pyfhel', types.SimpleNamespace(Pyfhel=FailingPyfhel))
+    session = HESession(key_dir=str(tmp_path))
+
+    with pytest.raises(OSError, match='disk full'):
+        session.get()
+    assert not HESession._in_store(session.path)
+    assert 'rotate.key' not in os.listdir(session.path)
+    assert not [name for name in os.listdir(session.path) if name.startswith('.')]
+
+
+def test_every_caller_waiting_on_a_failed_setup_gets_its_error(monkeypatch):
+    started = threading.Event()
+
+    class FailingPyfhel(FakePyfhel):
+        def keyGen(self):
+            started.wait(5)
+            raise RuntimeError('keygen failed')
+
+    monkeypatch.setitem(sys.modules, 'Pyfhel', types.SimpleNamespace(Pyfhel=FailingPyfhel))
+    session = HESession().start()
+    errors = []
+
+    def wait():
+        try:
+            session.get()
+        except RuntimeError as e:
+            errors.append(e)
+
+    waiters = [threading.Thread(target=wait) for _ in range(4)]
+    for waiter in waiters:
+        waiter.start()
+    started.set()
+    for waiter in waiters:
+        waiter.join(5)
+
+    assert len(errors) == 4
+
+    monkeypatch.setitem(sys.modules, 'Pyfhel', types.SimpleNamespace(Pyfhel=FakePyfhel))
+    assert session.get() is not None
+
+
+def deep_kernel(depth):
+    kernel = types.ModuleType('deepmsr')
+    kernel.MULT_DEPTH = depth
+    return kernel
+
+
+def test_session_rejects_kernels_deeper_than_the_chain():
+    HESession(kernels=[deep_kernel(len(DEFAULT_CKKS_PARAMS['qi_sizes']) - 2)])
+
+    with pytest.raises(ValueError, match='MULT_DEPTH of deepmsr'):
+        HESession(kernels=[deep_kernel(len(DEFAULT_CKKS_PARAMS['qi_sizes']) - 1)])
+
+
+def test_run_rejects_custom_kernels_deeper_than_the_chain():
+    class DeepSecuredCCA(SecuredChengChurchAlgorithm):
+        kernels = SecuredChengChurchAlgorithm.kernels + (deep_kernel(5),)
+
+    data = np.random.RandomState(0).uniform(0, 100, (40, 8))
+
+    with pytest.raises(ValueError, match='MULT_DEPTH'):
+        DeepSecuredCCA(num_biclusters=1, msr_threshold=300, backend='simulated').run(data)
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from SecBiclib.algorithms import maskedmsr
+from SecBiclib.algorithms.backends import SimulatedBackend
+from SecBiclib.algorithms.dryrun import MASKED_PLAIN_KERNELS
+from SecBiclib.algorithms.profiling import HEProfile
+from SecBiclib.algorithms.secca import SecuredChengChurchAlgorithm
+
+MASKED_KERNELS = (maskedmsr.calculate_masked_msr, maskedmsr.calculate_masked_msr_col_addition,
+                  maskedmsr.calculate_masked_msr_row_addition)
+
+
+def masks(n_rows, n_cols, seed=0):
+    state = np.random.RandomState(seed)
+    rows, cols = state.rand(n_rows) < 0.6, state.rand(n_cols) < 0.6
+    rows[:2], cols[:2] = True, True
+    return rows, cols
+
+
+def as_tuple(results):
+    return results if isinstance(results, tuple) else (results,)
+
+
+@pytest.mark.parametrize('index', range(3))
+def test_masked_kernels_match_the_plaintext_msrs_of_the_bicluster(index):
+    matrix = maskedmsr.EncryptedMatrix(np.random.RandomState(1).uniform(0, 100, (50, 8)))
+    rows, cols = masks(*matrix.shape)
+
+    decrypted = as_tuple(MASKED_KERNELS[index](SimulatedBackend(), matrix, rows, cols))
+    plain = as_tuple(MASKED_PLAIN_KERNELS[index](matrix, rows, cols))
+
+    for plain_msr, msr in zip(plain, decrypted):
+        assert np.shape(plain_msr) == np.shape(msr)
+        assert np.allclose(plain_msr, msr, atol=0.011)
+
+
+def test_matrix_is_encrypted_once_for_every_bicluster_evaluated():
+    HE = SimulatedBackend()
+    HE.profile = HEProfile()
+    matrix = maskedmsr.EncryptedMatrix(np.random.RandomState(1).uniform(0, 100, (50, 8)))
+
+    for seed in range(3):
+        rows, cols = masks(*matrix.shape, seed=seed)
+        for kernel in MASKED_KERNELS:
+            kernel(HE, matrix, rows, cols)
+
+    assert HE.profile.totals()['encrypt'][0] == matrix.shape[1]
+
+
+def test_refresh_encrypts_only_the_masked_columns_again():
+    HE = SimulatedBackend()
+    data = np.random.RandomState(1).uniform(0, 100, (50, 8))
+    matrix = maskedmsr.EncryptedMatrix(data)
+    before = list(matrix.columns(HE))
+
+    data[:10, [2, 5]] = -1.0
+    matrix.refresh([2, 5])
+
+    after = matrix.columns(HE)
+    assert [j for j in range(8) if after[j] is not before[j]] == [2, 5]
+    for j in (2, 5):
+        np.testing.assert_allclose(HE.decrypt(after[j])[:50], data[:, j], atol=1e-3)
+
+
+def test_run_encrypts_the_masked_columns_between_biclusters():
+    data = np.random.RandomState(0).uniform(0, 100, (120, 12))
+    biclustering = SecuredChengChurchAlgorithm(num_biclusters=3, msr_threshold=300, backend='simulated',
+                                               execution='encrypt_once', profile=True).run(data)
+
+    masked_cols = sum(len(bicluster.cols) for bicluster in biclustering.biclusters[:-1])
+    encryptions = {phase: count for (phase, _, op), count in biclustering.profile.counts.items() if op == 'encrypt'}
+    assert encryptions.pop('masking') == masked_cols
+    assert sum(encryptions.values()) == data.shape[1]
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from SecBiclib.algorithms.backends import SimulatedBackend
+from SecBiclib.algorithms.memory import HEMemoryBudgetError, MemoryTracker, ciphertext_bytes
+
+
+class RecordingBackend(SimulatedBackend):
+    """Simulation backend recording the primitives it runs"""
+
+    def __init__(self, params=None):
+        super().__init__(params)
+        self.ran = []
+
+    def _encrypt(self, values):
+        self.ran.append('encrypt')
+        return super()._encrypt(values)
+
+    def _mul(self, x, y):
+        self.ran.append('mul')
+        return super()._mul(x, y)
+
+
+def test_memory_accounting_follows_live_ciphertexts():
+    HE = SimulatedBackend()
+    HE.memory = MemoryTracker()
+    fresh = ciphertext_bytes(HE.params)
+
+    x = HE.encrypt(np.arange(4.0))
+    y = x * x
+    assert HE.memory.live_count == 2
+    assert HE.memory.live_bytes == fresh + ciphertext_bytes(HE.params, 0, 3)
+
+    HE.relinearize(y)
+    HE.rescale_to_next(y)
+    assert HE.memory.live_bytes == fresh + ciphertext_bytes(HE.params, 1, 2)
+
+    del x, y
+    assert HE.memory.live_count == 0
+    assert HE.memory.peak_bytes == fresh + ciphertext_bytes(HE.params, 0, 3)
+
+
+def test_budget_is_checked_before_the_backend_allocates():
+    HE = RecordingBackend()
+    fresh = ciphertext_bytes(HE.params)
+    HE.memory = MemoryTracker(budget=2 * fresh)
+
+    x = HE.encrypt(np.arange(4.0))
+    with pytest.raises(HEMemoryBudgetError):
+        x * x
+    assert HE.ran == ['encrypt']
+
+    y = HE.encrypt(np.arange(4.0))
+    with pytest.raises(HEMemoryBudgetError):
+        HE.encrypt(np.arange(4.0))
+    assert HE.ran == ['encrypt', 'encrypt']
+    assert HE.memory.live_count == 2
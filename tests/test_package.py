@@ -0,0 +1,30 @@
+import subprocess
+import sys
+
+
+def loaded_modules(code):
+    """SecBiclib and Pyfhel modules loaded by running code in a fresh interpreter"""
+    script = code + "\nimport sys\nprint(' '.join(m for m in sys.modules if m.startswith(('SecBiclib', 'Pyfhel'))))"
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout
+
+    return set(output.split())
+
+
+def test_package_import_loads_no_kernel():
+    modules = loaded_modules("import SecBiclib.algorithms")
+
+    assert 'SecBiclib.algorithms.encryptedmsr' not in modules
+    assert 'Pyfhel' not in modules
+
+
+def test_private_names_load_no_kernel():
+    modules = loaded_modules("import SecBiclib.algorithms as a\nassert not hasattr(a, '_x')\n"
+                             "assert not hasattr(a, '__wrapped__')")
+
+    assert not any('msr' in m for m in modules)
+
+
+def test_kernel_functions_are_exported_on_access():
+    modules = loaded_modules("from SecBiclib.algorithms import calculate_msr")
+
+    assert 'SecBiclib.algorithms.encryptedmsr' in modules
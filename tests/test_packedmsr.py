@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from SecBiclib.algorithms import packedmsr
+from SecBiclib.algorithms.backends import SimulatedBackend
+from SecBiclib.algorithms.dryrun import plain_msr
+from SecBiclib.algorithms.profiling import HEProfile
+
+
+@pytest.mark.parametrize('shape', [(100, 10), (300, 17), (3000, 5)])
+def test_packed_kernel_matches_the_plaintext_msr(shape):
+    HE = SimulatedBackend()
+    HE.profile = HEProfile()
+    data = np.random.RandomState(0).uniform(0, 100, shape)
+
+    for plain, msr in zip(plain_msr(data), packedmsr.calculate_packed_msr(HE, data)):
+        assert np.shape(plain) == np.shape(msr)
+        assert np.allclose(plain, msr, atol=0.011)
+
+    counted = {op: count for op, (count, _) in HE.profile.totals().items() if op != 'encode'}
+    assert counted == packedmsr.op_counts(shape, HE.n_slots)
+
+
+def test_more_columns_fit_in_a_ciphertext_as_rows_are_deleted():
+    n_slots = SimulatedBackend().n_slots
+    columns_per_ciphertext = [packedmsr.layout(n_rows, n_slots)[1] for n_rows in (2884, 1000, 300, 40)]
+
+    assert columns_per_ciphertext == sorted(columns_per_ciphertext)
+    assert columns_per_ciphertext[0] == 2 and columns_per_ciphertext[-1] == n_slots // 64
+    assert packedmsr.op_counts((300, 16), n_slots)['encrypt'] == 1
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from SecBiclib.algorithms import encryptedmsr, primitives
+from SecBiclib.algorithms.backends import SimulatedBackend
+from SecBiclib.algorithms.profiling import HEProfile
+
+
+def window_sums(x, length, step):
+    return sum(np.roll(x, -i * step) for i in range(length))
+
+
+@pytest.mark.parametrize('length', [1, 2, 5, 8, 13, 20])
+@pytest.mark.parametrize('step', [1, 3])
+def test_rotate_and_sum_matches_numpy_in_logarithmic_rotations(length, step):
+    HE = SimulatedBackend()
+    HE.profile = HEProfile()
+    x = np.random.RandomState(0).uniform(-1, 1, HE.n_slots)
+
+    result = primitives.rotate_and_sum(HE, HE.encrypt(x), length, step)
+
+    np.testing.assert_allclose(HE.decrypt(result), window_sums(x, length, step), atol=1e-3)
+    n_rotations = HE.profile.totals().get('rotate', (0, 0.0))[0]
+    assert n_rotations == primitives.rotate_and_sum_count(length) <= 2 * np.log2(length) + 1e-9
+
+
+def test_replicate_copies_each_slot_over_the_following_ones():
+    HE = SimulatedBackend()
+    x = np.zeros(HE.n_slots)
+    x[[0, 10]] = [2.0, 3.0]
+
+    result = HE.decrypt(primitives.replicate(HE, HE.encrypt(x), 5, 2))
+
+    expected = np.zeros(HE.n_slots)
+    expected[0:10:2], expected[10:20:2] = 2.0, 3.0
+    np.testing.assert_allclose(result, expected, atol=1e-3)
+
+
+def test_segment_sums_and_sums_across_segments():
+    HE = SimulatedBackend()
+    segment = 16
+    x = np.random.RandomState(1).uniform(-1, 1, HE.n_slots)
+    segments = x.reshape(-1, segment)
+
+    sums = HE.decrypt(primitives.segment_sums(HE, HE.encrypt(x), segment)).reshape(-1, segment)
+    across = HE.decrypt(primitives.across_segments_sums(HE, HE.encrypt(x), segment)).reshape(-1, segment)
+
+    np.testing.assert_allclose(sums[:, 0], segments.sum(axis=1), atol=1e-3)
+    np.testing.assert_allclose(across, np.tile(segments.sum(axis=0), (len(segments), 1)), atol=1e-3)
+
+
+def test_single_ciphertext_msr_takes_logarithmic_rotations():
+    HE = SimulatedBackend()
+    HE.profile = HEProfile()
+    data = np.random.RandomState(0).uniform(0, 100, (64, 16))
+
+    encryptedmsr.calculate_single_msr(HE, data)
+
+    n_rotations = HE.profile.totals()['rotate'][0]
+    assert n_rotations == encryptedmsr.single_op_counts(data.shape)['rotate']
+    assert encryptedmsr.single_op_counts((1024, 64))['rotate'] < 2 * n_rotations
@@ -0,0 +1,38 @@
+import numpy as np
+
+from SecBiclib.algorithms import optencryptedmsr
+from SecBiclib.algorithms.backends import SimulatedBackend
+from SecBiclib.algorithms.profiling import HEProfile
+from SecBiclib.algorithms.secca import SecuredChengChurchAlgorithm
+
+
+def test_profile_attributes_every_operation_to_a_phase_and_a_kernel():
+    data = np.random.RandomState(0).uniform(0, 100, (120, 12))
+    profile = SecuredChengChurchAlgorithm(num_biclusters=1, msr_threshold=300, backend='simulated',
+                                          profile=True).run(data).profile
+
+    assert set(profile.totals('phase')) == {'setup', 'multiple_node_deletion', 'single_node_deletion', 'node_addition'}
+    assert set(profile.totals('kernel')) == {None, 'calculate_msr', 'calculate_msr_col_addition',
+                                             'calculate_opt_msr_row_addition'}
+    for by in ('phase', 'kernel', 'op'):
+        assert sum(count for count, _ in profile.totals(by).values()) == profile.total_count
+    assert len(profile.to_dict()['operations']) == len(profile.counts)
+
+
+def test_run_without_profile_returns_none():
+    data = np.random.RandomState(0).uniform(0, 100, (60, 8))
+    biclustering = SecuredChengChurchAlgorithm(num_biclusters=1, msr_threshold=300, backend='simulated').run(data)
+
+    assert biclustering.profile is None
+
+
+def test_profile_counts_match_the_kernel_op_counts():
+    HE = SimulatedBackend()
+    HE.profile = HEProfile()
+    data = np.random.RandomState(0).uniform(0, 100, (100, 6))
+
+    optencryptedmsr.calculate_opt_msr(HE, data)
+
+    counted = {op: count for op, (count, _) in HE.profile.totals().items()}
+    counted.pop('encode', None)
+    assert counted == optencryptedmsr.op_counts(data.shape, HE.n_slots)
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from SecBiclib.algorithms.backends import SimulatedBackend
+from SecBiclib.algorithms.profiling import HEProfile
+from SecBiclib.algorithms.secca import SecuredChengChurchAlgorithm
+from SecBiclib.algorithms.rotations import RotationPlan
+
+
+@pytest.mark.parametrize('shape', [(2884, 17), (300, 20)])
+def test_targeted_plan_generates_fewer_keys_than_the_full_set(shape):
+    kernels = SecuredChengChurchAlgorithm()._kernel_modules()
+    plan = RotationPlan.for_kernels(kernels, shape, 2 ** 13, n_primes=6)
+
+    assert len(plan.key_steps) < plan.full_key_count
+    assert plan.saved_bytes > 0
+
+
+def test_plan_decomposes_every_required_step_into_key_steps():
+    kernels = SecuredChengChurchAlgorithm()._kernel_modules()
+    plan = RotationPlan.for_kernels(kernels, (300, 20), 2 ** 13)
+
+    for step in plan.required_steps:
+        path = plan.decompose(step)
+        assert set(path) <= set(plan.key_steps)
+        assert sum(path) % plan.n_slots == step
+
+
+def test_plan_keys_the_negative_steps_of_the_kernels():
+    kernels = SecuredChengChurchAlgorithm()._kernel_modules()
+    plan = RotationPlan.for_kernels(kernels, (2884, 17), 2 ** 13, n_primes=6)
+
+    assert plan.key_switches(-1) == 1
+    assert any(step > plan.n_slots // 2 for step in plan.key_steps if step != plan.n_slots - 1)
+    assert plan.mean_key_switches < 1.5
+
+
+def test_backend_counts_rotations_as_key_switches():
+    HE = SimulatedBackend()
+    HE.rotation_plan = RotationPlan(HE.n_slots, {1: 1, 2: 1}, max_keys=0)
+    HE.profile = HEProfile()
+    ctxt = HE.encrypt(np.arange(HE.n_slots, dtype=float))
+
+    rotated = HE.rotate(ctxt, 3, in_new_ctxt=True)
+
+    assert HE.rotation_plan.key_switches(3) == 2
+    assert HE.profile.totals()['rotate'][0] == 2
+    np.testing.assert_allclose(HE.decrypt(rotated)[:4], [3, 4, 5, 6], atol=1e-3)
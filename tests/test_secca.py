@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from sklearn.utils import validation
+
+from SecBiclib.algorithms.secca import SecuredChengChurchAlgorithm
+
+
+def test_sessions_start_before_the_data_is_converted(monkeypatch):
+    events = []
+    get_sessions = SecuredChengChurchAlgorithm._get_sessions
+    check_array = validation.check_array
+
+    def recording_get_sessions(self, data, backend=None):
+        sessions = get_sessions(self, data, backend)
+        start = sessions.start
+        sessions.start = lambda: events.append('start') or start()
+        return sessions
+
+    monkeypatch.setattr(SecuredChengChurchAlgorithm, '_get_sessions', recording_get_sessions)
+    monkeypatch.setattr(validation, 'check_array', lambda *args, **kwargs: events.append('check_array') or
+                        check_array(*args, **kwargs))
+
+    data = np.random.RandomState(0).randint(0, 100, (30, 5)).tolist()
+    SecuredChengChurchAlgorithm(num_biclusters=1, msr_threshold=300, backend='simulated').run(data)
+
+    assert events[:2] == ['start', 'check_array']
+
+
+@pytest.mark.parametrize('he_params', [None, 'auto'])
+def test_invalid_data_is_reported_by_check_array(he_params):
+    data = np.array([[1.0, np.nan], [2.0, 3.0]])
+
+    with pytest.raises(ValueError, match='NaN'):
+        SecuredChengChurchAlgorithm(he_params=he_params, backend='simulated').run(data)
+
+
+@pytest.mark.parametrize('execution', ['per_call', 'encrypt_once'])
+def test_no_ciphertext_outlives_a_run(execution):
+    data = np.random.RandomState(0).randint(0, 100, (40, 8))
+    secca = SecuredChengChurchAlgorithm(num_biclusters=2, msr_threshold=300, backend='simulated', execution=execution,
+                                        track_memory=True)
+    secca.run(data)
+
+    assert secca.memory_usage.live_count == 0
+    assert secca.memory_usage.live_bytes == 0
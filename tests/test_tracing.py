@@ -0,0 +1,49 @@
+import json
+
+import numpy as np
+
+from SecBiclib.algorithms.secca import SecuredChengChurchAlgorithm
+from SecBiclib.algorithms.tracing import Tracer
+
+
+def contains(outer, inner):
+    return outer['ts'] <= inner['ts'] and inner['ts'] + inner['dur'] <= outer['ts'] + outer['dur'] + 1e-3
+
+
+def test_run_writes_nested_chrome_trace_events(tmp_path):
+    path = str(tmp_path / 'trace.json')
+    data = np.random.RandomState(0).uniform(0, 100, (120, 12))
+    SecuredChengChurchAlgorithm(num_biclusters=1, msr_threshold=300, backend='simulated', trace=path).run(data)
+
+    with open(path) as f:
+        trace = json.load(f)
+    events = trace['traceEvents']
+
+    assert all(set(event) == {'name', 'cat', 'ph', 'ts', 'dur', 'pid', 'tid', 'args'} and event['ph'] == 'X'
+               for event in events)
+    assert [event['ts'] for event in events] == sorted(event['ts'] for event in events)
+    by_category = {}
+    for event in events:
+        by_category.setdefault(event['cat'], []).append(event)
+    assert {'run', 'phase', 'kernel', 'he'} <= set(by_category)
+
+    run = next(event for event in by_category['run'] if event['name'] == 'run')
+    assert all(contains(run, event) for event in events)
+    for he in by_category['he']:
+        assert he['args']['count'] >= 1
+        assert any(contains(kernel, he) for kernel in by_category['kernel']) or \
+            any(contains(event, he) for event in by_category['run'] if event['name'] == 'key_setup')
+    for kernel in by_category['kernel']:
+        assert any(contains(phase, kernel) for phase in by_category['phase'])
+
+
+def test_tracer_merges_consecutive_primitives_into_batches():
+    tracer = Tracer()
+    with tracer.kernel('calculate_msr'):
+        tracer.record('rotate', 1.0, 1.1)
+        tracer.record('rotate', 1.1, 1.2)
+        tracer.record('add', 1.2, 1.3)
+
+    batches = [(event['name'], event['args']['count']) for event in tracer.to_dict()['traceEvents']
+               if event['cat'] == 'he']
+    assert batches == [('rotate', 2), ('add', 1)]